@@ -0,0 +1,300 @@
+# api/agent_service.py
+
+import asyncio
+import json
+import os
+import threading
+import time
+import uuid
+import traceback
+from typing import List, Dict, Any, Optional
+
+import uvicorn
+from fastapi import FastAPI, HTTPException
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.messages import HumanMessage, AIMessage
+
+import config
+from orchestrator import AgentOrchestrator
+from modules.knowledge_base import load_marketing_vectorstore, load_festival_vectorstore
+from modules.tool_events import serialize_events
+
+logger = config.get_logger(__name__)
+
+# --- FastAPI App & Models ---
+app = FastAPI(title="MarketSync Agent Service")
+
+# 세션 ID -> {"orchestrator", "lock", "last_used"}
+# LLM 클라이언트 / 임베딩 모델 / 벡터 스토어는 프로세스 공용 캐시를 통해 모든 세션이 공유
+_sessions: Dict[str, Dict[str, Any]] = {}
+_sessions_lock = asyncio.Lock()
+_agent_semaphore: Optional[asyncio.Semaphore] = None
+# 실행 ID -> 취소 이벤트 (요청에 run_id 가 있을 때만 등록, DELETE /agent/runs/{run_id} 로 취소)
+_run_cancel_events: Dict[str, threading.Event] = {}
+
+
+class ChatMessage(BaseModel):
+    role: str
+    content: str
+
+
+class AgentRequest(BaseModel):
+    session_id: str
+    user_query: str
+    store_profile: Dict[str, Any]
+    chat_history: List[ChatMessage] = Field(default_factory=list)
+    last_recommended_festivals: Optional[List[str]] = None
+    run_id: Optional[str] = None  # 클라이언트가 정한 실행 ID (취소용)
+
+
+def _to_langchain_history(chat_history: List[ChatMessage]) -> list:
+    history = []
+    for msg in chat_history:
+        if msg.role == "user":
+            history.append(HumanMessage(content=msg.content))
+        elif msg.role == "assistant":
+            history.append(AIMessage(content=msg.content))
+    return history
+
+
+def serialize_agent_result(result: Dict[str, Any]) -> Dict[str, Any]:
+    """invoke_agent 결과의 (AgentAction, output) 튜플을 JSON 직렬화 가능한 dict 로 변환합니다."""
+    steps = []
+    for action, output in result.get("intermediate_steps", []):
+        steps.append({
+            "tool": getattr(action, "tool", None),
+            "tool_input": getattr(action, "tool_input", None),
+            "log": getattr(action, "log", ""),
+            "output": output,
+        })
+    return jsonable_encoder({
+        "final_response": result.get("final_response", ""),
+        "intermediate_steps": steps,
+        "events": serialize_events(result.get("events")),
+    })
+
+
+def _format_sse(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
+
+
+class _QueueCallbackHandler(BaseCallbackHandler):
+    """작업 스레드에서 발생한 도구 실행 이벤트를 이벤트 루프의 asyncio.Queue 로 전달합니다."""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, queue: asyncio.Queue):
+        self.loop = loop
+        self.queue = queue
+
+    def _emit(self, event: str, data: Dict[str, Any]):
+        self.loop.call_soon_threadsafe(self.queue.put_nowait, (event, data))
+
+    def on_tool_start(self, serialized, input_str, **kwargs):
+        self._emit("tool_start", {"tool": (serialized or {}).get("name")})
+
+    def on_tool_end(self, output, **kwargs):
+        self._emit("tool_end", {"tool": kwargs.get("name")})
+
+
+class _RunCancelled(Exception):
+    """취소된 실행에서 다음 LLM / 도구 호출을 막기 위해 발생시키는 예외"""
+
+
+class _RunCancelCallbackHandler(BaseCallbackHandler):
+    """
+    LLM / 도구 호출 직전에 취소 여부를 확인합니다. (modules/agent_runner 의 로컬 취소와 같은 방식)
+    raise_error=True 이므로 _RunCancelled 가 실행 중인 체인으로 전파되어 남은 호출이 실행되지 않습니다.
+    """
+
+    raise_error = True
+
+    def __init__(self, cancel_event: threading.Event):
+        self.cancel_event = cancel_event
+
+    def _check(self):
+        if self.cancel_event.is_set():
+            raise _RunCancelled()
+
+    def on_chat_model_start(self, serialized, messages, **kwargs):
+        self._check()
+
+    def on_llm_start(self, serialized, prompts, **kwargs):
+        self._check()
+
+    def on_tool_start(self, serialized, input_str, **kwargs):
+        self._check()
+
+
+def _cancelled_result() -> Dict[str, Any]:
+    return {"final_response": "", "intermediate_steps": [], "events": [], "cancelled": True}
+
+
+def _get_semaphore() -> asyncio.Semaphore:
+    global _agent_semaphore
+    if _agent_semaphore is None:
+        _agent_semaphore = asyncio.Semaphore(config.AGENT_SERVICE_MAX_CONCURRENCY)
+    return _agent_semaphore
+
+
+async def _evict_expired_sessions():
+    """마지막 사용 후 AGENT_SESSION_TTL_SECONDS 가 지난 세션을 제거합니다. (_sessions_lock 보유 상태에서 호출)"""
+    now = time.time()
+    expired = [sid for sid, s in _sessions.items() if now - s["last_used"] > config.AGENT_SESSION_TTL_SECONDS]
+    for sid in expired:
+        del _sessions[sid]
+    if expired:
+        logger.info(f"--- [Agent Service] 만료 세션 {len(expired)}개 정리 (활성 세션: {len(_sessions)}) ---")
+
+
+async def _get_session(session_id: str) -> Dict[str, Any]:
+    async with _sessions_lock:
+        session = _sessions.get(session_id)
+        if session is None:
+            raise HTTPException(status_code=404, detail=f"'{session_id}' 세션을 찾을 수 없습니다.")
+        session["last_used"] = time.time()
+        return session
+
+
+@app.on_event("startup")
+async def _warm_up():
+    """공용 리소스(벡터 스토어, 임베딩 모델, LLM)를 서버 시작 시 한 번 로드합니다."""
+    if not os.environ.get("GOOGLE_API_KEY"):
+        logger.critical("--- [Agent Service] GOOGLE_API_KEY 환경변수가 설정되지 않았습니다. ---")
+    await asyncio.to_thread(load_marketing_vectorstore)
+    db = await asyncio.to_thread(load_festival_vectorstore)
+    if db is None:
+        logger.critical("--- [Agent Service] 축제 벡터 DB 로딩 실패 ---")
+    logger.info("--- [Agent Service] 공용 리소스 로딩 완료 ---")
+
+
+# --- API Endpoints ---
+
+@app.get("/agent/health")
+async def health():
+    return {"status": "ok", "sessions": len(_sessions)}
+
+
+@app.post("/agent/sessions")
+async def create_session():
+    """상담 세션을 생성합니다. (세션마다 도구 결과 캐시 / 프로필 컨텍스트 캐시를 별도로 가짐)"""
+    google_api_key = os.environ.get("GOOGLE_API_KEY")
+    if not google_api_key:
+        raise HTTPException(status_code=500, detail="GOOGLE_API_KEY 환경변수가 설정되지 않았습니다.")
+
+    async with _sessions_lock:
+        await _evict_expired_sessions()
+        if len(_sessions) >= config.AGENT_SESSION_MAX_COUNT:
+            raise HTTPException(status_code=503, detail="동시 상담 세션 수가 한도를 초과했습니다.")
+
+    orchestrator = await asyncio.to_thread(AgentOrchestrator, google_api_key)
+    session_id = uuid.uuid4().hex
+    async with _sessions_lock:
+        _sessions[session_id] = {"orchestrator": orchestrator, "lock": asyncio.Lock(), "last_used": time.time()}
+    logger.info(f"✅ [Agent Service] 세션 생성: {session_id} (활성 세션: {len(_sessions)})")
+    return {"session_id": session_id}
+
+
+@app.delete("/agent/sessions/{session_id}")
+async def delete_session(session_id: str):
+    async with _sessions_lock:
+        _sessions.pop(session_id, None)
+    return {"session_id": session_id, "deleted": True}
+
+
+async def _run_agent(session: Dict[str, Any], request: AgentRequest, callbacks: Optional[list] = None) -> Dict[str, Any]:
+    """
+    동기 invoke_agent 를 작업 스레드에서 실행합니다.
+    같은 세션의 요청은 순서대로, 전체 동시 실행 수는 AGENT_SERVICE_MAX_CONCURRENCY 로 제한합니다.
+    request.run_id 가 있으면 실행 중(또는 대기 중)에 DELETE /agent/runs/{run_id} 로 취소할 수 있으며,
+    취소된 실행은 {"cancelled": true} 결과를 반환합니다.
+    """
+    cancel_event = threading.Event()
+    callbacks = list(callbacks or [])
+    if request.run_id:
+        _run_cancel_events[request.run_id] = cancel_event
+        callbacks.append(_RunCancelCallbackHandler(cancel_event))
+    try:
+        async with session["lock"], _get_semaphore():
+            if cancel_event.is_set():
+                return _cancelled_result()
+            result = await asyncio.to_thread(
+                session["orchestrator"].invoke_agent,
+                user_query=request.user_query,
+                store_profile_dict=request.store_profile,
+                chat_history=_to_langchain_history(request.chat_history),
+                last_recommended_festivals=request.last_recommended_festivals,
+                callbacks=callbacks,
+            )
+    except _RunCancelled:
+        return _cancelled_result()
+    finally:
+        if request.run_id:
+            _run_cancel_events.pop(request.run_id, None)
+    # 오케스트레이터가 취소 예외를 잡아 오류 답변으로 바꾼 경우에도 취소로 처리
+    if cancel_event.is_set():
+        return _cancelled_result()
+    return serialize_agent_result(result)
+
+
+@app.delete("/agent/runs/{run_id}")
+async def cancel_run(run_id: str):
+    """실행 중인 턴을 취소합니다. 이후의 LLM / 도구 호출이 실행되지 않습니다. (이미 끝난 실행이면 cancelled=false)"""
+    cancel_event = _run_cancel_events.get(run_id)
+    if cancel_event is not None:
+        cancel_event.set()
+        logger.info(f"✅ [Agent Service] 실행 취소 요청: {run_id}")
+    return {"run_id": run_id, "cancelled": cancel_event is not None}
+
+
+@app.post("/agent/invoke")
+async def invoke(request: AgentRequest):
+    session = await _get_session(request.session_id)
+    logger.info(f"✅ [Agent Service] '/agent/invoke' 요청 수신 (session={request.session_id})")
+    try:
+        return await _run_agent(session, request)
+    except Exception as e:
+        logger.critical(f"❌ [Agent Service CRITICAL] 에이전트 실행 오류: {e}\n{traceback.format_exc()}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"에이전트 실행 중 오류 발생: {e}")
+
+
+@app.post("/agent/stream")
+async def stream(request: AgentRequest):
+    """
+    에이전트 실행 진행 상황을 SSE(text/event-stream)로 전달합니다.
+    이벤트: tool_start / tool_end / result / error
+    """
+    session = await _get_session(request.session_id)
+    logger.info(f"✅ [Agent Service] '/agent/stream' 요청 수신 (session={request.session_id})")
+
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+    handler = _QueueCallbackHandler(loop, queue)
+
+    async def _produce():
+        try:
+            result = await _run_agent(session, request, callbacks=[handler])
+            await queue.put(("result", result))
+        except Exception as e:
+            logger.critical(f"❌ [Agent Service CRITICAL] 스트리밍 실행 오류: {e}", exc_info=True)
+            await queue.put(("error", {"detail": str(e)}))
+
+    async def _event_stream():
+        task = asyncio.create_task(_produce())
+        try:
+            while True:
+                event, data = await queue.get()
+                yield _format_sse(event, data)
+                if event in ("result", "error"):
+                    break
+        finally:
+            if not task.done():
+                # 클라이언트 연결이 끊겨도 실행 중인 턴은 끝까지 수행 (세션 캐시 반영)
+                logger.warning(f"--- [Agent Service] 스트림 연결 종료 (session={request.session_id}) ---")
+
+    return StreamingResponse(_event_stream(), media_type="text/event-stream")
+
+
+if __name__ == "__main__":
+    uvicorn.run(app, host="127.0.0.1", port=config.AGENT_SERVICE_PORT)
@@ -1,5 +1,7 @@
 # api/data_loader.py
 
+import hashlib
+import json
 import pandas as pd
 import os
 
@@ -65,4 +67,45 @@ def load_and_preprocess_data():
                 continue
                 
     logger.info(f"--- [Preprocess] 데이터 로드 및 전처리 최종 완료. (Shape: {df.shape}) ---")
-    return df
\ No newline at end of file
+    return df
+
+
+def compute_data_version(file_path=None) -> str:
+    """
+    데이터 파일 내용의 해시로 데이터 버전을 계산합니다.
+    (클라이언트 프로필 캐시 키 / ETag 에 사용되며, 파일이 바뀌면 버전도 바뀜)
+    """
+    file_path = file_path or config.PATH_FINAL_DF
+    digest = hashlib.sha1()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()[:12]
+
+
+def build_merchant_picker_payload(df: pd.DataFrame) -> dict:
+    """
+    가게 선택 화면용 목록을 열(column) 단위로 미리 구성합니다.
+    가맹점 ID 별 최신 행의 (ID, 가맹점명, 상권, 업종)만 담고, 반복이 많은 상권 / 업종은 코드 번호로 저장합니다.
+    내용 해시("hash")는 데이터가 같으면 서버를 재시작해도 같으므로 ETag 와 클라이언트 캐시 키로 사용합니다.
+    """
+    columns = [c for c in ['가맹점ID', '가맹점명', '상권', '업종', '기준년월'] if c in df.columns]
+    merchants = df[columns]
+    if '기준년월' in merchants.columns:
+        merchants = merchants.sort_values('기준년월', kind='stable')
+    merchants = merchants.drop_duplicates('가맹점ID', keep='last').sort_values(['가맹점명', '가맹점ID'], kind='stable')
+
+    def _text(col):
+        if col not in merchants.columns:
+            return pd.Series([''] * len(merchants), index=merchants.index)
+        return merchants[col].fillna('').astype(str)
+
+    payload = {"count": len(merchants), "ids": _text('가맹점ID').tolist(), "names": _text('가맹점명').tolist()}
+    for col, values_key, codes_key in (('상권', 'areas', 'area_codes'), ('업종', 'categories', 'category_codes')):
+        codes, uniques = pd.factorize(_text(col), sort=True)
+        payload[values_key] = uniques.tolist()
+        payload[codes_key] = codes.tolist()
+
+    digest = hashlib.sha1(json.dumps(payload, ensure_ascii=False, sort_keys=True).encode("utf-8"))
+    payload["hash"] = digest.hexdigest()[:16]
+    return payload
@@ -1,15 +1,17 @@
 # api/server.py
 
 import uvicorn
+import gzip
 import json
 import numpy as np
 import pandas as pd
 import traceback
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request, Response
+from fastapi.middleware.gzip import GZipMiddleware
 from pydantic import BaseModel
 import math
 
-from api.data_loader import load_and_preprocess_data 
+from api.data_loader import load_and_preprocess_data, compute_data_version, build_merchant_picker_payload
 import config
 
 logger = config.get_logger(__name__)
@@ -20,8 +22,23 @@ if DF_MERCHANT is None:
     logger.critical("--- [API Server Error] 데이터 로딩 실패. 서버를 종료합니다. ---")
     exit()
 
+# 데이터 버전 (final_df.csv 내용 해시). 응답의 ETag / X-Data-Version 헤더와 프로필 본문에 포함
+DATA_VERSION = compute_data_version()
+logger.info(f"--- [API Server] 데이터 버전: {DATA_VERSION} ---")
+
+# 가게 선택 화면용 목록: 시작 시 한 번 직렬화 + gzip 압축해 두고 요청마다 그대로 전송
+MERCHANT_PICKER = build_merchant_picker_payload(DF_MERCHANT)
+MERCHANT_PICKER_BODY = json.dumps(MERCHANT_PICKER, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+MERCHANT_PICKER_GZIP = gzip.compress(MERCHANT_PICKER_BODY)
+logger.info(
+    f"--- [API Server] 가게 선택 목록 {MERCHANT_PICKER['count']}개 준비 "
+    f"({len(MERCHANT_PICKER_BODY):,}B → gzip {len(MERCHANT_PICKER_GZIP):,}B, hash={MERCHANT_PICKER['hash']}) ---"
+)
+
 # --- FastAPI App & Models ---
 app = FastAPI()
+# 큰 JSON 응답(프로필 / 가게 목록) 압축. 이미 압축된 응답(Content-Encoding 지정)은 건너뜀
+app.add_middleware(GZipMiddleware, minimum_size=config.API_GZIP_MIN_BYTES)
 
 class MerchantRequest(BaseModel):
     merchant_id: str
@@ -38,15 +55,33 @@ def replace_nan_with_none(data):
         return None
     return data
 
+def _version_headers(etag: str) -> dict:
+    return {"ETag": etag, "X-Data-Version": DATA_VERSION}
+
+
+def _etag_matches(http_request: Request, etag: str) -> bool:
+    """If-None-Match 헤더가 현재 ETag 와 일치하는지 확인합니다. (W/ 접두사, 여러 값, * 허용)"""
+    if_none_match = http_request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
 # --- API Endpoints ---
 
 # Streamlit UI의 가맹점 검색용 엔드포인트 추가
 @app.get("/merchants")
-def get_merchant_list():
+def get_merchant_list(http_request: Request, response: Response):
     """
     Streamlit UI에서 가게 검색용으로 사용할
     (가맹점ID, 가맹점명) 리스트를 반환합니다.
+    클라이언트의 If-None-Match 가 현재 데이터 버전과 같으면 304 를 반환합니다.
     """
+    etag = f'"{DATA_VERSION}-merchants"'
+    if _etag_matches(http_request, etag):
+        logger.info("✅ [API] '/merchants' 변경 없음 (304)")
+        return Response(status_code=304, headers=_version_headers(etag))
+    response.headers.update(_version_headers(etag))
     try:
         logger.info(f"✅ [API] '/merchants' 가맹점 목록 요청 수신")
         # 'to_dict('records')'가 JSON으로 직렬화하기 가장 좋음
@@ -58,12 +93,38 @@ def get_merchant_list():
         raise HTTPException(status_code=500, detail=f"가게 목록 로딩 실패: {e}")
 
 
+@app.get("/merchants/picker")
+def get_merchant_picker(http_request: Request):
+    """
+    가게 선택 화면용 목록(ID / 가맹점명 / 상권 / 업종, 열 단위)을 반환합니다.
+    시작 시 미리 만든 본문(gzip)을 그대로 보내며, ETag 는 목록 내용 해시이므로
+    브라우저 / 클라이언트 캐시는 If-None-Match 로 304 를 받아 재사용합니다. (검색은 클라이언트에서 수행)
+    """
+    etag = f'"{MERCHANT_PICKER["hash"]}"'
+    headers = {
+        **_version_headers(etag),
+        "Cache-Control": f"public, max-age={config.MERCHANT_PICKER_CACHE_TTL_SECONDS}",
+        "Vary": "Accept-Encoding",
+    }
+    if _etag_matches(http_request, etag):
+        logger.info("✅ [API] '/merchants/picker' 변경 없음 (304)")
+        return Response(status_code=304, headers=headers)
+    if "gzip" in http_request.headers.get("accept-encoding", ""):
+        return Response(MERCHANT_PICKER_GZIP, media_type="application/json", headers={**headers, "Content-Encoding": "gzip"})
+    return Response(MERCHANT_PICKER_BODY, media_type="application/json", headers=headers)
+
+
 @app.post("/profile")
-def get_merchant_profile(request: MerchantRequest):
+def get_merchant_profile(request: MerchantRequest, http_request: Request, response: Response):
     """
     가맹점 ID를 받아 프로파일링된 데이터와 동종/동일 상권 평균 데이터를 반환합니다.
+    프로필은 (데이터 버전, 가맹점 ID)로 결정되므로, If-None-Match 가 일치하면 계산 없이 304 를 반환합니다.
     """
     merchant_id = request.merchant_id
+    etag = f'"{DATA_VERSION}-{merchant_id}"'
+    if _etag_matches(http_request, etag):
+        logger.info(f"✅ [API] '/profile' '{merchant_id}' 변경 없음 (304)")
+        return Response(status_code=304, headers=_version_headers(etag))
     logger.info(f"✅ [API] '/profile' 가맹점 ID '{merchant_id}' 프로파일링 요청 수신")
     try:
         store_df_multiple = DF_MERCHANT[DF_MERCHANT['가맹점ID'] == merchant_id]
@@ -137,12 +198,14 @@ def get_merchant_profile(request: MerchantRequest):
         
         final_result = {
             "store_profile": store_data,
-            "average_profile": average_data
+            "average_profile": average_data,
+            "data_version": DATA_VERSION,
         }
         
         clean_result = replace_nan_with_none(final_result)
         
         logger.info(f"✅ [API] '{store_data.get('가맹점명')}({merchant_id})' 프로파일링 성공 (기준년월: {store_data.get('기준년월')})")
+        response.headers.update(_version_headers(etag))
         return clean_result
 
     except HTTPException as e:
@@ -0,0 +1,152 @@
+# benchmarks/bench_chart_backends.py
+"""
+가맹점 프로필 차트 백엔드 비교: matplotlib(서버 PNG 렌더링) vs Vega-Lite(스펙 전송, 브라우저 렌더링).
+
+차트 종류(고객 분포 / 고객 유형 / 충성도)별로
+- 서버 CPU 시간: matplotlib 은 Figure 생성 + PNG 저장, Vega-Lite 는 스펙 생성 + JSON 직렬화
+- 전송 바이트: PNG 크기 vs 스펙 JSON 크기 (gzip 압축 크기 포함)
+를 측정합니다. 캐시(st.cache_data)를 거치지 않으므로 가게를 처음 선택했을 때의 비용에 해당합니다.
+
+가맹점 데이터(final_df.csv)가 있으면 그 행을 사용하고, 없으면 녹화된 대화 코퍼스의 가게 프로필을 바탕으로
+고객 비율만 무작위로 바꾼 가상 프로필을 만들어 사용합니다.
+
+실행 (프로젝트 루트에서):
+    python -m benchmarks.bench_chart_backends --profiles 30
+    python -m benchmarks.bench_chart_backends --final-df data/final_df.csv --output charts.json
+"""
+
+import argparse
+import gzip
+import json
+import random
+import statistics
+import time
+from pathlib import Path
+from typing import List, Dict, Any, Callable, Tuple
+
+import pandas as pd
+
+import config
+from modules.profile_model import MerchantProfile
+from modules.visualization import CHART_RENDERERS, CHART_SPEC_BUILDERS, _figure_to_png, set_korean_font
+from benchmarks.replay_corpus import DEFAULT_CORPUS, load_corpus
+
+logger = config.get_logger(__name__)
+
+RATIO_COLUMNS = [
+    f"{gender}{age}비율"
+    for gender in ("남성", "여성")
+    for age in ("20대이하", "30대", "40대", "50대", "60대이상")
+]
+CUSTOMER_TYPE_COLUMNS = ["유동인구이용비율", "거주자이용비율", "직장인이용비율"]
+
+
+def _split_percent(rng: random.Random, columns: List[str]) -> Dict[str, float]:
+    """합이 100 인 무작위 비율 (소수점 한 자리)"""
+    weights = [rng.random() for _ in columns]
+    total = sum(weights)
+    return {col: round(w / total * 100, 1) for col, w in zip(columns, weights)}
+
+
+def synthetic_profiles(count: int, seed: int, corpus=DEFAULT_CORPUS) -> List[Dict[str, Any]]:
+    """코퍼스의 가게 프로필을 바탕으로 고객 비율만 무작위로 바꾼 프로필 count 개"""
+    rng = random.Random(seed)
+    bases = [conv["store_profile"] for conv in load_corpus(corpus)]
+    profiles = []
+    for i in range(count):
+        profile = dict(bases[i % len(bases)])
+        profile["가맹점ID"] = f"CHART{i:05d}"
+        profile.update(_split_percent(rng, RATIO_COLUMNS))
+        profile.update(_split_percent(rng, CUSTOMER_TYPE_COLUMNS))
+        new_ratio = round(rng.uniform(10, 90), 1)
+        profile.update({"신규고객비율": new_ratio, "재이용고객비율": round(100 - new_ratio, 1)})
+        profiles.append(profile)
+    return profiles
+
+
+def final_df_profiles(path: Path, count: int, seed: int) -> List[Dict[str, Any]]:
+    df = pd.read_csv(path)
+    sample = df.sample(n=min(count, len(df)), random_state=seed)
+    return sample.to_dict(orient="records")
+
+
+def _measure(func: Callable[[], bytes]) -> Tuple[float, float, bytes]:
+    """(CPU 시간 s, 경과 시간 s, 결과 바이트)"""
+    cpu_start, wall_start = time.process_time(), time.perf_counter()
+    payload = func()
+    return time.process_time() - cpu_start, time.perf_counter() - wall_start, payload
+
+
+def bench_kind(kind: str, profiles: List[MerchantProfile], repeat: int) -> Dict[str, Dict[str, float]]:
+    backends = {
+        "matplotlib": lambda profile: _figure_to_png(CHART_RENDERERS[kind](profile)),
+        # Streamlit 은 스펙(데이터 포함)을 JSON 문자열로 직렬화하여 전송
+        "vega_lite": lambda profile: json.dumps(CHART_SPEC_BUILDERS[kind](profile)).encode("utf-8"),
+    }
+    result = {}
+    for backend, render in backends.items():
+        cpu, wall, raw, compressed = [], [], [], []
+        for _ in range(repeat):
+            for profile in profiles:
+                cpu_s, wall_s, payload = _measure(lambda: render(profile))
+                cpu.append(cpu_s)
+                wall.append(wall_s)
+                raw.append(len(payload))
+                compressed.append(len(gzip.compress(payload)))
+        result[backend] = {
+            "cpu_p50_ms": statistics.median(cpu) * 1000,
+            "cpu_mean_ms": statistics.fmean(cpu) * 1000,
+            "wall_p50_ms": statistics.median(wall) * 1000,
+            "bytes_mean": statistics.fmean(raw),
+            "gzip_bytes_mean": statistics.fmean(compressed),
+        }
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="차트 백엔드(matplotlib PNG vs Vega-Lite 스펙) CPU / 전송량 비교")
+    parser.add_argument("--final-df", type=str, default=str(config.PATH_FINAL_DF), help="가맹점 데이터 CSV (없으면 가상 프로필 사용)")
+    parser.add_argument("--profiles", type=int, default=20, help="측정할 가게 수")
+    parser.add_argument("--repeat", type=int, default=3, help="가게별 반복 횟수")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", type=str, default=None, help="결과 JSON 저장 경로")
+    args = parser.parse_args()
+
+    final_df = Path(args.final_df)
+    if final_df.exists():
+        profiles = final_df_profiles(final_df, args.profiles, args.seed)
+        source = str(final_df)
+    else:
+        logger.warning(f"--- [Bench] '{final_df}' 가 없어 가상 프로필을 사용합니다. ---")
+        profiles = synthetic_profiles(args.profiles, args.seed)
+        source = "synthetic"
+
+    profiles = [MerchantProfile.from_store(store) for store in profiles]
+    set_korean_font()
+    # 첫 렌더링의 폰트 캐시 / 모듈 초기화 비용 제외
+    for kind in CHART_RENDERERS:
+        _figure_to_png(CHART_RENDERERS[kind](profiles[0]))
+
+    report = {kind: bench_kind(kind, profiles, args.repeat) for kind in CHART_RENDERERS}
+
+    print(f"\n=== Chart Backends ({source}, 가게 {len(profiles)}개 x {args.repeat}회) ===")
+    for kind, backends in report.items():
+        print(f"\n[{kind}]")
+        for backend, stats in backends.items():
+            print(
+                f"  {backend:<11} CPU p50 {stats['cpu_p50_ms']:>8.2f}ms | "
+                f"payload {stats['bytes_mean']:>9.0f}B (gzip {stats['gzip_bytes_mean']:>8.0f}B)"
+            )
+        mpl, vega = backends["matplotlib"], backends["vega_lite"]
+        print(
+            f"  → Vega-Lite: CPU {mpl['cpu_p50_ms'] / max(vega['cpu_p50_ms'], 1e-6):.0f}배 적음, "
+            f"전송량 {mpl['bytes_mean'] / max(vega['bytes_mean'], 1):.0f}배 적음"
+        )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"source": source, "profiles": len(profiles), "repeat": args.repeat, "charts": report}, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+# benchmarks/bench_dynamic_scoring.py
+"""
+3단계 동적 속성 평가: LLM 평가 vs 규칙 기반(NumPy) 평가 벤치마크.
+
+동일한 후보(1~2단계 결과)에 대해 두 방식을 모두 실행하여
+소요 시간과 점수 일치도(스피어만 순위 상관, 평균 절대 오차)를 비교합니다.
+
+실행 (프로젝트 루트에서):
+    GOOGLE_API_KEY=... python -m benchmarks.bench_dynamic_scoring --repeat 3
+"""
+
+import argparse
+import json
+import os
+import time
+from typing import Dict, Any, List
+
+import numpy as np
+import pandas as pd
+
+import config
+from modules.llm_provider import get_or_create_base_llm
+from modules.filtering import FestivalRecommender
+
+logger = config.get_logger(__name__)
+
+# 벤치마크용 대표 채팅 프로필 (profile_utils.get_chat_profile_dict 형식)
+SAMPLE_CASES: List[Dict[str, Any]] = [
+    {
+        "query": "축제 추천해줘",
+        "profile": {
+            "상권": "성수동", "업종": "카페", "신규/재방문율": "신규 42.0% / 재방문 58.0%",
+            "자동추출특징": {"핵심고객": "여성 중심", "핵심연령대": "20대이하"},
+        },
+    },
+    {
+        "query": "가족 단위 손님이 많은 축제 알려줘",
+        "profile": {
+            "상권": "왕십리", "업종": "한식-육류/고기", "신규/재방문율": "신규 61.0% / 재방문 39.0%",
+            "자동추출특징": {"핵심고객": "남성 중심", "핵심연령대": "40대"},
+        },
+    },
+    {
+        "query": "가을에 참여할 만한 축제 찾아줘",
+        "profile": {
+            "상권": "마장동", "업종": "축산물", "신규/재방문율": "신규 25.0% / 재방문 75.0%",
+            "자동추출특징": {"핵심고객": "남성 중심", "핵심연령대": "50대이상"},
+        },
+    },
+]
+
+
+def _spearman(a: List[float], b: List[float]) -> float:
+    if len(a) < 2:
+        return float("nan")
+    ranks_a = pd.Series(a).rank().to_numpy()
+    ranks_b = pd.Series(b).rank().to_numpy()
+    if ranks_a.std() == 0 or ranks_b.std() == 0:
+        return float("nan")
+    return float(np.corrcoef(ranks_a, ranks_b)[0, 1])
+
+
+def run_case(case: Dict[str, Any], repeat: int, search_k: int) -> Dict[str, Any]:
+    store_profile = json.dumps(case["profile"], ensure_ascii=False)
+    recommender = FestivalRecommender(store_profile, case["query"])
+
+    rewritten_query = recommender._rewrite_query()
+    candidates = recommender._search_candidates(query=rewritten_query, k=search_k)
+    docs = [doc for doc, _ in candidates]
+
+    timings = {"llm": [], "rule": []}
+    scores = {}
+    for mode, scorer in (
+        ("llm", recommender._evaluate_candidates_dynamically),
+        ("rule", recommender._evaluate_candidates_by_rules),
+    ):
+        for _ in range(repeat):
+            start = time.perf_counter()
+            scores[mode] = scorer(candidates=docs)
+            timings[mode].append(time.perf_counter() - start)
+
+    common = [name for name in scores["rule"] if name in scores["llm"]]
+    llm_scores = [float(scores["llm"][n]["dynamic_score"]) for n in common]
+    rule_scores = [float(scores["rule"][n]["dynamic_score"]) for n in common]
+
+    return {
+        "query": case["query"],
+        "candidates": len(docs),
+        "compared": len(common),
+        "llm_sec_median": float(np.median(timings["llm"])),
+        "rule_sec_median": float(np.median(timings["rule"])),
+        "spearman": _spearman(llm_scores, rule_scores),
+        "mean_abs_diff": float(np.mean(np.abs(np.subtract(llm_scores, rule_scores)))) if common else float("nan"),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="3단계 동적 평가 LLM vs Rule 벤치마크")
+    parser.add_argument("--repeat", type=int, default=1, help="방식별 반복 횟수")
+    parser.add_argument("--search-k", type=int, default=10, help="2단계 후보 수")
+    parser.add_argument("--output", type=str, default=None, help="결과 JSON 저장 경로")
+    args = parser.parse_args()
+
+    google_api_key = os.environ.get("GOOGLE_API_KEY")
+    if not google_api_key:
+        raise SystemExit("GOOGLE_API_KEY 환경변수가 필요합니다.")
+    get_or_create_base_llm(google_api_key)
+
+    results = [run_case(case, args.repeat, args.search_k) for case in SAMPLE_CASES]
+    for r in results:
+        print(
+            f"{r['query'][:20]:<20} | LLM {r['llm_sec_median']:.2f}s | Rule {r['rule_sec_median'] * 1000:.1f}ms "
+            f"| spearman {r['spearman']:.2f} | MAE {r['mean_abs_diff']:.1f} ({r['compared']}/{r['candidates']})"
+        )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
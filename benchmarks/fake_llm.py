@@ -0,0 +1,233 @@
+# benchmarks/fake_llm.py
+"""
+네트워크 없이 결정적으로 동작하는 재생(replay)용 채팅 모델.
+
+- 에이전트 호출 (시스템 프롬프트에 '[현재 가게 프로필 (JSON)]' 포함):
+  녹화된 에이전트 결정(도구 호출 또는 최종 답변)을 큐에서 순서대로 꺼내 반환합니다.
+  도구 인자의 "$STORE_PROFILE" 은 시스템 프롬프트의 가게 프로필 JSON 으로 치환됩니다.
+- 도구 내부 호출 (쿼리 재작성, 동적 평가, 최종 포맷팅, 요약 등):
+  프롬프트 패턴별로 각 파서가 기대하는 형식의 응답을 생성합니다.
+"""
+
+import hashlib
+import json
+import re
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import List, Dict, Any, Optional, Callable, Union
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import BaseMessage, AIMessage, SystemMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from pydantic import PrivateAttr
+
+from utils.token_utils import estimate_tokens
+
+AGENT_PROMPT_MARKER = "[현재 가게 프로필 (JSON)]"
+STORE_PROFILE_PLACEHOLDER = "$STORE_PROFILE"
+
+_FESTIVAL_NAME_PATTERN = re.compile(r'"축제명"\s*:\s*"([^"]+)"')
+
+# 동시 사용자 시뮬레이션용: 현재 컨텍스트(사용자 스레드)에서만 사용하는 결정 큐
+_scoped_decisions: ContextVar[Optional[deque]] = ContextVar("scoped_decisions", default=None)
+
+
+@contextmanager
+def decision_scope(decisions: List[Dict[str, Any]]):
+    """
+    with 블록 안의 에이전트 호출은 공유 큐 대신 이 결정 목록을 사용합니다.
+    (여러 사용자가 같은 모델을 동시에 사용할 때 서로의 결정을 가져가지 않도록)
+    """
+    token = _scoped_decisions.set(deque(decisions))
+    try:
+        yield
+    finally:
+        _scoped_decisions.reset(token)
+
+
+def _stable_score(name: str, low: int = 40, high: int = 95) -> int:
+    """축제명으로부터 결정적인 점수를 만듭니다."""
+    digest = int(hashlib.md5(name.encode("utf-8")).hexdigest()[:8], 16)
+    return low + digest % (high - low + 1)
+
+
+def _festival_names(prompt: str) -> List[str]:
+    return list(dict.fromkeys(_FESTIVAL_NAME_PATTERN.findall(prompt)))
+
+
+def _respond_rewrite(prompt: str) -> str:
+    return "가게 핵심 고객층이 많이 방문하는 지역 축제"
+
+
+def _respond_dynamic_scores(prompt: str) -> str:
+    return json.dumps([
+        {"축제명": name, "동적_점수": _stable_score(name), "평가_이유": "(replay) 타겟 고객과 방문자 특성 기준 평가"}
+        for name in _festival_names(prompt)
+    ], ensure_ascii=False)
+
+
+def _respond_narratives(prompt: str) -> str:
+    return json.dumps([
+        {"축제명": name, "축제_기본정보": f"{name}은(는) 지역 대표 축제입니다.", "추천_이유": "(replay) 가게 고객층과 잘 맞습니다."}
+        for name in _festival_names(prompt)
+    ], ensure_ascii=False)
+
+
+def _respond_final_format(prompt: str) -> str:
+    results = []
+    for name in _festival_names(prompt):
+        score = re.search(rf'"축제명"\s*:\s*"{re.escape(name)}"[^{{}}]*?"추천_점수"\s*:\s*([\d.]+)', prompt)
+        timing = re.search(rf'"축제명"\s*:\s*"{re.escape(name)}"[^{{}}]*?"predicted_2026_timing"\s*:\s*"([^"]*)"', prompt)
+        results.append({
+            "축제명": name,
+            "추천_점수": float(score.group(1)) if score else float(_stable_score(name)),
+            "축제_기본정보": f"{name}은(는) 지역 대표 축제입니다.",
+            "추천_이유": "(replay) 가게 고객층과 잘 맞습니다.",
+            "홈페이지": "",
+            "2026년 예상 시기": timing.group(1) if timing else "정보 없음",
+        })
+    return json.dumps(results, ensure_ascii=False)
+
+
+def _respond_summary(prompt: str) -> str:
+    return "- (replay) 사장님은 축제 참여와 마케팅 전략에 관심이 있습니다."
+
+
+def _respond_report(prompt: str) -> str:
+    return (
+        "### 📋 (replay) 분석 리포트\n\n"
+        "* 핵심 고객층을 겨냥한 축제 기간 한정 메뉴를 운영하세요.\n"
+        "* SNS 인증 이벤트로 신규 고객 유입을 늘리세요.\n"
+        "* 재방문 쿠폰으로 단골 전환을 유도하세요."
+    )
+
+
+# (프롬프트에 포함된 표식, 응답 생성 함수) - 위에서부터 먼저 일치하는 항목을 사용
+DEFAULT_PATTERN_RESPONSES: List[tuple] = [
+    ("오직 재작성된 쿼리만 출력", _respond_rewrite),
+    ("'동적_점수'", _respond_dynamic_scores),
+    ("'축제_기본정보'(1문장)", _respond_narratives),
+    ("[최종 추천 축제 목록 (JSON)", _respond_final_format),
+    ("[갱신된 요약]", _respond_summary),
+]
+
+
+class ReplayChatModel(BaseChatModel):
+    """
+    녹화된 에이전트 결정을 재생하는 가짜 채팅 모델.
+    llm_provider 의 풀(model_copy)과 호환되도록 model / temperature 필드를 가지며,
+    복사본들은 같은 결정 큐를 공유합니다.
+    """
+
+    model: str = "replay"
+    temperature: float = 0.1
+    latency_seconds: float = 0.0  # 호출당 인위적 지연 (실제 API 지연 모사용)
+    pattern_responses: List[tuple] = DEFAULT_PATTERN_RESPONSES
+    default_response: Union[str, Callable[[str], str]] = _respond_report
+
+    _decisions: deque = PrivateAttr(default_factory=deque)
+    _lock: Any = PrivateAttr(default_factory=threading.Lock)
+    _stats: Dict[str, int] = PrivateAttr(default_factory=lambda: {"agent_calls": 0, "tool_prompt_calls": 0})
+
+    def model_copy(self, *, update: Optional[Dict[str, Any]] = None, deep: bool = False):
+        # temperature 만 다른 복사본도 같은 결정 큐 / 통계를 공유
+        copied = super().model_copy(update=update, deep=deep)
+        copied._decisions = self._decisions
+        copied._lock = self._lock
+        copied._stats = self._stats
+        return copied
+
+    @property
+    def _llm_type(self) -> str:
+        return "replay-chat-model"
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        return dict(self._stats)
+
+    def bind_tools(self, tools, **kwargs):
+        # 도구 스키마는 녹화된 결정에 이미 반영되어 있으므로 그대로 반환
+        return self
+
+    def load_decisions(self, decisions: List[Dict[str, Any]]):
+        """다음 에이전트 호출들에서 순서대로 반환할 결정 목록을 설정합니다. (남은 결정은 버림)"""
+        with self._lock:
+            self._decisions.clear()
+            self._decisions.extend(decisions)
+
+    def remaining_decisions(self) -> int:
+        with self._lock:
+            return len(self._decisions)
+
+    def _agent_message(self, messages: List[BaseMessage]) -> AIMessage:
+        scoped = _scoped_decisions.get()
+        with self._lock:
+            self._stats["agent_calls"] += 1
+            queue = scoped if scoped is not None else self._decisions
+            decision = queue.popleft() if queue else None
+
+        if decision and decision.get("tool_calls"):
+            store_profile = self._extract_store_profile(messages)
+            tool_calls = []
+            for i, call in enumerate(decision["tool_calls"]):
+                args = {
+                    k: (store_profile if v == STORE_PROFILE_PLACEHOLDER else v)
+                    for k, v in (call.get("args") or {}).items()
+                }
+                tool_calls.append({"name": call["name"], "args": args, "id": f"replay_{id(decision)}_{i}"})
+            return AIMessage(content="", tool_calls=tool_calls)
+
+        if decision and "content" in decision:
+            return AIMessage(content=decision["content"])
+
+        # 남은 결정이 없으면 마지막 도구 결과를 그대로 최종 답변으로 사용
+        last_tool = next((m for m in reversed(messages) if isinstance(m, ToolMessage)), None)
+        return AIMessage(content=str(last_tool.content) if last_tool else "(replay) 답변")
+
+    @staticmethod
+    def _extract_store_profile(messages: List[BaseMessage]) -> str:
+        for message in messages:
+            if isinstance(message, SystemMessage) and AGENT_PROMPT_MARKER in message.content:
+                after = message.content.split(AGENT_PROMPT_MARKER, 1)[1].strip()
+                return after.splitlines()[0].strip() if after else "{}"
+        return "{}"
+
+    def _tool_prompt_message(self, prompt: str) -> AIMessage:
+        with self._lock:
+            self._stats["tool_prompt_calls"] += 1
+        for marker, responder in self.pattern_responses:
+            if marker in prompt:
+                return AIMessage(content=responder(prompt) if callable(responder) else responder)
+        default = self.default_response
+        return AIMessage(content=default(prompt) if callable(default) else default)
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager=None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        if self.latency_seconds > 0:
+            time.sleep(self.latency_seconds)
+
+        is_agent_call = any(
+            isinstance(m, SystemMessage) and AGENT_PROMPT_MARKER in str(m.content) for m in messages
+        )
+        if is_agent_call:
+            message = self._agent_message(messages)
+        else:
+            prompt = "\n".join(str(m.content) for m in messages)
+            message = self._tool_prompt_message(prompt)
+
+        input_tokens = sum(estimate_tokens(str(m.content)) for m in messages)
+        output_tokens = estimate_tokens(str(message.content)) + 10 * len(message.tool_calls)
+        message.usage_metadata = {
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "total_tokens": input_tokens + output_tokens,
+        }
+        return ChatResult(generations=[ChatGeneration(message=message)])
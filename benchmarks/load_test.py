@@ -0,0 +1,279 @@
+# benchmarks/load_test.py
+"""
+다중 사용자 부하 테스트.
+
+동시 사용자 N명을 스레드로 시뮬레이션합니다. 각 사용자는 Streamlit 세션처럼
+  1) /merchants 로 가게 목록 조회 → 2) /profile 로 가게 선택
+  3) 자기 AgentOrchestrator 로 녹화된 대화(benchmarks/data/replay_conversations.json)의 턴을 순서대로 전송
+을 수행합니다. LLM 은 ReplayChatModel(가짜, --llm-latency 로 지연 모사)을 사용하고,
+임베딩 / FAISS 검색은 실제 경로를 사용합니다. (--fake-embeddings 로 오프라인 실행 가능)
+
+동시 사용자 수를 단계적으로 늘리며(--concurrency 1,2,4,8,16) 단계별 처리량과 지연 백분위를 측정하고,
+p95 턴 지연이 1단계 대비 --collapse-factor 배 이상 늘거나 오류율이 --max-error-rate 를 넘는
+첫 단계를 '붕괴 지점'으로 보고합니다. 예외뿐 아니라 도구가 오류 결과를 반환했거나
+(tools.tool_cache.is_error_output) 오케스트레이터가 오류 / 대체 답변을 반환한 턴도 실패로 집계합니다. 결과는 --output JSON 으로 저장해 커밋 간 비교할 수 있습니다.
+
+실행 (프로젝트 루트에서, API 서버 실행 중):
+    python -m benchmarks.load_test --concurrency 1,2,4,8 --output load.json
+    python -m benchmarks.load_test --in-process-api --fake-embeddings --llm-latency 0.2
+"""
+
+import argparse
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional
+
+if "--fake-embeddings" in sys.argv:
+    # config 로드 전에 지정해야 함
+    os.environ["MARKETSYNC_EMBEDDING_BACKEND"] = "fake"
+
+import config
+from modules.api_client import MerchantApiClient
+from modules.chat_history import ChatHistoryManager
+from modules.llm_provider import set_llm
+from benchmarks.fake_llm import ReplayChatModel, decision_scope
+from benchmarks.replay_corpus import (
+    DEFAULT_CORPUS, failed_tool_calls, load_corpus, percentile, substitute_last_recommended,
+)
+from modules.tool_events import recommended_festival_ids
+
+logger = config.get_logger(__name__)
+
+
+def _latency_summary(seconds: List[float]) -> Dict[str, float]:
+    return {
+        "count": len(seconds),
+        "p50_ms": percentile(seconds, 50) * 1000,
+        "p95_ms": percentile(seconds, 95) * 1000,
+        "p99_ms": percentile(seconds, 99) * 1000,
+        "max_ms": max(seconds) * 1000 if seconds else float("nan"),
+    }
+
+
+def _start_in_process_api() -> str:
+    """api.server 앱을 백그라운드 스레드의 uvicorn 으로 띄우고 base URL 을 반환합니다."""
+    import uvicorn
+    from api.server import app
+
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True, name="load-test-api").start()
+    deadline = time.time() + 30
+    while not server.started:
+        if time.time() > deadline:
+            raise RuntimeError("in-process API 서버 시작 실패")
+        time.sleep(0.05)
+    return f"http://127.0.0.1:{port}"
+
+
+def _turn_failure(result: Dict[str, Any]) -> Optional[str]:
+    """예외 없이 끝난 턴의 실패 사유 (도구 오류 결과 / 오케스트레이터 오류·대체 답변), 정상이면 None"""
+    from orchestrator import is_error_response
+
+    failed_tools = failed_tool_calls(result.get("intermediate_steps", []))
+    if failed_tools:
+        return f"도구 오류: {', '.join(failed_tools)}"
+    if is_error_response(result.get("final_response")):
+        return f"오류 응답: {(result.get('final_response') or '(빈 응답)')[:150]}"
+    return None
+
+
+class SimulatedUser:
+    """가게 선택 → 스크립트된 대화 턴 전송을 수행하는 가상 사용자 (Streamlit 세션 1개에 해당)"""
+
+    def __init__(self, user_id: int, api_url: str, conversation: Dict[str, Any], seed: int):
+        self.user_id = user_id
+        self.api = MerchantApiClient(api_url)
+        self.conversation = conversation
+        self.random = random.Random(seed)
+        self.records: List[Dict[str, Any]] = []
+
+    def _timed(self, op: str, func, *args, check=None, **kwargs):
+        """func 실행 시간을 기록합니다. check(result) 가 실패 사유를 반환하면 예외와 같이 실패로 기록합니다."""
+        start = time.perf_counter()
+        try:
+            result = func(*args, **kwargs)
+            elapsed = time.perf_counter() - start
+            failure = check(result) if check else None
+            if failure:
+                self.records.append({"op": op, "seconds": elapsed, "ok": False, "error": failure[:200]})
+                logger.warning(f"--- [Load Test] user {self.user_id} '{op}' 실패: {failure} ---")
+            else:
+                self.records.append({"op": op, "seconds": elapsed, "ok": True})
+            return result
+        except Exception as e:
+            self.records.append({"op": op, "seconds": time.perf_counter() - start, "ok": False, "error": str(e)[:200]})
+            logger.error(f"--- [Load Test] user {self.user_id} '{op}' 실패: {e} ---")
+            return None
+
+    def run(self, max_turns: Optional[int]):
+        from orchestrator import AgentOrchestrator
+
+        merchants = self._timed("merchants", self.api.get_merchants)
+        if not merchants:
+            return
+        merchant_id = self.random.choice(merchants)["가맹점ID"]
+        profile = self._timed("profile", self.api.get_profile, merchant_id)
+        if not profile:
+            return
+
+        orchestrator = self._timed("session_init", AgentOrchestrator, google_api_key="load-test")
+        if orchestrator is None:
+            return
+        orchestrator.agent_executor.verbose = False
+
+        session_state: Dict[str, Any] = {}
+        messages: List[Dict[str, str]] = []
+        last_recommended: List[str] = []
+        turns = self.conversation["turns"][:max_turns] if max_turns else self.conversation["turns"]
+        for turn in turns:
+            history = ChatHistoryManager(session_state).build(messages)
+            decisions = substitute_last_recommended(turn.get("agent_decisions", []), last_recommended)
+            with decision_scope(decisions):
+                result = self._timed(
+                    "turn", orchestrator.invoke_agent, check=_turn_failure,
+                    user_query=turn["user"],
+                    store_profile_dict=profile["store_profile"],
+                    chat_history=history,
+                    last_recommended_festivals=last_recommended,
+                )
+            if result is None:
+                continue
+            last_recommended = recommended_festival_ids(result.get("events"))
+            messages += [
+                {"role": "user", "content": turn["user"]},
+                {"role": "assistant", "content": result.get("final_response", "")},
+            ]
+
+
+def run_level(concurrency: int, api_url: str, corpus: List[Dict[str, Any]], max_turns: Optional[int], seed: int) -> Dict[str, Any]:
+    """동시 사용자 concurrency 명을 한꺼번에 시작하여 모두 끝날 때까지 실행합니다."""
+    users = [
+        SimulatedUser(i, api_url, corpus[i % len(corpus)], seed=seed + i)
+        for i in range(concurrency)
+    ]
+    barrier = threading.Barrier(concurrency)
+
+    def _run(user: SimulatedUser):
+        barrier.wait()
+        user.run(max_turns)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="load-user") as pool:
+        list(pool.map(_run, users))
+    wall = time.perf_counter() - start
+
+    records = [r for u in users for r in u.records]
+    ops = sorted({r["op"] for r in records})
+    turns_ok = sum(1 for r in records if r["op"] == "turn" and r["ok"])
+    errors = sum(1 for r in records if not r["ok"])
+    return {
+        "concurrency": concurrency,
+        "wall_seconds": wall,
+        "turns": turns_ok,
+        "throughput_turns_per_sec": turns_ok / wall if wall > 0 else float("nan"),
+        "error_rate": errors / len(records) if records else 0.0,
+        "latency": {op: _latency_summary([r["seconds"] for r in records if r["op"] == op and r["ok"]]) for op in ops},
+        "errors": [r["error"] for r in records if not r["ok"]][:10],
+    }
+
+
+def find_collapse(levels: List[Dict[str, Any]], collapse_factor: float, max_error_rate: float) -> Optional[Dict[str, Any]]:
+    """p95 턴 지연이 첫 단계 대비 collapse_factor 배를 넘거나 오류율이 max_error_rate 를 넘는 첫 단계"""
+    if not levels:
+        return None
+    baseline_p95 = levels[0]["latency"].get("turn", {}).get("p95_ms")
+    for level in levels:
+        p95 = level["latency"].get("turn", {}).get("p95_ms")
+        if level["error_rate"] > max_error_rate:
+            return {"concurrency": level["concurrency"], "reason": f"error_rate {level['error_rate']:.1%}"}
+        if baseline_p95 and p95 and p95 > baseline_p95 * collapse_factor:
+            return {"concurrency": level["concurrency"], "reason": f"turn p95 {p95:.0f}ms > {collapse_factor}x baseline ({baseline_p95:.0f}ms)"}
+    return None
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, cwd=config.PROJECT_ROOT, timeout=5,
+        ).stdout.strip() or None
+    except Exception:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="다중 사용자 부하 테스트 (가짜 LLM + 실제 임베딩/FAISS)")
+    parser.add_argument("--concurrency", type=str, default="1,2,4,8,16", help="단계별 동시 사용자 수 (쉼표 구분)")
+    parser.add_argument("--api-url", type=str, default=config.API_SERVER_URL, help="데이터 API 서버 URL")
+    parser.add_argument("--in-process-api", action="store_true", help="api.server 앱을 이 프로세스에서 직접 실행")
+    parser.add_argument("--fake-embeddings", action="store_true", help="임베딩 모델 대신 결정적 가짜 임베딩 사용")
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="가짜 LLM 호출당 지연(초)")
+    parser.add_argument("--corpus", type=str, default=str(DEFAULT_CORPUS), help="녹화된 대화 JSON 경로")
+    parser.add_argument("--max-turns", type=int, default=None, help="사용자당 최대 턴 수 (기본: 대화 전체)")
+    parser.add_argument("--collapse-factor", type=float, default=3.0, help="붕괴 판단 기준 (1단계 p95 대비 배수)")
+    parser.add_argument("--max-error-rate", type=float, default=0.05, help="붕괴 판단 기준 오류율")
+    parser.add_argument("--stop-on-collapse", action="store_true", help="붕괴 지점에 도달하면 이후 단계 생략")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", type=str, default=None, help="결과 JSON 저장 경로")
+    args = parser.parse_args()
+
+    levels_to_run = [int(c) for c in args.concurrency.split(",") if c.strip()]
+    corpus = load_corpus(args.corpus)
+    api_url = _start_in_process_api() if args.in_process_api else args.api_url
+
+    set_llm(ReplayChatModel(model=config.LLM_MODEL_NAME, latency_seconds=args.llm_latency))
+
+    # 워밍업: 임베딩 모델 / 벡터 스토어 / 라우터 로딩을 측정에서 제외
+    logger.info("--- [Load Test] 워밍업 (1명) ---")
+    run_level(1, api_url, corpus, max_turns=1, seed=args.seed)
+
+    levels = []
+    for concurrency in levels_to_run:
+        logger.info(f"--- [Load Test] 동시 사용자 {concurrency}명 실행 ---")
+        level = run_level(concurrency, api_url, corpus, args.max_turns, args.seed)
+        levels.append(level)
+        turn = level["latency"].get("turn", {})
+        print(
+            f"[users={concurrency:>3}] {level['throughput_turns_per_sec']:.2f} turns/s | "
+            f"turn p50 {turn.get('p50_ms', float('nan')):.0f}ms p95 {turn.get('p95_ms', float('nan')):.0f}ms | "
+            f"profile p95 {level['latency'].get('profile', {}).get('p95_ms', float('nan')):.0f}ms | "
+            f"errors {level['error_rate']:.1%}"
+        )
+        if args.stop_on_collapse and find_collapse(levels, args.collapse_factor, args.max_error_rate):
+            break
+
+    collapse = find_collapse(levels, args.collapse_factor, args.max_error_rate)
+    best = max(levels, key=lambda l: l["throughput_turns_per_sec"]) if levels else None
+    report = {
+        "revision": _git_revision(),
+        "settings": {
+            "llm_latency": args.llm_latency,
+            "embedding_backend": config.EMBEDDING_BACKEND,
+            "router": config.INTENT_ROUTER_ENABLED,
+            "max_parallel_tools": config.AGENT_MAX_PARALLEL_TOOLS,
+            "collapse_factor": args.collapse_factor,
+            "max_error_rate": args.max_error_rate,
+        },
+        "levels": levels,
+        "peak_throughput": {"concurrency": best["concurrency"], "turns_per_sec": best["throughput_turns_per_sec"]} if best else None,
+        "collapse": collapse,
+    }
+    print(f"\n최대 처리량: {report['peak_throughput']}")
+    print(f"붕괴 지점: {collapse or '측정 범위 내 없음'}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+# benchmarks/profile_imports.py
+"""
+엔트리 포인트(streamlit_app.py)의 임포트 시간 프로파일링.
+
+엔트리 파일의 모듈 최상위 import 문만 추출하여 새 프로세스에서 `python -X importtime` 으로 실행하고,
+- 최상위 import 별 누적 시간 (가게 선택 화면이 뜨기 전에 반드시 지불하는 비용)
+- 누적 시간이 큰 하위 모듈 Top N
+- 무거운 패키지(LangChain / torch / FAISS / matplotlib 등)가 시작 경로에 섞여 들어왔는지
+를 보고합니다. --budget-ms 를 넘거나 --forbid 패키지가 로드되면 종료 코드 1 (CI 회귀 검사용).
+
+실행 (프로젝트 루트에서):
+    python -m benchmarks.profile_imports
+    python -m benchmarks.profile_imports --budget-ms 1000 --output imports.json
+    python -m benchmarks.profile_imports --module orchestrator --top 30
+"""
+
+import argparse
+import ast
+import json
+import re
+import statistics
+import subprocess
+import sys
+from typing import List, Dict, Any
+
+import config
+
+DEFAULT_FORBIDDEN = ("langchain", "langchain_core", "langchain_community", "langchain_google_genai", "torch", "faiss", "matplotlib")
+
+_IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)\s*$")
+
+
+def entry_imports(path) -> List[str]:
+    """파일의 모듈 최상위 import 문(함수 안의 지연 임포트 제외)이 가져오는 모듈 이름 목록"""
+    with open(path, encoding="utf-8") as f:
+        tree = ast.parse(f.read(), filename=str(path))
+    modules = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            modules.extend(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module and node.level == 0:
+            modules.append(node.module)
+    return list(dict.fromkeys(modules))
+
+
+def run_importtime(modules: List[str]) -> List[Dict[str, Any]]:
+    """새 인터프리터에서 modules 를 순서대로 임포트하고 -X importtime 결과를 파싱합니다."""
+    code = "; ".join(f"import {m}" for m in modules)
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True, text=True, cwd=config.PROJECT_ROOT,
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"임포트 실패:\n{completed.stderr[-2000:]}")
+    records = []
+    for line in completed.stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            records.append({
+                "module": name,
+                "self_ms": int(self_us) / 1000,
+                "cumulative_ms": int(cumulative_us) / 1000,
+                "depth": len(indent) // 2,
+            })
+    return records
+
+
+def summarize(runs: List[List[Dict[str, Any]]], modules: List[str], top: int, forbidden) -> Dict[str, Any]:
+    """여러 번 실행한 결과의 중앙값으로 최상위 import 별 비용 / Top N / 금지 패키지 로드 여부를 계산합니다."""
+    def _median_by_module(depth_filter) -> Dict[str, float]:
+        values: Dict[str, List[float]] = {}
+        for records in runs:
+            for r in records:
+                if depth_filter(r):
+                    values.setdefault(r["module"], []).append(r["cumulative_ms"])
+        return {m: statistics.median(v) for m, v in values.items()}
+
+    top_level = _median_by_module(lambda r: r["depth"] == 0)
+    all_modules = _median_by_module(lambda r: True)
+    totals = [sum(r["cumulative_ms"] for r in records if r["depth"] == 0) for records in runs]
+
+    # 엔트리 import 별 비용: 같은 패키지가 먼저 임포트되었다면 이후 import 는 0 에 가까움
+    per_entry = {}
+    for module in modules:
+        root = module.split(".")[0]
+        per_entry[module] = top_level.get(module, top_level.get(root, 0.0))
+
+    loaded = {r["module"] for records in runs for r in records}
+    forbidden_loaded = sorted(
+        p for p in forbidden if any(m == p or m.startswith(p + ".") for m in loaded)
+    )
+    heaviest = sorted(all_modules.items(), key=lambda item: item[1], reverse=True)[:top]
+    return {
+        "total_ms": statistics.median(totals),
+        "entry_imports_ms": per_entry,
+        "heaviest_modules_ms": dict(heaviest),
+        "forbidden_loaded": forbidden_loaded,
+        "modules_loaded": len(loaded) // max(len(runs), 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="엔트리 포인트 임포트 시간 프로파일링 (-X importtime)")
+    parser.add_argument("--entry", type=str, default=str(config.PROJECT_ROOT / "streamlit_app.py"), help="최상위 import 를 추출할 파일")
+    parser.add_argument("--module", action="append", default=None, help="엔트리 파일 대신 임포트할 모듈 (여러 번 지정 가능)")
+    parser.add_argument("--repeat", type=int, default=3, help="반복 횟수 (중앙값 사용)")
+    parser.add_argument("--top", type=int, default=20, help="누적 시간 상위 모듈 출력 개수")
+    parser.add_argument("--budget-ms", type=float, default=None, help="전체 임포트 시간 상한 (초과 시 종료 코드 1)")
+    parser.add_argument("--forbid", type=str, default=",".join(DEFAULT_FORBIDDEN), help="시작 경로에서 로드되면 안 되는 패키지 (쉼표 구분, 빈 값이면 검사 안 함)")
+    parser.add_argument("--output", type=str, default=None, help="결과 JSON 저장 경로")
+    args = parser.parse_args()
+
+    modules = args.module or entry_imports(args.entry)
+    forbidden = [p.strip() for p in args.forbid.split(",") if p.strip()] if not args.module else []
+    runs = [run_importtime(modules) for _ in range(args.repeat)]
+    report = summarize(runs, modules, args.top, forbidden)
+
+    print(f"\n=== Import Profile: {', '.join(modules)} ===")
+    print(f"전체 (중앙값, {args.repeat}회): {report['total_ms']:.0f}ms / 로드된 모듈 {report['modules_loaded']}개\n")
+    print("[최상위 import 별 누적 시간]")
+    for module, ms in report["entry_imports_ms"].items():
+        print(f"  {module:<40} {ms:>9.1f}ms")
+    print(f"\n[누적 시간 상위 {args.top}개 모듈]")
+    for module, ms in report["heaviest_modules_ms"].items():
+        print(f"  {module:<60} {ms:>9.1f}ms")
+
+    failed = False
+    if report["forbidden_loaded"]:
+        print(f"\n❌ 시작 경로에서 무거운 패키지가 로드됨: {', '.join(report['forbidden_loaded'])}")
+        failed = True
+    if args.budget_ms is not None and report["total_ms"] > args.budget_ms:
+        print(f"\n❌ 임포트 시간 {report['total_ms']:.0f}ms > 예산 {args.budget_ms:.0f}ms")
+        failed = True
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"modules": modules, **report}, f, ensure_ascii=False, indent=2)
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,395 @@
+# benchmarks/replay_benchmark.py
+"""
+오프라인 재생(replay) 벤치마크.
+
+녹화된 대화(benchmarks/data/replay_conversations.json)를 ReplayChatModel(가짜 LLM)과
+가짜 임베딩으로 AgentOrchestrator.invoke_agent 에 그대로 재생하여,
+Gemini 지연과 분리된 오케스트레이터 / 도구 / 검색 오버헤드를 측정합니다.
+네트워크 호출이 없으므로 성능 회귀 검사(--baseline)에 사용할 수 있습니다.
+
+- 단계별 소요 시간: 턴 전체, 라우터, 에이전트 LLM, 도구(도구별), 도구 내부 LLM, 검색(retriever), 오케스트레이터 오버헤드
+- 메모리: 턴별 tracemalloc 피크 할당량
+- 처리량: 초당 처리 턴 수
+- ALL_TOOLS 의 모든 도구를 기본 입력으로 직접 실행하는 도구 스윕
+- 오류 결과를 반환한 도구 호출(tools.tool_cache.is_error_output 기준)은 턴 / 도구별로 집계하여 보고하고,
+  지연 백분위에서 제외합니다. 하나라도 있으면 종료 코드 1로 실패합니다. (--allow-tool-errors 로 보고만)
+
+실행 (프로젝트 루트에서):
+    python -m benchmarks.replay_benchmark --repeat 3 --output replay.json
+    python -m benchmarks.replay_benchmark --baseline replay.json --max-regression 0.25
+"""
+
+import os
+
+# 임베딩 모델을 내려받지 않도록 config 로드 전에 가짜 임베딩을 지정
+os.environ.setdefault("MARKETSYNC_EMBEDDING_BACKEND", "fake")
+
+import argparse
+import json
+import sys
+import threading
+import time
+import tracemalloc
+from collections import defaultdict
+from typing import List, Dict, Any, Optional
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+import config
+from modules.llm_provider import set_llm, get_llm_stats
+from modules.chat_history import ChatHistoryManager
+from benchmarks.fake_llm import ReplayChatModel
+from benchmarks.replay_corpus import (
+    DEFAULT_CORPUS, failed_tool_calls, load_corpus, percentile, substitute_last_recommended,
+)
+from modules.tool_events import recommended_festival_ids
+from tools.tool_cache import is_error_output
+
+logger = config.get_logger(__name__)
+
+
+class StageTimingHandler(BaseCallbackHandler):
+    """
+    콜백으로 LLM / 도구 / 검색 실행 시간을 수집합니다.
+    LLM 호출은 도구 내부에서 실행되었는지 여부(부모 run 추적)로 'llm:agent' 와 'llm:tool' 로 구분합니다.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._parents: Dict[Any, Any] = {}
+        self._tool_runs: Dict[Any, str] = {}
+        self._starts: Dict[Any, tuple] = {}
+        self.durations: Dict[str, float] = defaultdict(float)
+        self.counts: Dict[str, int] = defaultdict(int)
+
+    def reset(self):
+        with self._lock:
+            self._parents.clear()
+            self._tool_runs.clear()
+            self._starts.clear()
+            self.durations = defaultdict(float)
+            self.counts = defaultdict(int)
+
+    def _inside_tool(self, run_id) -> bool:
+        parent = self._parents.get(run_id)
+        while parent is not None:
+            if parent in self._tool_runs:
+                return True
+            parent = self._parents.get(parent)
+        return False
+
+    def _start(self, run_id, parent_run_id, stage: Optional[str]):
+        with self._lock:
+            self._parents[run_id] = parent_run_id
+            if stage is not None:
+                self._starts[run_id] = (stage, time.perf_counter())
+
+    def _end(self, run_id):
+        with self._lock:
+            started = self._starts.pop(run_id, None)
+            if started is None:
+                return
+            stage, start = started
+            self.durations[stage] += time.perf_counter() - start
+            self.counts[stage] += 1
+
+    def on_chain_start(self, serialized, inputs, *, run_id, parent_run_id=None, **kwargs):
+        self._start(run_id, parent_run_id, None)
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, parent_run_id=None, **kwargs):
+        self._start(run_id, parent_run_id, None)
+        with self._lock:
+            stage = "llm:tool" if self._inside_tool(run_id) else "llm:agent"
+            self._starts[run_id] = (stage, time.perf_counter())
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        self._end(run_id)
+
+    def on_tool_start(self, serialized, input_str, *, run_id, parent_run_id=None, **kwargs):
+        name = (serialized or {}).get("name", "unknown")
+        self._start(run_id, parent_run_id, None)
+        with self._lock:
+            nested = self._inside_tool(run_id)
+            self._tool_runs[run_id] = name
+            # 최상위 도구 호출만 'tool:' 로 집계 (도구 내부의 하위 도구 호출은 'subtool:')
+            self._starts[run_id] = (f"{'subtool' if nested else 'tool'}:{name}", time.perf_counter())
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        self._end(run_id)
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        self._end(run_id)
+
+    def on_retriever_start(self, serialized, query, *, run_id, parent_run_id=None, **kwargs):
+        self._start(run_id, parent_run_id, "retriever")
+
+    def on_retriever_end(self, documents, *, run_id, **kwargs):
+        self._end(run_id)
+
+
+def _timed_router(orchestrator, handler_totals: Dict[str, float]):
+    """orchestrator.router.route 실행 시간을 측정하도록 감쌉니다."""
+    router = orchestrator.router
+    if router is None:
+        return
+    original_route = router.route
+
+    def route(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return original_route(*args, **kwargs)
+        finally:
+            handler_totals["router"] += time.perf_counter() - start
+
+    router.route = route
+
+
+def replay_corpus(orchestrator, model: ReplayChatModel, corpus: List[Dict[str, Any]], repeat: int) -> Dict[str, Any]:
+    handler = StageTimingHandler()
+    router_time = defaultdict(float)
+    _timed_router(orchestrator, router_time)
+
+    turn_records = []
+    wall_start = time.perf_counter()
+    for iteration in range(repeat):
+        for conversation in corpus:
+            # 대화마다 세션 상태(도구 캐시 / 대화 요약)를 새로 시작
+            orchestrator.tool_cache.clear()
+            session_state: Dict[str, Any] = {}
+            messages: List[Dict[str, str]] = []
+            last_recommended: List[str] = []
+
+            for turn_index, turn in enumerate(conversation["turns"]):
+                model.load_decisions(substitute_last_recommended(turn.get("agent_decisions", []), last_recommended))
+                handler.reset()
+                router_time["router"] = 0.0
+
+                history = ChatHistoryManager(session_state).build(messages)
+                tracemalloc.reset_peak()
+                mem_before = tracemalloc.get_traced_memory()[0]
+                start = time.perf_counter()
+                result = orchestrator.invoke_agent(
+                    user_query=turn["user"],
+                    store_profile_dict=conversation["store_profile"],
+                    chat_history=history,
+                    last_recommended_festivals=last_recommended,
+                    callbacks=[handler],
+                )
+                elapsed = time.perf_counter() - start
+                peak_alloc = tracemalloc.get_traced_memory()[1] - mem_before
+
+                steps = result.get("intermediate_steps", [])
+                last_recommended = recommended_festival_ids(result.get("events"))
+                messages += [
+                    {"role": "user", "content": turn["user"]},
+                    {"role": "assistant", "content": result.get("final_response", "")},
+                ]
+
+                stages = dict(handler.durations)
+                stages["router"] = router_time["router"]
+                top_level = sum(v for k, v in stages.items() if k.startswith("tool:")) + stages.get("llm:agent", 0.0)
+                stages["orchestrator_overhead"] = max(elapsed - top_level, 0.0)
+                routed = any(str(getattr(a, "log", "")).startswith("[Router]") for a, _ in steps)
+                failed_tools = failed_tool_calls(steps)
+                if failed_tools:
+                    logger.warning(f"--- [Replay] {conversation['name']} 턴 {turn_index} 도구 오류: {failed_tools} ---")
+
+                turn_records.append({
+                    "iteration": iteration,
+                    "conversation": conversation["name"],
+                    "turn": turn_index,
+                    "query": turn["user"],
+                    "routed": routed,
+                    "tools": [getattr(a, "tool", None) for a, _ in steps],
+                    "failed_tools": failed_tools,
+                    "seconds": elapsed,
+                    "peak_alloc_kb": peak_alloc / 1024,
+                    "stages": stages,
+                    "unused_decisions": model.remaining_decisions(),
+                })
+    wall = time.perf_counter() - wall_start
+
+    # 도구 오류가 난 턴은 (빠르게 실패하므로) 지연 / 메모리 통계에서 제외
+    ok_records = [r for r in turn_records if not r["failed_tools"]]
+    tool_errors: Dict[str, int] = defaultdict(int)
+    for record in turn_records:
+        for tool_name in record["failed_tools"]:
+            tool_errors[tool_name] += 1
+
+    stage_values: Dict[str, List[float]] = defaultdict(list)
+    for record in ok_records:
+        for stage, seconds in record["stages"].items():
+            stage_values[stage].append(seconds)
+
+    turn_seconds = [r["seconds"] for r in ok_records]
+    return {
+        "turns": len(turn_records),
+        "failed_turns": len(turn_records) - len(ok_records),
+        "tool_errors": dict(tool_errors),
+        "wall_seconds": wall,
+        "throughput_turns_per_sec": len(turn_records) / wall if wall > 0 else float("nan"),
+        "turn_p50_ms": percentile(turn_seconds, 50) * 1000,
+        "turn_p95_ms": percentile(turn_seconds, 95) * 1000,
+        "peak_alloc_kb_p50": percentile([r["peak_alloc_kb"] for r in ok_records], 50),
+        "peak_alloc_kb_max": max((r["peak_alloc_kb"] for r in ok_records), default=float("nan")),
+        "stages_ms": {
+            stage: {
+                "total": sum(values) * 1000,
+                "p50": percentile(values, 50) * 1000,
+                "p95": percentile(values, 95) * 1000,
+            }
+            for stage, values in sorted(stage_values.items())
+        },
+        "records": turn_records,
+    }
+
+
+def _sample_tool_args(tool, store_profile_json: str, festival_names: List[str]) -> Dict[str, Any]:
+    samples = {
+        "user_query": "축제 추천해줘",
+        "store_profile": store_profile_json,
+        "festival_name": festival_names[0],
+        "festival_names": festival_names[:2],
+    }
+    return {name: samples[name] for name in tool.args if name in samples}
+
+
+def sweep_tools(orchestrator, corpus: List[Dict[str, Any]], repeat: int) -> Dict[str, Any]:
+    """
+    ALL_TOOLS 의 각 도구를 (세션 캐시 없이) 직접 실행하여 도구별 소요 시간과 할당량을 측정합니다.
+    오류 결과를 반환한 호출은 errors 로 집계하고 시간 / 할당량 통계에서 제외합니다.
+    """
+    from tools.tool_loader import ALL_TOOLS
+
+    store_profile_json = orchestrator._get_profile_context(corpus[0]["store_profile"])
+    festival_names = ["강릉커피축제", "광주김치축제"]
+    results = {}
+    for tool in ALL_TOOLS:
+        args = _sample_tool_args(tool, store_profile_json, festival_names)
+        timings, allocs, errors = [], [], []
+        for _ in range(repeat):
+            tracemalloc.reset_peak()
+            mem_before = tracemalloc.get_traced_memory()[0]
+            start = time.perf_counter()
+            output = tool.invoke(args)
+            elapsed = time.perf_counter() - start
+            if is_error_output(output):
+                errors.append(str(output)[:200])
+                continue
+            timings.append(elapsed)
+            allocs.append((tracemalloc.get_traced_memory()[1] - mem_before) / 1024)
+        if errors:
+            logger.warning(f"--- [Replay] 도구 스윕 '{tool.name}' 오류 {len(errors)}/{repeat}회: {errors[0]} ---")
+        results[tool.name] = {
+            "p50_ms": percentile(timings, 50) * 1000,
+            "max_ms": max(timings, default=float("nan")) * 1000,
+            "peak_alloc_kb_p50": percentile(allocs, 50),
+            "errors": len(errors),
+            "error_sample": errors[0] if errors else None,
+        }
+    return results
+
+
+def collect_tool_errors(report: Dict[str, Any]) -> List[str]:
+    """재생 턴 / 도구 스윕에서 오류 결과를 반환한 도구 호출 요약"""
+    failures = [
+        f"replay.{tool_name}: {count}회 (실패 턴 {report['replay']['failed_turns']}/{report['replay']['turns']})"
+        for tool_name, count in sorted(report["replay"]["tool_errors"].items())
+    ]
+    for tool_name, stats in report.get("tool_sweep", {}).items():
+        if stats["errors"]:
+            failures.append(f"tool_sweep.{tool_name}: {stats['errors']}회 ({stats['error_sample']})")
+    return failures
+
+
+def check_regression(report: Dict[str, Any], baseline: Dict[str, Any], max_regression: float) -> List[str]:
+    """기준 결과 대비 max_regression(비율) 이상 느려진 지표 목록을 반환합니다."""
+    failures = []
+
+    def _compare(label: str, current: float, base: float):
+        if base and base > 0 and current > base * (1 + max_regression):
+            failures.append(f"{label}: {base:.1f} → {current:.1f} (+{(current / base - 1) * 100:.0f}%)")
+
+    _compare("turn_p50_ms", report["replay"]["turn_p50_ms"], baseline["replay"]["turn_p50_ms"])
+    _compare("turn_p95_ms", report["replay"]["turn_p95_ms"], baseline["replay"]["turn_p95_ms"])
+    for tool_name, stats in report.get("tool_sweep", {}).items():
+        base_stats = baseline.get("tool_sweep", {}).get(tool_name)
+        if base_stats:
+            _compare(f"tool_sweep.{tool_name}.p50_ms", stats["p50_ms"], base_stats["p50_ms"])
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="오프라인 재생 벤치마크 (가짜 LLM / 가짜 임베딩)")
+    parser.add_argument("--corpus", type=str, default=str(DEFAULT_CORPUS), help="녹화된 대화 JSON 경로")
+    parser.add_argument("--repeat", type=int, default=1, help="코퍼스 반복 횟수")
+    parser.add_argument("--tool-repeat", type=int, default=3, help="도구 스윕 반복 횟수 (0 이면 생략)")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="LLM 호출당 인위적 지연(초)")
+    parser.add_argument("--no-router", action="store_true", help="인텐트 라우터를 끄고 모든 턴을 에이전트로 실행")
+    parser.add_argument("--output", type=str, default=None, help="결과 JSON 저장 경로")
+    parser.add_argument("--baseline", type=str, default=None, help="비교할 기준 결과 JSON 경로")
+    parser.add_argument("--max-regression", type=float, default=0.25, help="허용 회귀 비율 (기본 25%%)")
+    parser.add_argument("--allow-tool-errors", action="store_true", help="도구 오류가 있어도 실패로 처리하지 않고 보고만 함")
+    args = parser.parse_args()
+
+    if args.no_router:
+        config.INTENT_ROUTER_ENABLED = False
+
+    corpus = load_corpus(args.corpus)
+
+    model = ReplayChatModel(model=config.LLM_MODEL_NAME, latency_seconds=args.llm_latency)
+    set_llm(model)
+
+    from orchestrator import AgentOrchestrator
+    orchestrator = AgentOrchestrator(google_api_key="replay")
+
+    tracemalloc.start()
+    report = {
+        "settings": {
+            "repeat": args.repeat,
+            "llm_latency": args.llm_latency,
+            "router": config.INTENT_ROUTER_ENABLED,
+            "embedding_backend": config.EMBEDDING_BACKEND,
+        },
+        "replay": replay_corpus(orchestrator, model, corpus, args.repeat),
+    }
+    if args.tool_repeat > 0:
+        report["tool_sweep"] = sweep_tools(orchestrator, corpus, args.tool_repeat)
+    tracemalloc.stop()
+    report["llm_stats"] = {k: v for k, v in get_llm_stats().items() if k != "pool_keys"}
+    report["replay_model_stats"] = model.stats
+
+    replay = report["replay"]
+    print(f"\n=== Replay: {replay['turns']} turns ({replay['failed_turns']} failed), "
+          f"{replay['throughput_turns_per_sec']:.2f} turns/s, "
+          f"p50 {replay['turn_p50_ms']:.1f}ms, p95 {replay['turn_p95_ms']:.1f}ms, "
+          f"peak alloc p50 {replay['peak_alloc_kb_p50']:.0f}KB ===")
+    for stage, stats in replay["stages_ms"].items():
+        print(f"{stage:<55} total {stats['total']:>9.1f}ms | p50 {stats['p50']:>8.1f}ms | p95 {stats['p95']:>8.1f}ms")
+    for tool_name, stats in report.get("tool_sweep", {}).items():
+        print(f"[sweep] {tool_name:<48} p50 {stats['p50_ms']:>8.1f}ms | peak alloc {stats['peak_alloc_kb_p50']:>8.0f}KB"
+              f" | errors {stats['errors']}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2, default=str)
+
+    tool_errors = collect_tool_errors(report)
+    if tool_errors:
+        print("\n[TOOL ERRORS] (지연 백분위에서 제외됨)\n" + "\n".join(tool_errors))
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        failures = check_regression(report, baseline, args.max_regression)
+        if failures:
+            print("\n[REGRESSION]\n" + "\n".join(failures))
+            sys.exit(1)
+        print("\n[OK] 기준 대비 회귀 없음")
+
+    if tool_errors and not args.allow_tool_errors:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
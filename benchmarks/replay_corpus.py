@@ -0,0 +1,41 @@
+# benchmarks/replay_corpus.py
+"""
+녹화된 대화 코퍼스(benchmarks/data/replay_conversations.json) 공용 유틸리티.
+replay_benchmark / load_test 에서 함께 사용합니다.
+"""
+
+import json
+from pathlib import Path
+from typing import List, Dict, Any
+
+import numpy as np
+
+from tools.tool_cache import is_error_output
+
+DEFAULT_CORPUS = Path(__file__).resolve().parent / "data" / "replay_conversations.json"
+LAST_RECOMMENDED_PLACEHOLDER = "$LAST_RECOMMENDED"
+
+
+def load_corpus(path=DEFAULT_CORPUS) -> List[Dict[str, Any]]:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def percentile(values: List[float], q: float) -> float:
+    return float(np.percentile(values, q)) if values else float("nan")
+
+
+def substitute_last_recommended(value: Any, last_recommended: List[str]) -> Any:
+    """녹화된 결정의 "$LAST_RECOMMENDED" 를 직전 턴의 추천 축제 목록으로 치환합니다."""
+    if value == LAST_RECOMMENDED_PLACEHOLDER:
+        return list(last_recommended)
+    if isinstance(value, dict):
+        return {k: substitute_last_recommended(v, last_recommended) for k, v in value.items()}
+    if isinstance(value, list):
+        return [substitute_last_recommended(v, last_recommended) for v in value]
+    return value
+
+
+def failed_tool_calls(steps: List[Any]) -> List[str]:
+    """intermediate_steps 중 오류 결과를 반환한 도구 이름 목록 (tools.tool_cache.is_error_output 기준)"""
+    return [getattr(action, "tool", "unknown") for action, output in steps if is_error_output(output)]
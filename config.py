@@ -1,6 +1,7 @@
 # config.py
 
 import logging
+import os
 from pathlib import Path
 
 # --- Paths ---
@@ -12,6 +13,7 @@ ASSETS =  PROJECT_ROOT / "assets"
 # Data Files
 PATH_FINAL_DF = PATH_DATA_DIR / 'final_df.csv'
 PATH_FESTIVAL_DF = PATH_DATA_DIR / 'festival_df.csv'
+PATH_SESSION_DB = PATH_DATA_DIR / 'sessions.db'  # 상담 세션 저장소 (modules/session_store.py)
 
 # Vectorstore Paths
 PATH_FAISS_MARKETING = PATH_VECTORSTORE_DIR / 'faiss_marketing'
@@ -22,17 +24,161 @@ PATH_FAISS_FESTIVAL = PATH_VECTORSTORE_DIR / 'faiss_festival'
 API_SERVER_URL = "http://127.0.0.1:8000"
 API_PROFILE_ENDPOINT = f"{API_SERVER_URL}/profile"
 API_MERCHANTS_ENDPOINT = f"{API_SERVER_URL}/merchants"
+API_MERCHANT_PICKER_ENDPOINT = f"{API_SERVER_URL}/merchants/picker"
+API_GZIP_MIN_BYTES = 1024                # 이보다 큰 JSON 응답은 gzip 압축 (api/server.py)
+
+# --- API Client (modules/api_client.py) ---
+API_CONNECT_TIMEOUT_SECONDS = 3
+API_READ_TIMEOUT_SECONDS = 30
+API_MAX_RETRIES = 2                      # 연결 실패 / 502·503·504 재시도 횟수
+API_RETRY_BACKOFF_SECONDS = 0.3
+API_POOL_MAXSIZE = 10                    # keep-alive 연결 풀 크기
+API_PROFILE_CACHE_TTL_SECONDS = 10 * 60  # 만료 후에는 ETag 조건부 요청으로 재검증
+API_PROFILE_CACHE_MAX_ENTRIES = 200
+
+# --- Merchant Picker (가게 선택 화면, modules/merchant_picker.py) ---
+MERCHANT_PICKER_CACHE_TTL_SECONDS = 10 * 60  # 목록 캐시 유지 시간 (브라우저 / st.cache_data), 만료 후 ETag 로 재검증
+MERCHANT_PICKER_MAX_RESULTS = 50             # 검색 결과 최대 표시 개수
+HANGUL_SEARCH_MIN_FUZZY_SCORE = 0.5          # 자모 순서 일치 최소 점수 (검색어 자모 수 / 일치 구간 길이)
+
+# --- Agent Service (api/agent_service.py) ---
+# "local": Streamlit 세션마다 AgentOrchestrator 를 직접 실행 / "remote": 에이전트 서비스 호출
+AGENT_BACKEND = "local"
+AGENT_SERVICE_PORT = 8001
+AGENT_SERVICE_URL = f"http://127.0.0.1:{AGENT_SERVICE_PORT}"
+AGENT_SERVICE_TIMEOUT_SECONDS = 180
+AGENT_SERVICE_CANCEL_TIMEOUT_SECONDS = 5   # 원격 실행 취소 요청(DELETE /agent/runs/{run_id}) 타임아웃
+AGENT_SERVICE_MAX_CONCURRENCY = 8       # 동시에 실행되는 에이전트 턴 수 (작업 스레드)
+AGENT_SESSION_TTL_SECONDS = 60 * 60     # 마지막 사용 후 세션 유지 시간
+AGENT_SESSION_MAX_COUNT = 500
+# 한 단계에서 모델이 여러 도구를 호출할 때 동시에 실행할 최대 도구 수 (1 이면 순차 실행)
+AGENT_MAX_PARALLEL_TOOLS = 4
+
+# --- Background Agent Runs (modules/agent_runner.py, Streamlit 채팅) ---
+AGENT_RUN_MAX_WORKERS = 8          # 프로세스 전체에서 동시에 실행되는 에이전트 턴 수
+AGENT_RUN_POLL_SECONDS = 1.0       # 채팅 영역이 실행 상태를 확인하는 주기 (st.fragment run_every)
+AGENT_RUN_ABANDON_SECONDS = 30     # 이 시간 동안 폴링이 없으면 (탭 닫힘 등) 실행을 취소하여 LLM 호출 중단
+
+# --- Warm-up (modules/warmup.py) ---
+# 가게 선택 화면을 먼저 띄우고, 에이전트 / 임베딩 모델 / FAISS / 차트 모듈은 백그라운드에서 미리 로드
+WARMUP_ENABLED = True
 
 
 # --- Models ---
 LLM_MODEL_NAME = "gemini-2.5-flash" 
 EMBEDDING_MODEL = "dragonkue/BGE-m3-ko"
+# "huggingface": EMBEDDING_MODEL 사용 / "fake": 네트워크 없이 결정적 가짜 임베딩 (벤치마크/오프라인 재현용)
+EMBEDDING_BACKEND = os.environ.get("MARKETSYNC_EMBEDDING_BACKEND", "huggingface")
+FAKE_EMBEDDING_SIZE = 1024  # 저장된 FAISS 인덱스(BGE-m3-ko) 차원과 동일해야 함
+# Gemini implicit context caching 이 적용되는 최소 접두부 토큰 수 (gemini-2.5-flash 기준)
+LLM_CONTEXT_CACHE_MIN_TOKENS = 1024
 
 
 # --- RAG Weights ---
 FESTIVAL_EMBEDDING_WEIGHT = 0.4
 FESTIVAL_DYNAMIC_WEIGHT = 0.6
 
+# --- Stage 3 (동적 속성 평가) ---
+# "llm": LLM 프롬프트 기반 평가 (기본값) / "rule": NumPy 규칙 기반 평가 (LLM 호출 없음)
+FESTIVAL_DYNAMIC_SCORING_MODE = "llm"
+FESTIVAL_DYNAMIC_SCORING_MODES = ("llm", "rule")
+FESTIVAL_RULE_WEIGHTS = {"target": 0.5, "visitor": 0.25, "popularity": 0.25}
+FESTIVAL_RULE_POPULARITY_REFERENCE = 0.5  # 인기도_점수가 이 값 이상이면 만점
+
+# --- Stage 5 (최종 답변 포맷팅) ---
+# "llm": LLM이 전체 JSON을 생성 (기본값)
+# "template": 보유 필드로 결정적으로 조립 (LLM 호출 없음)
+# "hybrid": 템플릿으로 조립하고, 서술형 필드(축제_기본정보/추천_이유)만 LLM 1회 호출로 생성
+FESTIVAL_FORMAT_MODE = "llm"
+FESTIVAL_FORMAT_MODES = ("llm", "template", "hybrid")
+FESTIVAL_FORMAT_INTRO_MAX_CHARS = 120  # 템플릿/하이브리드 모드에서 사용할 '소개' 최대 길이
+
+# --- 축제 추천 시맨틱 캐시 ---
+FESTIVAL_CACHE_ENABLED = True
+FESTIVAL_CACHE_SIMILARITY_THRESHOLD = 0.92  # 질문 임베딩 코사인 유사도 임계값
+FESTIVAL_CACHE_TTL_SECONDS = 60 * 60 * 6
+FESTIVAL_CACHE_MAX_ENTRIES_PER_SIGNATURE = 20
+FESTIVAL_CACHE_MAX_SIGNATURES = 500
+
+
+# --- Intent Router (에이전트 앞단의 로컬 라우터) ---
+INTENT_ROUTER_ENABLED = True
+INTENT_ROUTER_MIN_SIMILARITY = 0.75  # 임베딩 분류기 최소 유사도
+INTENT_ROUTER_MIN_MARGIN = 0.05      # 1순위와 2순위 의도의 최소 유사도 차이
+
+
+# --- Charts (modules/visualization.py) ---
+# "vega_lite": 데이터 + Vega-Lite 스펙만 전송하고 브라우저에서 렌더링 (기본, matplotlib PNG 는 다운로드로 제공)
+# "matplotlib": 서버에서 PNG 로 렌더링하여 이미지로 전송
+CHART_BACKEND = os.environ.get("MARKETSYNC_CHART_BACKEND", "vega_lite")
+CHART_CACHE_MAX_ENTRIES = 300  # (차트 종류, 가맹점ID, 데이터 버전) 별 PNG 캐시 최대 개수
+CHART_PNG_DPI = 100
+
+
+# --- Tool Result Cache (tools/tool_cache.ToolResultCache, 상담 세션 단위) ---
+# 설정이 없는 도구는 캐시하지 않음
+TOOL_CACHE_SETTINGS = {
+    "get_festival_profile_by_name": {"ttl_seconds": 60 * 60, "max_entries": 100},
+    "analyze_festival_profile": {"ttl_seconds": 30 * 60, "max_entries": 30},
+    "analyze_merchant_profile": {"ttl_seconds": 30 * 60, "max_entries": 5},
+    "recommend_festivals": {"ttl_seconds": 10 * 60, "max_entries": 10},
+    "search_contextual_marketing_strategy": {"ttl_seconds": 10 * 60, "max_entries": 20},
+    "create_festival_specific_marketing_strategy": {"ttl_seconds": 30 * 60, "max_entries": 20},
+    "create_marketing_strategies_for_multiple_festivals": {"ttl_seconds": 30 * 60, "max_entries": 10},
+}
+
+# 같은 인자로 실행 중인 호출(프리페치 등)의 결과를 기다리는 최대 시간
+TOOL_CACHE_PENDING_WAIT_SECONDS = 90
+
+
+# --- Prefetch (modules/prefetcher.py, 가게 선택 직후 백그라운드 선실행) ---
+PREFETCH_ENABLED = False                                          # 추가 LLM 비용이 발생하므로 opt-in
+PREFETCH_TOOLS = ("analyze_merchant_profile", "recommend_festivals")
+PREFETCH_RECOMMEND_QUERY = "우리 가게에 맞는 축제 추천해줘"         # recommend_festivals 기본 질문
+PREFETCH_MAX_WORKERS = 2                                          # 프로세스 전체 프리페치 스레드 수
+PREFETCH_MAX_RUNS_PER_SESSION = 3                                 # 세션당 최대 프리페치 횟수 (가게 재선택 포함)
+
+
+# --- Chat History (modules/chat_history.ChatHistoryManager) ---
+CHAT_HISTORY_MAX_TOKENS = 1500              # 원문으로 유지할 최근 대화의 토큰 예산 (추정치)
+CHAT_HISTORY_MESSAGE_MAX_TOKENS = 400       # 메시지 1개당 최대 토큰 (긴 리포트는 잘라서 전달)
+CHAT_HISTORY_SUMMARY_MAX_TOKENS = 400       # 오래된 대화 누적 요약의 최대 토큰
+CHAT_HISTORY_SUMMARY_BATCH_MESSAGES = 4     # 요약되지 않은 메시지가 이 개수 이상 쌓이면 요약 갱신
+
+
+# --- Chat Sessions (modules/session_store.py, SQLite 저장 + 재접속 복원) ---
+SESSION_QUERY_PARAM = "sid"                 # 세션 ID 를 담는 URL 쿼리 파라미터 (새로고침/재접속 시 복원)
+SESSION_MEMORY_MAX_MESSAGES = 20            # 메모리에 유지할 최근 메시지 수 (요약되지 않은 메시지는 항상 유지)
+SESSION_HISTORY_PAGE_SIZE = 20              # '이전 대화 더 보기' 한 번에 SQLite 에서 불러올 메시지 수
+SESSION_COMPRESS_MIN_CHARS = 512            # 이 길이 이상의 메시지는 zlib 압축하여 저장
+SESSION_TTL_DAYS = 14                       # 마지막 사용 후 보관 기간 (앱 시작 시 만료 세션 삭제)
+
+
+# --- Prompt Token Budget ---
+# 토큰 수 추정 휴리스틱 (utils/token_utils.estimate_tokens)
+TOKEN_ESTIMATE_CHARS_PER_TOKEN_ASCII = 4.0
+TOKEN_ESTIMATE_CHARS_PER_TOKEN_NON_ASCII = 1.5
+# 프롬프트 섹션별 최대 토큰 (추정치). 정의되지 않은 섹션은 제한 없음
+PROMPT_SECTION_TOKEN_BUDGETS = {
+    "store_profile": 300,
+    "festival_profile": 800,
+    "marketing_context": 1200,
+    "candidates": 1500,
+    "tool_output": 3000,  # 재시도 시 기존 도구 결과로 답변을 합성할 때 (orchestrator)
+}
+# JSON 섹션(fit_json_to_budget)에서 자유 텍스트 필드('소개' 등)를 줄일 때의 최소 토큰
+PROMPT_TEXT_FIELD_MIN_TOKENS = 20
+
+
+# --- Tracing (utils/tracing.py) ---
+# 에이전트 턴 / 도구 / 추천 파이프라인 단계 / 벡터 검색 / LLM 호출별 span 을 JSONL 로 기록
+# 집계: python -m utils.trace_report
+# 기본 꺼짐 (MARKETSYNC_TRACE_ENABLED=1 로 켬). 파일이 TRACE_MAX_BYTES 를 넘으면 교체하고 이전 파일은 TRACE_BACKUP_COUNT 개만 보관
+TRACE_ENABLED = os.environ.get("MARKETSYNC_TRACE_ENABLED", "0") == "1"
+TRACE_EXPORT_PATH = Path(os.environ.get("MARKETSYNC_TRACE_PATH", PROJECT_ROOT / "logs" / "traces.jsonl"))
+TRACE_MAX_BYTES = int(os.environ.get("MARKETSYNC_TRACE_MAX_BYTES", 20 * 1024 * 1024))
+TRACE_BACKUP_COUNT = 3
+
 
 # --- Logging ---
 LOGGING_LEVEL = logging.INFO
@@ -0,0 +1,138 @@
+# modules/agent_client.py
+
+import uuid
+from typing import List, Dict, Any, Optional
+
+import requests
+from langchain_core.agents import AgentAction
+from langchain_core.messages import BaseMessage, HumanMessage, AIMessage
+
+import config
+from modules.tool_events import deserialize_events
+
+logger = config.get_logger(__name__)
+
+
+def _history_to_dicts(chat_history: List[BaseMessage]) -> List[Dict[str, str]]:
+    messages = []
+    for msg in chat_history:
+        if isinstance(msg, HumanMessage):
+            messages.append({"role": "user", "content": msg.content})
+        elif isinstance(msg, AIMessage):
+            messages.append({"role": "assistant", "content": msg.content})
+    return messages
+
+
+def _steps_from_dicts(steps: List[Dict[str, Any]]) -> List[tuple]:
+    """서비스 응답의 intermediate_steps(dict)를 AgentOrchestrator 와 같은 (AgentAction, output) 튜플로 복원합니다."""
+    return [
+        (
+            AgentAction(tool=step.get("tool") or "", tool_input=step.get("tool_input") or {}, log=step.get("log") or ""),
+            step.get("output"),
+        )
+        for step in steps
+    ]
+
+
+class RemoteAgentOrchestrator:
+    """
+    에이전트 서비스(api/agent_service.py)를 호출하는 얇은 클라이언트.
+    AgentOrchestrator.invoke_agent 와 같은 인터페이스/반환 형식을 제공하므로
+    Streamlit 앱은 백엔드 종류(config.AGENT_BACKEND)와 무관하게 동일하게 사용합니다.
+    """
+
+    def __init__(self, base_url: Optional[str] = None, timeout: Optional[float] = None):
+        self.base_url = (base_url or config.AGENT_SERVICE_URL).rstrip("/")
+        self.timeout = timeout or config.AGENT_SERVICE_TIMEOUT_SECONDS
+        self.http = requests.Session()
+        self.session_id = self._create_session()
+        self._active_run_id: Optional[str] = None
+
+    def _create_session(self) -> str:
+        response = self.http.post(f"{self.base_url}/agent/sessions", timeout=self.timeout)
+        response.raise_for_status()
+        session_id = response.json()["session_id"]
+        logger.info(f"--- [Agent Client] 원격 에이전트 세션 생성: {session_id} ---")
+        return session_id
+
+    def start_prefetch(self, store_profile_dict: dict) -> int:
+        """원격 백엔드에서는 프리페치를 지원하지 않습니다. (AgentOrchestrator 와 인터페이스 호환용)"""
+        return 0
+
+    def cancel_prefetch(self):
+        pass
+
+    def cancel_run(self):
+        """
+        실행 중인 원격 턴을 취소합니다. (DELETE /agent/runs/{run_id}, AgentRun.cancel 에서 호출)
+        원격 실행에는 로컬 콜백이 전달되지 않으므로 서비스에 직접 취소를 요청합니다.
+        """
+        run_id = self._active_run_id
+        if run_id is None:
+            return
+        try:
+            # 세션 객체는 invoke_agent 작업 스레드가 사용 중이므로 별도 요청으로 보냄
+            requests.delete(f"{self.base_url}/agent/runs/{run_id}", timeout=config.AGENT_SERVICE_CANCEL_TIMEOUT_SECONDS)
+            logger.info(f"--- [Agent Client] 원격 실행 취소 요청: {run_id} ---")
+        except requests.exceptions.RequestException as e:
+            logger.warning(f"--- [Agent Client WARNING] 원격 실행 취소 요청 실패 ({run_id}): {e} ---")
+
+    def invoke_agent(
+        self,
+        user_query: str,
+        store_profile_dict: dict,
+        chat_history: list,
+        last_recommended_festivals: Optional[List[str]] = None,
+        callbacks: Optional[List[Any]] = None,
+    ):
+        """
+        원격 에이전트 서비스를 호출하고 AgentOrchestrator 와 같은 형식의 결과를 반환
+        callbacks: 인터페이스 호환용 (원격 실행 중의 LLM/도구 호출에는 전달되지 않음, 취소는 cancel_run)
+        """
+        self._active_run_id = uuid.uuid4().hex
+        payload = {
+            "run_id": self._active_run_id,
+            "user_query": user_query,
+            "store_profile": store_profile_dict,
+            "chat_history": _history_to_dicts(chat_history),
+            "last_recommended_festivals": last_recommended_festivals,
+        }
+        try:
+            response = self._post_invoke(payload)
+            if response.status_code == 404:
+                # 서비스 재시작 등으로 세션이 사라진 경우 새 세션으로 한 번 재시도
+                logger.warning("--- [Agent Client] 원격 세션 만료 → 세션 재생성 후 재시도 ---")
+                self.session_id = self._create_session()
+                response = self._post_invoke(payload)
+            response.raise_for_status()
+            data = response.json()
+            if data.get("cancelled"):
+                logger.info(f"--- [Agent Client] 원격 실행 취소됨: {payload['run_id']} ---")
+            return {
+                "final_response": data.get("final_response", ""),
+                "intermediate_steps": _steps_from_dicts(data.get("intermediate_steps", [])),
+                "events": deserialize_events(data.get("events", [])),
+            }
+        except requests.exceptions.ConnectionError:
+            logger.critical(f"--- [Agent Client CRITICAL] 에이전트 서비스({self.base_url})에 연결할 수 없습니다. ---")
+            return {
+                "final_response": "죄송합니다. AI 에이전트 서버에 연결할 수 없습니다. 잠시 후 다시 시도해주세요.",
+                "intermediate_steps": [],
+                "events": [],
+            }
+        except Exception as e:
+            logger.critical(f"--- [Agent Client CRITICAL] 원격 에이전트 호출 실패: {e} ---", exc_info=True)
+            return {
+                "final_response": f"죄송합니다. 알 수 없는 오류가 발생했습니다: {e}",
+                "intermediate_steps": [],
+                "events": [],
+            }
+        finally:
+            self._active_run_id = None
+
+    def _post_invoke(self, payload: Dict[str, Any]) -> requests.Response:
+        return self.http.post(
+            f"{self.base_url}/agent/invoke",
+            json={**payload, "session_id": self.session_id},
+            timeout=self.timeout,
+        )
@@ -0,0 +1,160 @@
+# modules/agent_runner.py
+
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Callable, List, Dict, Any, Optional
+
+import streamlit as st
+from langchain_core.callbacks import BaseCallbackHandler
+
+import config
+
+logger = config.get_logger(__name__)
+
+RUN_RUNNING = "running"
+RUN_DONE = "done"
+RUN_ERROR = "error"
+RUN_CANCELLED = "cancelled"
+
+
+class AgentRunCancelled(Exception):
+    """취소(또는 방치)된 실행에서 다음 LLM / 도구 호출을 막기 위해 발생시키는 예외"""
+
+
+@st.cache_resource
+def get_agent_run_executor() -> ThreadPoolExecutor:
+    """프로세스 공용 에이전트 실행 스레드 풀 (AGENT_RUN_MAX_WORKERS 로 동시 실행 수 제한)"""
+    logger.info(f"--- [Agent Runner] 스레드 풀 생성 (max_workers={config.AGENT_RUN_MAX_WORKERS}) ---")
+    return ThreadPoolExecutor(max_workers=config.AGENT_RUN_MAX_WORKERS, thread_name_prefix="agent-run")
+
+
+class AgentRun:
+    """
+    백그라운드에서 실행 중인 에이전트 턴 하나의 상태.
+    작업 스레드가 진행 상황(progress)을 기록하고, Streamlit 스크립트 스레드는 poll() 로 상태를 확인합니다.
+    """
+
+    def __init__(self, user_query: str, on_cancel: Optional[Callable[[], None]] = None):
+        self.id = uuid.uuid4().hex
+        self.user_query = user_query
+        self.status = RUN_RUNNING
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        self.started_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.last_polled = time.time()
+        self.cancel_event = threading.Event()
+        self.cancel_reason: Optional[str] = None
+        self.future: Optional[Future] = None
+        self._on_cancel = on_cancel  # 콜백이 전달되지 않는 실행(원격 에이전트)의 취소 요청
+        self._progress: List[str] = []
+        self._lock = threading.Lock()
+
+    @property
+    def done(self) -> bool:
+        return self.status != RUN_RUNNING
+
+    @property
+    def elapsed_seconds(self) -> float:
+        return (self.finished_at or time.time()) - self.started_at
+
+    def add_progress(self, message: str):
+        with self._lock:
+            self._progress.append(message)
+
+    def progress(self) -> List[str]:
+        with self._lock:
+            return list(self._progress)
+
+    def poll(self):
+        """UI 가 실행 상태를 확인했음을 기록합니다. (일정 시간 확인이 없으면 방치된 실행으로 보고 취소)"""
+        self.last_polled = time.time()
+
+    def cancel(self, reason: str = "사용자 취소"):
+        """이후의 LLM / 도구 호출을 중단시킵니다. 아직 시작 전이면 작업 자체를 취소합니다."""
+        if self.cancel_event.is_set():
+            return
+        self.cancel_reason = reason
+        self.cancel_event.set()
+        logger.info(f"--- [Agent Runner] 실행 취소 요청 ({self.id[:8]}, 사유: {reason}) ---")
+        if self.future is not None and self.future.cancel():
+            self._finish(RUN_CANCELLED)
+        elif self._on_cancel is not None:
+            self._on_cancel()
+
+    def check_cancelled(self):
+        """취소되었거나, UI 폴링이 AGENT_RUN_ABANDON_SECONDS 이상 끊긴 경우 AgentRunCancelled 를 발생시킵니다."""
+        if not self.cancel_event.is_set() and time.time() - self.last_polled > config.AGENT_RUN_ABANDON_SECONDS:
+            self.cancel("세션 이탈 (폴링 중단)")
+        if self.cancel_event.is_set():
+            raise AgentRunCancelled(self.cancel_reason or "취소됨")
+
+    def _finish(self, status: str, result: Optional[Dict[str, Any]] = None, error: Optional[str] = None):
+        self.result = result
+        self.error = error
+        self.finished_at = time.time()
+        self.status = status
+
+
+class _RunControlCallbackHandler(BaseCallbackHandler):
+    """
+    에이전트 / 도구 내부의 LLM·도구 호출 직전에 취소 여부를 확인하고, 진행 상황을 AgentRun 에 기록합니다.
+    raise_error=True 이므로 AgentRunCancelled 가 실행 중인 체인으로 전파되어 남은 LLM 호출이 실행되지 않습니다.
+    """
+
+    raise_error = True
+
+    def __init__(self, run: AgentRun):
+        self.run = run
+        self._tool_runs = set()
+
+    def on_chat_model_start(self, serialized, messages, **kwargs):
+        self.run.check_cancelled()
+
+    def on_llm_start(self, serialized, prompts, **kwargs):
+        self.run.check_cancelled()
+
+    def on_tool_start(self, serialized, input_str, *, run_id, parent_run_id=None, **kwargs):
+        self.run.check_cancelled()
+        nested = parent_run_id in self._tool_runs
+        self._tool_runs.add(run_id)
+        # 진행 상황에는 에이전트가 호출한 도구만 표시 (도구 내부의 하위 도구 호출은 제외)
+        if not nested:
+            self.run.add_progress(f"🔧 '{(serialized or {}).get('name', '도구')}' 실행 중...")
+
+    def on_tool_end(self, output, *, run_id, parent_run_id=None, **kwargs):
+        if parent_run_id not in self._tool_runs:
+            self.run.add_progress(f"✅ '{kwargs.get('name') or '도구'}' 완료")
+
+
+def _execute(run: AgentRun, orchestrator, invoke_kwargs: Dict[str, Any]):
+    try:
+        result = orchestrator.invoke_agent(**invoke_kwargs, callbacks=[_RunControlCallbackHandler(run)])
+    except AgentRunCancelled:
+        run._finish(RUN_CANCELLED)
+        return
+    except Exception as e:
+        logger.critical(f"--- [Agent Runner CRITICAL] 백그라운드 실행 실패: {e} ---", exc_info=True)
+        run._finish(RUN_ERROR, error=str(e))
+        return
+
+    # 오케스트레이터가 예외를 잡아 오류 답변으로 바꾼 경우에도 취소된 실행은 취소로 처리
+    if run.cancel_event.is_set():
+        run._finish(RUN_CANCELLED)
+    else:
+        run._finish(RUN_DONE, result=result)
+    logger.info(f"--- [Agent Runner] 실행 종료 ({run.id[:8]}, {run.status}, {run.elapsed_seconds:.1f}s) ---")
+
+
+def start_agent_run(orchestrator, **invoke_kwargs) -> AgentRun:
+    """
+    orchestrator.invoke_agent 를 백그라운드 스레드에서 실행하고 AgentRun 을 즉시 반환합니다.
+    invoke_kwargs 는 invoke_agent 의 인자(user_query, store_profile_dict, chat_history, ...)와 같습니다.
+    """
+    run = AgentRun(invoke_kwargs.get("user_query", ""), on_cancel=orchestrator.cancel_run)
+    run.add_progress("🤔 질문을 분석하고 있습니다...")
+    run.future = get_agent_run_executor().submit(_execute, run, orchestrator, invoke_kwargs)
+    logger.info(f"--- [Agent Runner] 백그라운드 실행 시작 ({run.id[:8]}) ---")
+    return run
@@ -0,0 +1,161 @@
+# modules/api_client.py
+
+import copy
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Tuple
+
+import requests
+import streamlit as st
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+import config
+
+logger = config.get_logger(__name__)
+
+DATA_VERSION_HEADER = "X-Data-Version"
+
+
+class MerchantApiClient:
+    """
+    FastAPI 데이터 서버(api/server.py) 클라이언트.
+    - requests.Session + HTTPAdapter 로 keep-alive 연결을 재사용 (가게 전환/재실행마다 새 TCP 연결을 만들지 않음)
+    - 모든 요청에 연결/응답 타임아웃, 일시적 오류(연결 실패, 502/503/504)는 백오프 재시도
+    - 프로필 응답은 (가맹점ID, data_version) 키로 TTL 캐시하고,
+      만료 후에는 ETag(If-None-Match) 조건부 요청으로 변경 여부만 확인 (304 이면 캐시 재사용)
+    """
+
+    def __init__(self, base_url: Optional[str] = None):
+        self.base_url = (base_url or config.API_SERVER_URL).rstrip("/")
+        self.timeout = (config.API_CONNECT_TIMEOUT_SECONDS, config.API_READ_TIMEOUT_SECONDS)
+        self.http = requests.Session()
+        retry = Retry(
+            total=config.API_MAX_RETRIES,
+            backoff_factor=config.API_RETRY_BACKOFF_SECONDS,
+            status_forcelist=(502, 503, 504),
+            allowed_methods=frozenset({"GET", "POST"}),  # /profile 은 조회용 POST (멱등)
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=config.API_POOL_MAXSIZE, max_retries=retry)
+        self.http.mount("http://", adapter)
+        self.http.mount("https://", adapter)
+
+        # 서버가 마지막으로 알려준 데이터 버전 (X-Data-Version)
+        self.data_version: Optional[str] = None
+        # (가맹점ID, data_version) -> (stored_at, etag, payload)  (LRU)
+        self._profiles: "OrderedDict[Tuple[str, Optional[str]], tuple]" = OrderedDict()
+        self._merchants: Optional[tuple] = None  # (etag, payload)
+        self._merchant_picker: Optional[tuple] = None  # (etag, payload)
+        self._lock = threading.Lock()
+        self.stats = {"requests": 0, "cache_hits": 0, "not_modified": 0, "fetched": 0}
+
+    def _observe_version(self, response: requests.Response):
+        version = response.headers.get(DATA_VERSION_HEADER)
+        if version and version != self.data_version:
+            if self.data_version is not None:
+                logger.info(f"--- [API Client] 데이터 버전 변경: {self.data_version} → {version} ---")
+            self.data_version = version
+
+    def _request(self, method: str, path: str, etag: Optional[str] = None, **kwargs) -> requests.Response:
+        headers = {"If-None-Match": etag} if etag else {}
+        self.stats["requests"] += 1
+        response = self.http.request(method, f"{self.base_url}{path}", headers=headers, timeout=self.timeout, **kwargs)
+        self._observe_version(response)
+        if response.status_code != 304:
+            response.raise_for_status()
+        return response
+
+    def get_merchants(self) -> List[Dict[str, Any]]:
+        """(가맹점ID, 가맹점명) 목록을 반환합니다. 이전 응답이 있으면 조건부 요청으로 재사용합니다."""
+        with self._lock:
+            cached = self._merchants
+        response = self._request("GET", "/merchants", etag=cached[0] if cached else None)
+        if response.status_code == 304 and cached:
+            self.stats["not_modified"] += 1
+            return copy.deepcopy(cached[1])
+        payload = response.json()
+        with self._lock:
+            self._merchants = (response.headers.get("ETag"), payload)
+        self.stats["fetched"] += 1
+        return copy.deepcopy(payload)
+
+    def get_merchant_picker(self) -> Dict[str, Any]:
+        """
+        가게 선택 화면용 목록(/merchants/picker, 열 단위 + 내용 해시)을 반환합니다.
+        응답은 gzip 으로 압축되어 오며, 이전 응답이 있으면 ETag 조건부 요청으로 재사용합니다.
+        """
+        with self._lock:
+            cached = self._merchant_picker
+        response = self._request("GET", "/merchants/picker", etag=cached[0] if cached else None)
+        if response.status_code == 304 and cached:
+            self.stats["not_modified"] += 1
+            return copy.deepcopy(cached[1])
+        payload = response.json()
+        with self._lock:
+            self._merchant_picker = (response.headers.get("ETag"), payload)
+        self.stats["fetched"] += 1
+        return copy.deepcopy(payload)
+
+    def _latest_profile_entry(self, merchant_id: str) -> Optional[tuple]:
+        """현재 데이터 버전의 캐시 항목, 없으면 해당 가게의 가장 최근 항목을 반환합니다. (_lock 보유 상태에서 호출)"""
+        entry = self._profiles.get((merchant_id, self.data_version))
+        if entry is not None:
+            return (merchant_id, self.data_version), entry
+        for key in reversed(self._profiles):
+            if key[0] == merchant_id:
+                return key, self._profiles[key]
+        return None
+
+    def get_profile(self, merchant_id: str) -> Dict[str, Any]:
+        """
+        가게 프로필({"store_profile", "average_profile", "data_version"})을 반환합니다.
+        TTL 안의 캐시는 네트워크 없이 반환하고, 만료된 경우 ETag 조건부 요청으로 재검증합니다.
+        반환값은 복사본이므로 호출 측에서 수정해도 캐시에는 영향이 없습니다.
+        """
+        with self._lock:
+            found = self._latest_profile_entry(merchant_id)
+        if found is not None:
+            key, (stored_at, etag, payload) = found
+            if key[1] == self.data_version and time.time() - stored_at <= config.API_PROFILE_CACHE_TTL_SECONDS:
+                self.stats["cache_hits"] += 1
+                logger.info(f"--- [API Client] 프로필 캐시 HIT ({merchant_id}, version={key[1]}) ---")
+                return copy.deepcopy(payload)
+        else:
+            key, etag, payload = None, None, None
+
+        response = self._request("POST", "/profile", etag=etag, json={"merchant_id": merchant_id})
+        if response.status_code == 304 and payload is not None:
+            self.stats["not_modified"] += 1
+            logger.info(f"--- [API Client] 프로필 변경 없음 (304, {merchant_id}) → 캐시 갱신 ---")
+            self._store_profile(merchant_id, etag, payload, replace_key=key)
+            return copy.deepcopy(payload)
+
+        payload = response.json()
+        self.stats["fetched"] += 1
+        self._store_profile(merchant_id, response.headers.get("ETag"), payload, replace_key=key)
+        return copy.deepcopy(payload)
+
+    def _store_profile(self, merchant_id: str, etag: Optional[str], payload: Dict[str, Any], replace_key=None):
+        version = payload.get("data_version") or self.data_version
+        with self._lock:
+            if replace_key is not None:
+                self._profiles.pop(replace_key, None)
+            self._profiles[(merchant_id, version)] = (time.time(), etag, payload)
+            self._profiles.move_to_end((merchant_id, version))
+            while len(self._profiles) > config.API_PROFILE_CACHE_MAX_ENTRIES:
+                self._profiles.popitem(last=False)
+
+    def clear_cache(self):
+        with self._lock:
+            self._profiles.clear()
+            self._merchants = None
+            self._merchant_picker = None
+
+
+@st.cache_resource
+def get_api_client() -> MerchantApiClient:
+    """프로세스 공용 API 클라이언트 (연결 풀 / 프로필 캐시를 모든 세션이 공유)"""
+    logger.info(f"--- [API Client] 클라이언트 생성 (base_url={config.API_SERVER_URL}) ---")
+    return MerchantApiClient()
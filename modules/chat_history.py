@@ -0,0 +1,196 @@
+# modules/chat_history.py
+
+from typing import List, Dict, Any, MutableMapping, Optional, Tuple
+
+from langchain_core.messages import BaseMessage, HumanMessage, AIMessage
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.output_parsers import StrOutputParser
+
+import config
+from utils.token_utils import estimate_tokens, truncate_to_token_budget
+from utils.tracing import span
+
+logger = config.get_logger(__name__)
+
+SUMMARY_STATE_KEY = "chat_history_summary"
+SUMMARIZED_COUNT_STATE_KEY = "chat_history_summarized_count"
+# 메시지 인덱스 -> (토큰 수, 변환된 LangChain 메시지). 매 턴 전체 대화를 다시 변환하지 않고 새 메시지만 변환
+AGENT_MESSAGES_STATE_KEY = "chat_history_agent_messages"
+
+# Gemini 는 대화 중간의 system 메시지를 허용하지 않으므로 (사용자, AI) 메시지 쌍으로 요약을 주입
+SUMMARY_PREFIX = "[이전 대화 요약]"
+SUMMARY_ACK = "네, 이전 대화 내용을 참고하여 답변하겠습니다."
+
+_SUMMARY_PROMPT = ChatPromptTemplate.from_template("""
+당신은 소상공인 마케팅 상담 대화를 요약하는 비서입니다.
+[기존 요약]과 [새 대화]를 합쳐, 이후 상담에 필요한 정보만 남긴 하나의 요약으로 갱신하세요.
+
+[요약 규칙]
+- 사장님의 목표/고민, 추천된 축제명, 제안된 핵심 전략, 이미 답변된 질문을 중심으로 정리합니다.
+- 인사말, 반복 설명, 상세 리포트 본문은 생략합니다.
+- 한국어 불릿(-) 목록으로 {max_chars}자 이내로 작성합니다.
+
+[기존 요약]
+{previous_summary}
+
+[새 대화]
+{new_turns}
+
+[갱신된 요약]
+""")
+
+
+def _to_message(msg: Dict[str, Any], max_tokens: int) -> Optional[BaseMessage]:
+    """세션의 메시지(dict)를 LangChain 메시지로 변환합니다. (긴 리포트는 토큰 예산만큼 자름)"""
+    content = truncate_to_token_budget(msg.get("content", ""), max_tokens)
+    if msg.get("role") == "user":
+        return HumanMessage(content=content)
+    if msg.get("role") == "assistant":
+        return AIMessage(content=content)
+    return None
+
+
+def _format_turns(messages: List[Dict[str, Any]], max_tokens: int) -> str:
+    role_names = {"user": "사장님", "assistant": "AI"}
+    return "\n".join(
+        f"{role_names.get(m.get('role'), m.get('role'))}: {truncate_to_token_budget(m.get('content', ''), max_tokens)}"
+        for m in messages
+    )
+
+
+class ChatHistoryManager:
+    """
+    에이전트에 전달할 대화 기록(chat_history)을 토큰 예산 안에서 구성합니다.
+    - 최근 대화: 메시지별 토큰 상한을 적용하여 원문 그대로 유지 (전체 예산 CHAT_HISTORY_MAX_TOKENS)
+    - 오래된 대화: LLM 으로 누적 요약(rolling summary)하고, 요약 결과는 세션 상태에 캐시하여
+      새로 밀려난 메시지만 점진적으로 반영합니다.
+    - 메시지별 토큰 수와 변환된 LangChain 메시지도 세션 상태에 캐시하여, 매 턴에는 새 메시지만 변환합니다.
+
+    messages 는 대화의 뒷부분만 전달할 수 있으며(offset: messages[0] 의 전체 대화 기준 인덱스),
+    이미 요약된 메시지는 메모리에서 내려도 됩니다. (modules/session_store.ChatSession)
+    """
+
+    def __init__(
+        self,
+        state: MutableMapping[str, Any],
+        max_tokens: Optional[int] = None,
+        message_max_tokens: Optional[int] = None,
+        summary_max_tokens: Optional[int] = None,
+        summary_batch_messages: Optional[int] = None,
+    ):
+        self.state = state
+        self.max_tokens = max_tokens or config.CHAT_HISTORY_MAX_TOKENS
+        self.message_max_tokens = message_max_tokens or config.CHAT_HISTORY_MESSAGE_MAX_TOKENS
+        self.summary_max_tokens = summary_max_tokens or config.CHAT_HISTORY_SUMMARY_MAX_TOKENS
+        self.summary_batch_messages = summary_batch_messages or config.CHAT_HISTORY_SUMMARY_BATCH_MESSAGES
+
+    @property
+    def summary(self) -> str:
+        return self.state.get(SUMMARY_STATE_KEY, "") or ""
+
+    @property
+    def summarized_count(self) -> int:
+        return int(self.state.get(SUMMARIZED_COUNT_STATE_KEY, 0) or 0)
+
+    def reset(self):
+        """요약 캐시를 초기화합니다. (상담 재시작 시)"""
+        self.state[SUMMARY_STATE_KEY] = ""
+        self.state[SUMMARIZED_COUNT_STATE_KEY] = 0
+        self.state[AGENT_MESSAGES_STATE_KEY] = {}
+
+    def _converted(self, index: int, msg: Dict[str, Any]) -> Tuple[int, Optional[BaseMessage]]:
+        """index 번째 메시지의 (토큰 수, LangChain 메시지). 처음 볼 때 한 번만 계산합니다."""
+        cache = self.state.get(AGENT_MESSAGES_STATE_KEY)
+        if cache is None:
+            cache = self.state[AGENT_MESSAGES_STATE_KEY] = {}
+        entry = cache.get(index)
+        if entry is None:
+            cost = min(estimate_tokens(msg.get("content", "")), self.message_max_tokens)
+            entry = cache[index] = (cost, _to_message(msg, self.message_max_tokens))
+        return entry
+
+    def _recent_window_start(self, messages: List[Dict[str, Any]], offset: int = 0) -> int:
+        """토큰 예산 안에 들어오는 최근 메시지 구간의 시작 인덱스(messages 기준)를 계산합니다."""
+        used = 0
+        start = len(messages)
+        for i in range(len(messages) - 1, -1, -1):
+            cost, _ = self._converted(offset + i, messages[i])
+            if used + cost > self.max_tokens and start < len(messages):
+                break
+            used += cost
+            start = i
+        # 최근 구간은 사용자 메시지로 시작하도록 정렬
+        while start < len(messages) and messages[start].get("role") != "user":
+            start += 1
+        return start
+
+    def _summarize(self, new_messages: List[Dict[str, Any]]) -> str:
+        """기존 요약에 새로 밀려난 메시지들을 합쳐 요약을 갱신합니다."""
+        max_chars = int(self.summary_max_tokens * config.TOKEN_ESTIMATE_CHARS_PER_TOKEN_NON_ASCII)
+        new_turns = _format_turns(new_messages, self.message_max_tokens)
+        try:
+            # LLM 클라이언트(langchain_google_genai)는 요약이 처음 필요할 때 로드 (앱 시작 시간 단축)
+            from modules.llm_provider import get_llm
+            chain = _SUMMARY_PROMPT | get_llm(0.1) | StrOutputParser()
+            with span("chat_history.summarize", messages=len(new_messages)):
+                summary = chain.invoke({
+                    "previous_summary": self.summary or "없음",
+                    "new_turns": new_turns,
+                    "max_chars": max_chars,
+                }).strip()
+        except Exception as e:
+            # LLM 요약 실패 시, 잘라낸 원문을 기존 요약 뒤에 이어 붙임 (예산 초과분은 기존 요약에서 제거)
+            logger.error(f"--- [Chat History ERROR] 대화 요약 실패, 단순 축약으로 대체: {e} ---", exc_info=True)
+            new_summary = truncate_to_token_budget(_format_turns(new_messages, 60), self.summary_max_tokens)
+            remaining = self.summary_max_tokens - estimate_tokens(new_summary)
+            previous = truncate_to_token_budget(self.summary, remaining) if remaining > 0 else ""
+            summary = "\n".join(filter(None, [previous, new_summary]))
+        return truncate_to_token_budget(summary, self.summary_max_tokens)
+
+    def build(self, messages: List[Dict[str, Any]], offset: int = 0) -> List[BaseMessage]:
+        """
+        세션 메시지 목록(현재 질문 제외)으로 에이전트용 chat_history 를 생성합니다.
+        offset 은 messages[0] 의 전체 대화 기준 인덱스입니다. (요약되지 않은 메시지는 모두 포함되어야 함)
+        """
+        # 메시지 목록이 초기화/축소되었다면 요약 캐시도 무효화
+        if self.summarized_count > offset + len(messages):
+            self.reset()
+        if self.summarized_count < offset:
+            logger.warning(
+                f"--- [Chat History WARNING] 요약되지 않은 메시지 {offset - self.summarized_count}개가 "
+                f"전달되지 않아 요약에서 제외됩니다. ---"
+            )
+
+        # 이하 인덱스는 messages 기준
+        summarized = max(self.summarized_count - offset, 0)
+        window_start = max(self._recent_window_start(messages, offset), summarized)
+        pending = messages[summarized:window_start]
+
+        # 밀려난 메시지가 일정 개수 이상 쌓였을 때만 요약을 갱신 (매 턴 LLM 호출 방지)
+        if len(pending) >= self.summary_batch_messages:
+            logger.info(f"--- [Chat History] 대화 요약 갱신 ({self.summarized_count} → {offset + window_start}번째 메시지) ---")
+            self.state[SUMMARY_STATE_KEY] = self._summarize(pending)
+            self.state[SUMMARIZED_COUNT_STATE_KEY] = offset + window_start
+        else:
+            # 아직 요약되지 않은 메시지는 원문 구간에 포함
+            window_start = summarized
+
+        history: List[BaseMessage] = []
+        if self.summary:
+            history.append(HumanMessage(content=f"{SUMMARY_PREFIX}\n{self.summary}"))
+            history.append(AIMessage(content=SUMMARY_ACK))
+        for i in range(window_start, len(messages)):
+            _, converted = self._converted(offset + i, messages[i])
+            if converted is not None:
+                history.append(converted)
+
+        # 요약된 메시지의 변환 결과는 더 이상 필요 없으므로 캐시에서 제거
+        cache = self.state.get(AGENT_MESSAGES_STATE_KEY) or {}
+        for index in [k for k in cache if k < self.summarized_count]:
+            del cache[index]
+
+        logger.info(
+            f"--- [Chat History] 요약 {estimate_tokens(self.summary)} 토큰 + 최근 메시지 "
+            f"{len(messages) - window_start}개 (전체 {offset + len(messages)}개) ---"
+        )
+        return history
@@ -0,0 +1,173 @@
+# modules/festival_scoring.py
+
+import re
+from typing import List, Dict, Any, Optional
+
+import numpy as np
+import pandas as pd
+from langchain_core.documents import Document
+
+import config
+from modules.profile_utils import parse_store_profile
+
+logger = config.get_logger(__name__)
+
+# 가게 프로필의 연령 구간 (api/server.py 의 연령대 비율 계산과 동일한 4구간)
+AGE_BUCKETS = ['20대이하', '30대', '40대', '50대이상']
+
+# 축제 CSV의 8개 연령 구간 -> 가게 프로필 4개 구간으로 매핑
+_FESTIVAL_AGE_COLUMNS = {
+    '20대이하': ['09세', '1019세', '2029세'],
+    '30대': ['3039세'],
+    '40대': ['4049세'],
+    '50대이상': ['5059세', '6069세', '70세이상'],
+}
+
+# 가게 원본 프로필(store_profile)의 성별/연령대 비율 컬럼
+_STORE_AGE_COLUMNS = {
+    '20대이하': ['{g}20대이하비율'],
+    '30대': ['{g}30대비율'],
+    '40대': ['{g}40대비율'],
+    '50대이상': ['{g}50대비율', '{g}60대이상비율'],
+}
+
+_OUTSIDER_RATIO_COLUMNS = [f"{year}_(외지인)방문자비율" for year in (2018, 2019, 2022, 2023, 2024)]
+
+_POPULARITY_LEVEL = {'상': 1.0, '중': 0.6, '하': 0.3}
+_POPULARITY_TREND = {'상승': 0.1, '미미': 0.0, '하락': -0.1}
+
+
+def build_store_segment_vector(profile: Dict[str, Any]) -> np.ndarray:
+    """
+    가게의 [남성 4구간, 여성 4구간] 고객 분포 벡터(합계 1)를 생성합니다.
+    원본 비율 컬럼이 있으면 그대로 사용하고, 채팅용 프로필만 있는 경우
+    '자동추출특징'(핵심고객, 핵심연령대)으로 분포를 근사합니다.
+    """
+    values = []
+    for gender in ('남성', '여성'):
+        for bucket in AGE_BUCKETS:
+            values.append(sum(
+                float(profile.get(col.format(g=gender)) or 0)
+                for col in _STORE_AGE_COLUMNS[bucket]
+            ))
+    vector = np.asarray(values, dtype=float)
+
+    if vector.sum() <= 0:
+        features = profile.get('자동추출특징') or {}
+        core_gender = str(features.get('핵심고객', ''))
+        core_age = str(features.get('핵심연령대', ''))
+
+        gender_weights = np.array([0.5, 0.5])
+        if '남성' in core_gender:
+            gender_weights = np.array([0.65, 0.35])
+        elif '여성' in core_gender:
+            gender_weights = np.array([0.35, 0.65])
+
+        age_weights = np.full(len(AGE_BUCKETS), 1.0 / len(AGE_BUCKETS))
+        if core_age in AGE_BUCKETS:
+            age_weights = np.full(len(AGE_BUCKETS), 0.15)
+            age_weights[AGE_BUCKETS.index(core_age)] = 0.55
+
+        vector = np.outer(gender_weights, age_weights).ravel()
+
+    return vector / vector.sum()
+
+
+def _parse_new_customer_ratio(profile: Dict[str, Any]) -> Optional[float]:
+    """가게의 신규 고객 비율(0~1)을 반환합니다. 알 수 없으면 None."""
+    new_ratio = profile.get('신규고객비율')
+    revisit_ratio = profile.get('재이용고객비율')
+    if new_ratio is None or revisit_ratio is None:
+        match = re.search(r"신규\s*([\d.]+)%\s*/\s*재방문\s*([\d.]+)%", str(profile.get('신규/재방문율', '')))
+        if not match:
+            return None
+        new_ratio, revisit_ratio = float(match.group(1)), float(match.group(2))
+    total = float(new_ratio or 0) + float(revisit_ratio or 0)
+    return float(new_ratio or 0) / total if total > 0 else None
+
+
+def _numeric_frame(metadata: pd.DataFrame, columns: List[str]) -> np.ndarray:
+    """metadata 프레임에서 지정된 컬럼을 숫자 행렬로 변환합니다. (없거나 빈 값은 NaN)"""
+    frame = metadata.reindex(columns=columns)
+    return frame.apply(pd.to_numeric, errors='coerce').to_numpy(dtype=float)
+
+
+def score_candidates_by_rules(store_profile: str, candidates: List[Document]) -> Dict[str, Dict[str, Any]]:
+    """
+    (3단계 - 규칙 기반) 후보 축제들의 '동적 점수'를 LLM 없이 NumPy 벡터 연산으로 계산합니다.
+    _evaluate_candidates_dynamically 와 동일한 형식
+    ({축제명: {"dynamic_score", "dynamic_reason"}})을 반환합니다.
+
+    - 타겟 일치: 가게 고객 분포와 축제 남성비율_*/여성비율_* 분포의 히스토그램 교집합
+    - 방문자 특성: 신규 고객 확보가 필요하면 외지인 비율, 단골 확보가 목표면 현지인 비율
+    - 인기도: 인기도_점수, 축제인기, 축제인기도(추세)
+    """
+    if not candidates:
+        return {}
+
+    profile = parse_store_profile(store_profile)
+    metadata = pd.DataFrame([doc.metadata for doc in candidates])
+    names = metadata.get('축제명', pd.Series([None] * len(candidates))).tolist()
+
+    # 1. 타겟 일치 (성별/연령)
+    festival_columns = [
+        f"{gender}비율_{age}"
+        for gender in ('남성', '여성')
+        for bucket in AGE_BUCKETS
+        for age in _FESTIVAL_AGE_COLUMNS[bucket]
+    ]
+    raw = np.nan_to_num(_numeric_frame(metadata, festival_columns))
+    bucket_sizes = [len(_FESTIVAL_AGE_COLUMNS[b]) for b in AGE_BUCKETS] * 2
+    festival_vectors = np.add.reduceat(raw, np.cumsum([0] + bucket_sizes[:-1]), axis=1)
+    totals = festival_vectors.sum(axis=1, keepdims=True)
+    festival_vectors = np.divide(festival_vectors, totals, out=np.zeros_like(festival_vectors), where=totals > 0)
+
+    store_vector = build_store_segment_vector(profile)
+    target_scores = np.minimum(festival_vectors, store_vector).sum(axis=1)
+    target_scores[totals.ravel() <= 0] = 0.5  # 분포 정보가 없는 축제는 중립 점수
+
+    # 2. 방문자 특성 (외지인 / 현지인)
+    outsider = _numeric_frame(metadata, _OUTSIDER_RATIO_COLUMNS) / 100.0
+    outsider = pd.DataFrame(outsider).ffill(axis=1).iloc[:, -1].to_numpy()
+    main_visitor = metadata.reindex(columns=['주요방문자'])['주요방문자'].astype(str).to_numpy()
+    categorical_outsider = np.where(main_visitor == '외부방문자', 0.7, np.where(main_visitor == '현지인', 0.3, 0.5))
+    outsider = np.where(np.isnan(outsider), categorical_outsider, np.clip(outsider, 0, 1))
+
+    new_ratio = _parse_new_customer_ratio(profile)
+    if new_ratio is None:
+        visitor_scores = np.full(len(candidates), 0.5)
+    elif new_ratio < 0.5:
+        # 신규 고객 비율이 낮음 -> 신규 고객 확보 목표 -> 외지인 방문 축제 선호
+        visitor_scores = outsider
+    else:
+        # 신규 고객 비율이 높음 -> 단골 확보 목표 -> 현지인 방문 축제 선호
+        visitor_scores = 1.0 - outsider
+
+    # 3. 인기도
+    popularity_raw = np.nan_to_num(_numeric_frame(metadata, ['인기도_점수']).ravel())
+    popularity_ref = config.FESTIVAL_RULE_POPULARITY_REFERENCE
+    level = metadata.reindex(columns=['축제인기'])['축제인기'].map(_POPULARITY_LEVEL).fillna(0.5).to_numpy(dtype=float)
+    trend = metadata.reindex(columns=['축제인기도'])['축제인기도'].map(_POPULARITY_TREND).fillna(0.0).to_numpy(dtype=float)
+    popularity_scores = np.clip(0.5 * np.clip(popularity_raw / popularity_ref, 0, 1) + 0.5 * level + trend, 0, 1)
+
+    # 4. 가중 합산 (0~100점)
+    weights = config.FESTIVAL_RULE_WEIGHTS
+    dynamic_scores = 100 * (
+        weights['target'] * target_scores
+        + weights['visitor'] * visitor_scores
+        + weights['popularity'] * popularity_scores
+    ) / sum(weights.values())
+
+    scores_dict = {}
+    for i, name in enumerate(names):
+        if not name:
+            continue
+        scores_dict[name] = {
+            "dynamic_score": round(float(dynamic_scores[i]), 1),
+            "dynamic_reason": (
+                f"(규칙 기반) 타겟 일치 {target_scores[i] * 100:.0f}점, "
+                f"방문자 특성 {visitor_scores[i] * 100:.0f}점({main_visitor[i]}), "
+                f"인기도 {popularity_scores[i] * 100:.0f}점"
+            ),
+        }
+    return scores_dict
@@ -6,13 +6,16 @@ from typing import List, Dict, Any, Optional, Tuple
 import pandas as pd
 
 from langchain_core.messages import HumanMessage 
-from langchain_community.vectorstores import FAISS
 from langchain_core.documents import Document
 
 import config
 from modules.knowledge_base import load_festival_vectorstore
+from modules.festival_scoring import score_candidates_by_rules
 from modules.llm_provider import get_llm
+from modules.profile_utils import fit_profile_to_budget
 from utils.parser_utils import extract_json_from_llm_response 
+from utils.token_utils import fit_json_to_budget
+from utils.tracing import span
 
 logger = config.get_logger(__name__)
 
@@ -21,10 +24,30 @@ class FestivalRecommender:
     """
     하이브리드 축제 추천 파이프라인을 캡슐화한 클래스.
     """
-    def __init__(self, store_profile: str, user_query: str, specific_intent: Optional[str] = None):
-        self.store_profile = store_profile
+    def __init__(
+        self,
+        store_profile: str,
+        user_query: str,
+        specific_intent: Optional[str] = None,
+        scoring_mode: Optional[str] = None,
+        format_mode: Optional[str] = None,
+    ):
+        # 프롬프트마다 반복 삽입되므로 압축 JSON + 토큰 예산 적용
+        self.store_profile = fit_profile_to_budget(store_profile)
         self.user_query = user_query
         self.specific_intent = specific_intent
+
+        # 3단계 평가 방식 ("llm" / "rule")
+        self.scoring_mode = scoring_mode or config.FESTIVAL_DYNAMIC_SCORING_MODE
+        if self.scoring_mode not in config.FESTIVAL_DYNAMIC_SCORING_MODES:
+            logger.warning(f"--- [Filter] 알 수 없는 scoring_mode '{self.scoring_mode}' → 기본값 사용 ---")
+            self.scoring_mode = config.FESTIVAL_DYNAMIC_SCORING_MODE
+
+        # 5단계 포맷팅 방식 ("llm" / "template" / "hybrid")
+        self.format_mode = format_mode or config.FESTIVAL_FORMAT_MODE
+        if self.format_mode not in config.FESTIVAL_FORMAT_MODES:
+            logger.warning(f"--- [Filter] 알 수 없는 format_mode '{self.format_mode}' → 기본값 사용 ---")
+            self.format_mode = config.FESTIVAL_FORMAT_MODE
         
         # LLM 인스턴스를 미리 생성
         self.llm_temp_01 = get_llm(0.1)
@@ -101,7 +124,8 @@ class FestivalRecommender:
             if self.vectorstore is None:
                 raise RuntimeError("축제 벡터스토어가 로드되지 않았습니다.")
                 
-            candidates_with_scores = self.vectorstore.similarity_search_with_relevance_scores(query, k=k)
+            with span("vector_search", index="festival", k=k):
+                candidates_with_scores = self.vectorstore.similarity_search_with_relevance_scores(query, k=k)
             return candidates_with_scores
 
         except Exception as e:
@@ -128,7 +152,7 @@ class FestivalRecommender:
                 "인기도_점수": meta.get('인기도_점수')
             })
         
-        candidates_json_str = json.dumps(candidates_data, ensure_ascii=False, indent=2)
+        candidates_json_str = fit_json_to_budget(candidates_data, "candidates")
 
         # --- (사용자 요청) 프롬프트 원본 유지 ---
         prompt = f"""
@@ -189,6 +213,17 @@ class FestivalRecommender:
             logger.critical(f"--- [Filter 3/5 CRITICAL ERROR] (Outer Catch) {e} ---", exc_info=True)
             return {}
 
+    def _evaluate_candidates_by_rules(self, candidates: List[Document]) -> Dict[str, Dict[str, Any]]:
+        """
+        (3단계 - 규칙 기반) LLM 호출 없이 후보 메타데이터와 가게 프로필로 '동적 점수'를 계산합니다.
+        """
+        logger.info(f"--- [Filter 3/5] 동적 속성 평가 (Rule) 시작 (후보 {len(candidates)}개) ---")
+        try:
+            return score_candidates_by_rules(self.store_profile, candidates)
+        except Exception as e:
+            logger.critical(f"--- [Filter 3/5 CRITICAL ERROR] 규칙 기반 평가 실패: {e} ---", exc_info=True)
+            return {}
+
     def _calculate_hybrid_scores(
         self,
         embedding_candidates: List[Tuple[Document, float]], 
@@ -205,7 +240,7 @@ class FestivalRecommender:
             if not festival_name:
                 continue
                 
-            normalized_embedding_score = embedding_score * 100
+            normalized_embedding_score = float(embedding_score) * 100  # FAISS 점수(np.float32)는 JSON 직렬화 불가
             dynamic_eval = dynamic_scores.get(festival_name, {"dynamic_score": 0, "dynamic_reason": "N/A"})
             dynamic_score = dynamic_eval["dynamic_score"]
             
@@ -258,17 +293,14 @@ class FestivalRecommender:
             logger.error(f"날짜 예측 중 오류 ({date_str_2025}): {e}")
             return f"2026년 정보 없음 (오류: {e})"
 
-    def _format_recommendation_results(
+    def _build_top_candidates_data(
         self,
         ranked_list: List[Dict[str, Any]],
         top_k: int
     ) -> List[Dict[str, Any]]:
-        
-        """ (5단계) 최종 답변 포맷팅 (LLM) """
-        logger.info(f"--- [Filter 5/5] 최종 답변 포맷팅 (LLM) 시작 (Top {top_k}) ---")
-        top_candidates = ranked_list[:top_k]
+        """ (5단계) 상위 K개 후보를 포맷팅 입력용 딕셔너리 리스트로 변환합니다. """
         candidates_data = []
-        for candidate in top_candidates:
+        for candidate in ranked_list[:top_k]:
             meta = candidate["metadata"]
             date_2025 = meta.get('2025_기간')
             predicted_2026_timing = self._predict_next_year_date(date_2025)
@@ -284,7 +316,124 @@ class FestivalRecommender:
                 "추천_근거_키워드": f"키워드/소개 일치도 ({round(candidate['score_embedding'], 0)}점)",
                 "추천_근거_동적": f"가게 맞춤성({round(candidate['score_dynamic'], 0)}점): {candidate['score_dynamic_reason']}"
             })
-        candidates_json_str = json.dumps(candidates_data, ensure_ascii=False, indent=2)
+        return candidates_data
+
+    def _summarize_intro(self, intro: Optional[str]) -> str:
+        """ '소개'의 첫 문장을 최대 길이 이내로 잘라 반환합니다. """
+        if not intro or not isinstance(intro, str):
+            return "소개 정보 없음"
+        max_chars = config.FESTIVAL_FORMAT_INTRO_MAX_CHARS
+        first_sentence = intro.strip().split(". ")[0].rstrip(".")
+        if len(first_sentence) > max_chars:
+            first_sentence = first_sentence[:max_chars].rstrip() + "..."
+        return first_sentence
+
+    def _format_recommendation_template(
+        self,
+        candidates_data: List[Dict[str, Any]],
+        with_narrative: bool = False
+    ) -> List[Dict[str, Any]]:
+        """
+        (5단계 - 템플릿) 보유한 필드로 최종 추천 JSON을 결정적으로 조립합니다.
+        with_narrative=True 이면 서술형 필드(축제_기본정보, 추천_이유)만 LLM 1회 호출로 생성하고,
+        실패 시 템플릿 문장을 그대로 사용합니다.
+        """
+        logger.info(f"--- [Filter 5/5] 최종 답변 포맷팅 ({self.format_mode}) 시작 (Top {len(candidates_data)}) ---")
+
+        final_list = []
+        for item in candidates_data:
+            intro = self._summarize_intro(item.get("소개"))
+            final_list.append({
+                "축제명": item.get("축제명"),
+                "추천_점수": item.get("추천_점수"),
+                "축제_기본정보": (
+                    f"{intro}. 주요 고객층은 '{item.get('주요고객층') or 'N/A'}'이며, "
+                    f"'{item.get('주요방문자') or 'N/A'}' 방문 비중이 높은 축제입니다. (인기도: {item.get('축제인기') or 'N/A'})"
+                ),
+                "추천_이유": f"{item.get('추천_근거_동적')} / {item.get('추천_근거_키워드')}",
+                "홈페이지": item.get("홈페이지") or "N/A",
+                "2026년 예상 시기": item.get("predicted_2026_timing"),
+            })
+
+        if with_narrative and final_list:
+            narratives = self._generate_recommendation_narratives(candidates_data)
+            for record in final_list:
+                narrative = narratives.get(record["축제명"], {})
+                for field in ("축제_기본정보", "추천_이유"):
+                    if narrative.get(field):
+                        record[field] = narrative[field]
+
+        return final_list
+
+    def _generate_recommendation_narratives(self, candidates_data: List[Dict[str, Any]]) -> Dict[str, Dict[str, str]]:
+        """
+        (5단계 - 하이브리드) 서술형 필드만 생성하는 축약 LLM 호출.
+        {축제명: {"축제_기본정보", "추천_이유"}} 를 반환하며, 실패 시 빈 딕셔너리를 반환합니다.
+        """
+        compact_data = [
+            {
+                "축제명": item.get("축제명"),
+                "소개": self._summarize_intro(item.get("소개")),
+                "주요고객층": item.get("주요고객층"),
+                "주요방문자": item.get("주요방문자"),
+                "축제인기": item.get("축제인기"),
+                "근거": f"{item.get('추천_근거_키워드')}, {item.get('추천_근거_동적')}",
+            }
+            for item in candidates_data
+        ]
+
+        prompt = f"""
+        당신은 소상공인 컨설턴트입니다. [가게 프로필]과 [추천 축제]를 바탕으로
+        각 축제의 '축제_기본정보'(1문장)와 '추천_이유'(1~2문장)만 자연스러운 한국어로 작성하세요.
+        단점은 쓰지 말고, 취소선(~~text~~)을 사용하지 마세요.
+
+        [가게 프로필]
+        {self.store_profile}
+
+        [추천 축제]
+        {json.dumps(compact_data, ensure_ascii=False)}
+
+        [응답 형식 (JSON 리스트만 출력)]
+        [{{"축제명": "...", "축제_기본정보": "...", "추천_이유": "..."}}]
+        """
+        response_text = ""
+        try:
+            response = self.llm_temp_03.invoke([HumanMessage(content=prompt)])
+            response_text = response.content.strip()
+            narratives = extract_json_from_llm_response(response_text)
+            return {
+                item["축제명"]: item
+                for item in narratives if isinstance(item, dict) and item.get("축제명")
+            }
+        except (ValueError, json.JSONDecodeError) as e:
+            logger.error(f"--- [Filter 5/5 ERROR] 서술형 필드 JSON 파싱 실패, 템플릿 문장 사용: {e} ---")
+            logger.debug(f"LLM 원본 응답 (앞 500자): {response_text[:500]} ...")
+            return {}
+        except Exception as e:
+            logger.critical(f"--- [Filter 5/5 CRITICAL ERROR] 서술형 필드 생성 실패, 템플릿 문장 사용: {e} ---", exc_info=True)
+            return {}
+
+    def _format_recommendation_results(
+        self,
+        ranked_list: List[Dict[str, Any]],
+        top_k: int
+    ) -> List[Dict[str, Any]]:
+        
+        """ (5단계) 최종 답변 포맷팅 (LLM / 템플릿 / 하이브리드) """
+        candidates_data = self._build_top_candidates_data(ranked_list, top_k)
+
+        if self.format_mode != "llm":
+            return self._format_recommendation_template(
+                candidates_data,
+                with_narrative=(self.format_mode == "hybrid")
+            )
+
+        logger.info(f"--- [Filter 5/5] 최종 답변 포맷팅 (LLM) 시작 (Top {top_k}) ---")
+        # 예산 초과 시 '소개' / 근거 문장을 먼저 줄이고, 그래도 넘으면 하위 후보를 통째로 제외
+        # (홈페이지 / 추천_점수 / predicted_2026_timing 은 항상 유지)
+        candidates_json_str = fit_json_to_budget(
+            candidates_data, "candidates", text_fields=("소개", "추천_근거_동적")
+        )
 
         prompt = f"""
         당신은 소상공인 컨설턴트입니다. [가게 프로필]과 AI가 분석한 [최종 추천 축제 목록]을 바탕으로,
@@ -339,11 +488,14 @@ class FestivalRecommender:
         """
         try:
             # 1단계: 쿼리 재작성
-            rewritten_query = self._rewrite_query()
+            with span("recommend.rewrite_query"):
+                rewritten_query = self._rewrite_query()
             logger.info(f"--- [Filter 1/5] 쿼리 재작성 완료: {rewritten_query} ---")
 
             # 2단계: 후보 검색
-            embedding_candidates = self._search_candidates(query=rewritten_query, k=search_k)
+            with span("recommend.search_candidates", k=search_k) as stage_span:
+                embedding_candidates = self._search_candidates(query=rewritten_query, k=search_k)
+                stage_span.set(candidates=len(embedding_candidates))
             if not embedding_candidates:
                 logger.warning("--- [Filter 2/5] 후보 검색 결과 없음 ---")
                 return [{"error": "추천할 만한 축제를 찾지 못했습니다."}]
@@ -352,7 +504,11 @@ class FestivalRecommender:
 
             # 3단계: 동적 속성 평가
             candidate_docs = [doc for doc, score in embedding_candidates]
-            dynamic_scores_dict = self._evaluate_candidates_dynamically(candidates=candidate_docs)
+            with span("recommend.dynamic_scoring", scoring_mode=self.scoring_mode):
+                if self.scoring_mode == "rule":
+                    dynamic_scores_dict = self._evaluate_candidates_by_rules(candidates=candidate_docs)
+                else:
+                    dynamic_scores_dict = self._evaluate_candidates_dynamically(candidates=candidate_docs)
             
             if not dynamic_scores_dict:
                 logger.warning("--- [Filter 3/5 WARNING] 동적 속성 평가 실패. 임베딩 점수만으로 추천을 진행합니다. ---")
@@ -361,17 +517,19 @@ class FestivalRecommender:
             logger.info(f"--- [Filter 3/5] 동적 속성 평가 완료 ({len(dynamic_scores_dict)}개) ---")
             
             # 4단계: 하이브리드 점수 계산
-            hybrid_results = self._calculate_hybrid_scores(
-                embedding_candidates=embedding_candidates,
-                dynamic_scores=dynamic_scores_dict
-            )
+            with span("recommend.hybrid_scores"):
+                hybrid_results = self._calculate_hybrid_scores(
+                    embedding_candidates=embedding_candidates,
+                    dynamic_scores=dynamic_scores_dict
+                )
             logger.info(f"--- [Filter 4/5] 하이브리드 점수 계산 및 정렬 완료 ---")
 
             # 5단계: 최종 답변 포맷팅
-            final_recommendations = self._format_recommendation_results(
-                ranked_list=hybrid_results,
-                top_k=top_k
-            )
+            with span("recommend.format_results", format_mode=self.format_mode):
+                final_recommendations = self._format_recommendation_results(
+                    ranked_list=hybrid_results,
+                    top_k=top_k
+                )
             logger.info(f"--- [Filter 5/5] 최종 답변 포맷팅 완료 ---")
             
             # 5단계(LLM 포맷팅) 실패 시 Fallback
@@ -0,0 +1,214 @@
+# modules/intent_router.py
+
+import re
+from typing import List, Dict, Any, Optional, NamedTuple
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+import config
+from modules.knowledge_base import get_embedding_model
+
+logger = config.get_logger(__name__)
+
+# --- 키워드 규칙 (orchestrator.setup_system_prompt 의 [도구 라우팅 규칙]과 동일한 기준) ---
+RECOMMEND_KEYWORDS = ["축제 추천", "축제추천", "참여할 만한", "참여할만한", "어떤 축제", "행사 찾아", "축제 찾아", "축제 알려", "어디가 좋아"]
+MARKETING_KEYWORDS = ["마케팅", "전략", "홍보", "프로모션", "이벤트"]
+FESTIVAL_ANALYSIS_KEYWORDS = ["어때", "분석", "어떤 축제야", "소개", "정보", "특징"]
+MERCHANT_KEYWORDS = ["우리 가게", "우리가게", "내 가게", "내가게", "SWOT", "swot", "고객 특성", "강점", "약점"]
+MERCHANT_ANALYSIS_KEYWORDS = ["분석", "SWOT", "swot", "진단", "강점", "약점", "특성"]
+PREVIOUS_RECOMMENDATION_KEYWORDS = ["추천해준", "추천해 준", "추천한", "추천된", "방금", "위 축제", "이 축제들"]
+
+# --- 임베딩 분류기용 라벨 예시 ("agent" 는 에이전트로 넘겨야 하는 복합/모호한 요청) ---
+INTENT_EXAMPLES: Dict[str, List[str]] = {
+    "recommend_festivals": [
+        "축제 추천해줘",
+        "우리 가게가 참여할 만한 축제 알려줘",
+        "10월에 열리는 축제 추천해줘",
+        "20대 여성 고객이 많이 오는 축제 찾아줘",
+        "가족 단위 방문객이 많은 행사 찾아줘",
+        "어떤 축제에 나가면 좋을까?",
+    ],
+    "analyze_merchant_profile": [
+        "우리 가게 분석해줘",
+        "내 가게의 강점과 약점을 알려줘",
+        "우리 가게 SWOT 분석해줘",
+        "우리 가게 고객 특성이 어때?",
+        "가게 현황을 진단해줘",
+    ],
+    "search_contextual_marketing_strategy": [
+        "매출을 올릴 수 있는 마케팅 방법 알려줘",
+        "20대 여성 고객을 늘리고 싶어요",
+        "재방문 고객을 늘리는 홍보 전략은?",
+        "내 가게의 강점을 활용한 다른 홍보 방법은?",
+        "SNS 마케팅은 어떻게 하면 좋을까?",
+        "객단가를 높이는 방법이 있을까?",
+    ],
+    "agent": [
+        "축제 추천해주고 마케팅 전략도 같이 알려줘",
+        "추천한 축제 중에 어디가 제일 좋아?",
+        "고마워",
+        "아까 말한 내용 다시 정리해줘",
+        "두 축제를 비교해줘",
+    ],
+}
+
+
+class RouteDecision(NamedTuple):
+    """라우터의 판단 결과 (도구 이름, 도구 입력, 신뢰도, 판단 근거)"""
+    tool_name: str
+    tool_args: Dict[str, Any]
+    confidence: float
+    reason: str
+
+
+@st.cache_data
+def _load_festival_names() -> List[str]:
+    """축제 CSV에서 축제명 목록을 로드합니다. (축제명 매칭용)"""
+    try:
+        df = pd.read_csv(config.PATH_FESTIVAL_DF, usecols=['축제명'])
+        names = df['축제명'].dropna().astype(str).unique().tolist()
+        logger.info(f"--- [Cache] 라우터용 축제명 {len(names)}개 로드 완료 ---")
+        return names
+    except Exception as e:
+        logger.error(f"--- [Router ERROR] 축제명 로드 실패: {e} ---", exc_info=True)
+        return []
+
+
+@st.cache_resource
+def _load_intent_example_embeddings():
+    """라벨 예시 문장을 임베딩하여 (라벨 배열, 정규화된 임베딩 행렬)을 반환합니다."""
+    embeddings = get_embedding_model()
+    if embeddings is None:
+        return None
+    labels, texts = [], []
+    for label, examples in INTENT_EXAMPLES.items():
+        labels.extend([label] * len(examples))
+        texts.extend(examples)
+    matrix = np.asarray(embeddings.embed_documents(texts), dtype=np.float32)
+    matrix /= np.linalg.norm(matrix, axis=1, keepdims=True).clip(min=1e-12)
+    logger.info(f"--- [Cache] 라우터 의도 예시 {len(texts)}개 임베딩 완료 ---")
+    return np.asarray(labels), matrix
+
+
+def _contains_any(text: str, keywords: List[str]) -> bool:
+    return any(k in text for k in keywords)
+
+
+class IntentRouter:
+    """
+    명확한 의도의 질문을 에이전트(LLM 라우팅) 없이 바로 도구로 연결하는 로컬 라우터.
+    1) 키워드 + 축제명 매칭 규칙, 2) 라벨 예시 기반 임베딩 분류기 순으로 판단하고,
+    확신할 수 없으면 None을 반환하여 에이전트로 넘깁니다.
+    """
+
+    def __init__(self):
+        self.min_similarity = config.INTENT_ROUTER_MIN_SIMILARITY
+        self.min_margin = config.INTENT_ROUTER_MIN_MARGIN
+
+    def match_festival_names(self, user_query: str) -> List[str]:
+        """질문에 포함된 축제명을 (질문 내 등장 순서대로) 찾습니다. 공백은 무시합니다."""
+        compact_query = re.sub(r"\s+", "", user_query)
+        found = []
+        for name in _load_festival_names():
+            compact_name = re.sub(r"\s+", "", name)
+            position = compact_query.find(compact_name)
+            if position < 0 and compact_name.endswith("축제") and len(compact_name) > 4:
+                position = compact_query.find(compact_name[:-2])  # '보령머드' 처럼 '축제' 생략
+            if position >= 0:
+                found.append((position, name))
+        # 긴 이름 안에 포함된 짧은 이름(부분 일치)은 제외
+        found.sort()
+        names = [n for _, n in found]
+        return [n for n in names if not any(n != other and n in other for other in names)]
+
+    def _route_by_keywords(
+        self,
+        user_query: str,
+        last_recommended_festivals: Optional[List[str]],
+    ) -> Optional[RouteDecision]:
+        festival_names = self.match_festival_names(user_query)
+        is_marketing = _contains_any(user_query, MARKETING_KEYWORDS)
+        is_recommend = _contains_any(user_query, RECOMMEND_KEYWORDS)
+
+        if is_marketing and not is_recommend:
+            if not festival_names and last_recommended_festivals and _contains_any(user_query, PREVIOUS_RECOMMENDATION_KEYWORDS):
+                festival_names = list(last_recommended_festivals)
+            if len(festival_names) >= 2:
+                return RouteDecision(
+                    "create_marketing_strategies_for_multiple_festivals",
+                    {"festival_names": festival_names},
+                    1.0, f"keyword: 마케팅 + 축제 {len(festival_names)}개",
+                )
+            if len(festival_names) == 1:
+                return RouteDecision(
+                    "create_festival_specific_marketing_strategy",
+                    {"festival_name": festival_names[0]},
+                    1.0, "keyword: 마케팅 + 축제 1개",
+                )
+            return None
+
+        if len(festival_names) == 1 and not is_recommend and _contains_any(user_query, FESTIVAL_ANALYSIS_KEYWORDS):
+            return RouteDecision(
+                "analyze_festival_profile", {"festival_name": festival_names[0]},
+                1.0, "keyword: 축제 분석 + 축제 1개",
+            )
+
+        if festival_names:
+            return None
+
+        if is_recommend and not is_marketing:
+            return RouteDecision("recommend_festivals", {"user_query": user_query}, 1.0, "keyword: 축제 추천")
+
+        if (
+            _contains_any(user_query, MERCHANT_KEYWORDS)
+            and _contains_any(user_query, MERCHANT_ANALYSIS_KEYWORDS)
+            and not is_marketing
+        ):
+            return RouteDecision("analyze_merchant_profile", {}, 1.0, "keyword: 가게 분석")
+
+        return None
+
+    def _route_by_embedding(self, user_query: str) -> Optional[RouteDecision]:
+        loaded = _load_intent_example_embeddings()
+        embeddings = get_embedding_model()
+        if loaded is None or embeddings is None:
+            return None
+        labels, matrix = loaded
+
+        query = np.asarray(embeddings.embed_query(user_query), dtype=np.float32)
+        query /= max(float(np.linalg.norm(query)), 1e-12)
+        similarities = matrix @ query
+
+        # 라벨별 최고 유사도
+        best_by_label = {label: float(similarities[labels == label].max()) for label in INTENT_EXAMPLES}
+        ranked = sorted(best_by_label.items(), key=lambda x: x[1], reverse=True)
+        (top_label, top_sim), (_, second_sim) = ranked[0], ranked[1]
+
+        if top_label == "agent" or top_sim < self.min_similarity or top_sim - second_sim < self.min_margin:
+            logger.info(f"--- [Router] 임베딩 분류 불확실 (top={top_label}:{top_sim:.3f}, margin={top_sim - second_sim:.3f}) ---")
+            return None
+
+        tool_args = {"user_query": user_query} if top_label != "analyze_merchant_profile" else {}
+        return RouteDecision(top_label, tool_args, top_sim, f"embedding: {top_sim:.3f} (margin {top_sim - second_sim:.3f})")
+
+    def route(
+        self,
+        user_query: str,
+        last_recommended_festivals: Optional[List[str]] = None,
+    ) -> Optional[RouteDecision]:
+        """
+        질문의 의도가 명확하면 RouteDecision 을, 불확실하면 None(에이전트로 위임)을 반환합니다.
+        반환되는 tool_args 에는 store_profile 이 포함되지 않으므로 호출 측에서 추가해야 합니다.
+        """
+        try:
+            decision = self._route_by_keywords(user_query, last_recommended_festivals)
+            if decision is None and not self.match_festival_names(user_query):
+                decision = self._route_by_embedding(user_query)
+            if decision:
+                logger.info(f"--- [Router] HIT → {decision.tool_name} ({decision.reason}) ---")
+            return decision
+        except Exception as e:
+            logger.error(f"--- [Router ERROR] 라우팅 실패, 에이전트로 위임: {e} ---", exc_info=True)
+            return None
@@ -5,6 +5,7 @@ import streamlit as st
 from pathlib import Path
 from langchain_community.vectorstores import FAISS
 from langchain_community.embeddings import HuggingFaceEmbeddings 
+from langchain_community.embeddings import DeterministicFakeEmbedding
 import traceback 
 
 import config 
@@ -16,6 +17,10 @@ def _load_embedding_model():
     """
     임베딩 모델을 별도 함수로 분리하여 캐싱 (FAISS 로드 시 재사용)
     """
+    if config.EMBEDDING_BACKEND == "fake":
+        logger.warning(f"--- [Cache] 가짜 임베딩(DeterministicFakeEmbedding, size={config.FAKE_EMBEDDING_SIZE}) 사용 ---")
+        return DeterministicFakeEmbedding(size=config.FAKE_EMBEDDING_SIZE)
+
     try:
         logger.info("--- [Cache] HuggingFace 임베딩 모델 최초 로딩 시작 ---")
 
@@ -35,6 +40,13 @@ def _load_embedding_model():
         st.error(f"임베딩 모델('{config.EMBEDDING_MODEL}') 로딩 중 심각한 오류가 발생했습니다: {e}")
         return None
 
+def get_embedding_model():
+    """
+    캐시된 임베딩 모델을 반환합니다.
+    (벡터스토어 외에 시맨틱 캐시 등에서 쿼리 임베딩이 필요할 때 사용)
+    """
+    return _load_embedding_model()
+
 @st.cache_resource
 def load_marketing_vectorstore():
     """
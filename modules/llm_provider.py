@@ -1,51 +1,199 @@
 # modules/llm_provider.py
 
+import threading
+from langchain_core.callbacks import BaseCallbackHandler
 from langchain_google_genai import ChatGoogleGenerativeAI
-from typing import Optional
+from typing import Optional, Dict, Tuple, Any, List
 
 import config
+from utils.token_utils import estimate_tokens
+from utils.tracing import tracing_callback_handler
 
 logger = config.get_logger(__name__)
 
 _llm_instance: Optional[ChatGoogleGenerativeAI] = None
 
+# (model, temperature) -> 설정이 완료된 LLM 인스턴스
+# 풀의 인스턴스는 모두 기본 인스턴스의 model_copy(얕은 복사)이므로
+# 내부 HTTP 클라이언트(client / async_client)를 공유합니다.
+_llm_pool: Dict[Tuple[str, float], ChatGoogleGenerativeAI] = {}
+_pool_lock = threading.Lock()
+
+_llm_stats: Dict[str, int] = {
+    "client_constructions": 0,  # ChatGoogleGenerativeAI 신규 생성 횟수 (HTTP 클라이언트 생성)
+    "pool_copies": 0,           # temperature 변경을 위한 model_copy 횟수
+    "pool_hits": 0,             # 풀에서 재사용된 횟수
+    "llm_calls": 0,             # LLM 호출 횟수
+    "input_tokens": 0,          # 누적 입력 토큰 (응답 usage_metadata 기준, 없으면 추정치)
+    "output_tokens": 0,         # 누적 출력 토큰
+}
+
+
+class TokenUsageCallbackHandler(BaseCallbackHandler):
+    """
+    LLM 호출마다 입력/출력 토큰 수를 로깅하고 누적하는 콜백 핸들러.
+    응답에 usage_metadata가 없으면 프롬프트 길이 기반 추정치를 사용합니다.
+    """
+
+    def __init__(self):
+        self._estimated_inputs: Dict[Any, int] = {}
+        self._lock = threading.Lock()
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        estimated = sum(
+            estimate_tokens(m.content if isinstance(m.content, str) else str(m.content))
+            for batch in messages for m in batch
+        )
+        with self._lock:
+            self._estimated_inputs[run_id] = estimated
+
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+        with self._lock:
+            self._estimated_inputs[run_id] = sum(estimate_tokens(p) for p in prompts)
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        with self._lock:
+            estimated_input = self._estimated_inputs.pop(run_id, 0)
+
+        usage = _extract_usage_metadata(response)
+        input_tokens = usage.get("input_tokens", estimated_input)
+        output_tokens = usage.get("output_tokens", 0)
+
+        with _pool_lock:
+            _llm_stats["llm_calls"] += 1
+            _llm_stats["input_tokens"] += input_tokens
+            _llm_stats["output_tokens"] += output_tokens
+
+        logger.info(
+            f"--- [LLM Usage] input={input_tokens} output={output_tokens} "
+            f"(estimated_input={estimated_input}, source={'usage_metadata' if usage else 'estimate'}) ---"
+        )
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        with self._lock:
+            self._estimated_inputs.pop(run_id, None)
+
+
+def _extract_usage_metadata(response) -> Dict[str, int]:
+    """LLMResult 에서 usage_metadata(input_tokens/output_tokens)를 추출합니다."""
+    try:
+        message = response.generations[0][0].message
+        usage = getattr(message, "usage_metadata", None) or {}
+        return {k: int(usage[k]) for k in ("input_tokens", "output_tokens") if k in usage}
+    except (AttributeError, IndexError, TypeError):
+        return {}
+
+
+_token_usage_handler = TokenUsageCallbackHandler()
+
+
+def _with_usage_callback(callbacks: Optional[List[Any]]) -> List[Any]:
+    """기존 콜백 리스트에 토큰 사용량 / 추적(span) 콜백을 (중복 없이) 추가합니다."""
+    callbacks = list(callbacks or [])
+    for handler in (_token_usage_handler, tracing_callback_handler):
+        if handler not in callbacks:
+            callbacks.append(handler)
+    return callbacks
+
+
+def _pool_key(model: str, temperature: float) -> Tuple[str, float]:
+    return (model, round(float(temperature), 3))
+
+
+def get_or_create_base_llm(google_api_key: str, temperature: float = 0.1) -> ChatGoogleGenerativeAI:
+    """
+    프로세스 전체에서 공유할 기본 LLM 인스턴스를 반환합니다.
+    아직 생성되지 않았다면 한 번만 생성하여 글로벌 변수와 풀에 등록합니다.
+    (Streamlit 세션마다 HTTP 클라이언트를 새로 만들지 않기 위함)
+    """
+    global _llm_instance
+    with _pool_lock:
+        if _llm_instance is None:
+            llm = ChatGoogleGenerativeAI(
+                model=config.LLM_MODEL_NAME,
+                google_api_key=google_api_key,
+                temperature=temperature,
+                callbacks=_with_usage_callback(None),
+            )
+            _llm_stats["client_constructions"] += 1
+            logger.info(f"--- [LLM Provider] Base LLM client constructed (total: {_llm_stats['client_constructions']}) ---")
+            _register_base_llm(llm)
+        return _llm_instance
+
+
+def _register_base_llm(llm: ChatGoogleGenerativeAI):
+    """기본 인스턴스를 글로벌 변수와 풀에 등록합니다. (_pool_lock 보유 상태에서 호출)"""
+    global _llm_instance
+    if isinstance(llm.callbacks, (list, type(None))):
+        llm.callbacks = _with_usage_callback(llm.callbacks)
+    _llm_instance = llm
+    _llm_pool[_pool_key(llm.model, llm.temperature)] = llm
+
+
 def set_llm(llm: ChatGoogleGenerativeAI):
     """
     Orchestrator가 생성한 기본 LLM 인스턴스를
     글로벌 변수에 저장합니다.
     """
-    global _llm_instance
-    if _llm_instance is None:
-        logger.info(f"--- [LLM Provider] Global LLM instance set. (Model: {llm.model}, Temp: {llm.temperature}) ---")
-        _llm_instance = llm
-    else:
-        logger.info("--- [LLM Provider] Global LLM instance already set. ---")
+    with _pool_lock:
+        if _llm_instance is None:
+            logger.info(f"--- [LLM Provider] Global LLM instance set. (Model: {llm.model}, Temp: {llm.temperature}) ---")
+            _register_base_llm(llm)
+        elif _llm_instance is llm:
+            logger.debug("--- [LLM Provider] Global LLM instance already set (same instance). ---")
+        else:
+            logger.info("--- [LLM Provider] Global LLM instance already set. ---")
 
 
 def get_llm(temperature: float = 0.1) -> ChatGoogleGenerativeAI:
     """
     저장된 글로벌 LLM 인스턴스를 검색합니다.
     만약 도구가 요청한 temperature가 기본값과 다르면,
-    기본 인스턴스의 설정을 복사하여 temperature만 변경한
-    새로운 인스턴스를 반환합니다. (API 키 등은 재사용)
+    (model, temperature) 키로 풀에서 인스턴스를 찾아 재사용하고,
+    없을 때만 기본 인스턴스를 복사하여 한 번 생성합니다. (API 키, HTTP 클라이언트 등은 재사용)
     """
-    global _llm_instance
     if _llm_instance is None:
         logger.error("--- [LLM Provider] LLM not initialized. ---")
         raise RuntimeError(
             "LLM not initialized. The Orchestrator must call set_llm() before any tools are used."
         )
-    
-    if _llm_instance.temperature == temperature:
-        logger.debug(f"--- [LLM Provider] Reusing global LLM instance (temp={temperature}) ---")
-        return _llm_instance
-    
-    logger.info(f"--- [LLM Provider] Creating new LLM instance with temp={temperature} (default was {_llm_instance.temperature}) ---")
-    
-    try:
-        # Pydantic v2+ (langchain-core 0.1.23+)
-        return _llm_instance.model_copy(update={"temperature": temperature})
-    except AttributeError:
-        # Pydantic v1 (fallback)
-        logger.warning("--- [LLM Provider] Using .copy() fallback (Pydantic v1) ---")
-        return _llm_instance.copy(update={"temperature": temperature})
\ No newline at end of file
+
+    key = _pool_key(_llm_instance.model, temperature)
+
+    pooled = _llm_pool.get(key)
+    if pooled is not None:
+        _llm_stats["pool_hits"] += 1
+        logger.debug(f"--- [LLM Provider] Reusing pooled LLM instance (key={key}) ---")
+        return pooled
+
+    with _pool_lock:
+        # 다른 스레드가 먼저 생성했을 수 있으므로 재확인
+        pooled = _llm_pool.get(key)
+        if pooled is not None:
+            _llm_stats["pool_hits"] += 1
+            return pooled
+
+        logger.info(f"--- [LLM Provider] Creating pooled LLM instance with temp={temperature} (default was {_llm_instance.temperature}) ---")
+        try:
+            # Pydantic v2+ (langchain-core 0.1.23+)
+            llm = _llm_instance.model_copy(update={"temperature": temperature})
+        except AttributeError:
+            # Pydantic v1 (fallback)
+            logger.warning("--- [LLM Provider] Using .copy() fallback (Pydantic v1) ---")
+            llm = _llm_instance.copy(update={"temperature": temperature})
+
+        _llm_stats["pool_copies"] += 1
+        _llm_pool[key] = llm
+        return llm
+
+
+def get_llm_stats() -> Dict[str, Any]:
+    """
+    LLM 인스턴스 풀의 계측 정보(클라이언트 생성 횟수, 풀 재사용 횟수 등)를 반환합니다.
+    """
+    with _pool_lock:
+        return {
+            **_llm_stats,
+            "pool_size": len(_llm_pool),
+            "pool_keys": sorted(_llm_pool.keys()),
+        }
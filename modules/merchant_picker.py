@@ -0,0 +1,50 @@
+# modules/merchant_picker.py
+
+from typing import List, Dict, Any, Optional
+
+import streamlit as st
+
+import config
+from utils.hangul_search import HangulMatcher
+
+logger = config.get_logger(__name__)
+
+
+class MerchantPicker:
+    """
+    가게 선택 화면의 검색 인덱스. (/merchants/picker 응답으로 생성)
+    마스킹된 가맹점명('카페**')만으로는 구분이 어려우므로 상권 / 업종 / ID 를 함께 검색하고 표시하며,
+    검색은 모두 메모리에서 수행합니다. (입력할 때마다 API 서버를 호출하지 않음)
+    """
+
+    def __init__(self, payload: Dict[str, Any]):
+        self.hash = payload.get("hash", "")
+        self.ids: List[str] = payload["ids"]
+        self.names: List[str] = payload["names"]
+        self.areas: List[str] = [payload["areas"][c] if c >= 0 else "" for c in payload["area_codes"]]
+        self.categories: List[str] = [payload["categories"][c] if c >= 0 else "" for c in payload["category_codes"]]
+        # 가맹점명이 앞에 오도록 하여 이름 접두 일치가 가장 높은 점수를 받게 함
+        self.matcher = HangulMatcher([
+            f"{name} {area} {category} {merchant_id}"
+            for merchant_id, name, area, category in zip(self.ids, self.names, self.areas, self.categories)
+        ])
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def search(self, query: str, limit: Optional[int] = None) -> List[int]:
+        """검색어와 일치하는 가게의 인덱스 목록 (점수 순)"""
+        return [i for i, _ in self.matcher.search(query, limit or config.MERCHANT_PICKER_MAX_RESULTS)]
+
+    def label(self, index: int) -> str:
+        """선택 목록에 표시할 라벨 ('카페** · 성수동 · 카페 (ID)')"""
+        details = " · ".join(filter(None, [self.names[index], self.areas[index], self.categories[index]]))
+        return f"{details} ({self.ids[index]})"
+
+
+@st.cache_resource(max_entries=2, show_spinner=False)
+def get_merchant_picker(picker_hash: str, _payload: Dict[str, Any]) -> MerchantPicker:
+    """목록 내용 해시별로 검색 인덱스를 한 번만 만듭니다. (모든 세션이 공유)"""
+    picker = MerchantPicker(_payload)
+    logger.info(f"--- [Merchant Picker] 검색 인덱스 생성 ({len(picker)}개, hash={picker_hash}) ---")
+    return picker
@@ -0,0 +1,76 @@
+# modules/parallel_executor.py
+
+import contextvars
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import ContextVar
+from typing import List, Dict, Any, Optional, Callable
+
+from langchain.agents import AgentExecutor
+from langchain_core.agents import AgentAction, AgentStep
+
+import config
+
+logger = config.get_logger(__name__)
+
+# _iter_next_step 실행 중에만 설정되는 '지연 실행할 도구 호출' 목록
+_pending_tool_calls: ContextVar[Optional[List[Callable[[], AgentStep]]]] = ContextVar("pending_tool_calls", default=None)
+
+# _perform_agent_action 이 즉시 실행하지 않고 예약만 했음을 나타내는 표식
+_PENDING = object()
+
+
+class ParallelAgentExecutor(AgentExecutor):
+    """
+    한 단계(step)에서 모델이 여러 도구를 동시에 호출하면, 각 도구를 스레드 풀에서 병렬로 실행하는 AgentExecutor.
+    결과(observation)는 모델이 호출한 원래 순서대로 돌려주므로 이후 동작은 기본 AgentExecutor 와 같습니다.
+    도구가 하나뿐이면 기존과 동일하게 현재 스레드에서 실행합니다.
+    """
+
+    max_parallel_tools: int = 4
+
+    def _perform_agent_action(
+        self,
+        name_to_tool_map: Dict[str, Any],
+        color_mapping: Dict[str, str],
+        agent_action: AgentAction,
+        run_manager=None,
+    ):
+        pending = _pending_tool_calls.get()
+        if pending is None:
+            return super()._perform_agent_action(name_to_tool_map, color_mapping, agent_action, run_manager)
+        pending.append(functools.partial(
+            super()._perform_agent_action, name_to_tool_map, color_mapping, agent_action, run_manager,
+        ))
+        return _PENDING
+
+    def _run_pending(self, pending: List[Callable[[], AgentStep]]) -> List[AgentStep]:
+        if len(pending) <= 1 or self.max_parallel_tools <= 1:
+            return [call() for call in pending]
+
+        logger.info(f"--- [Agent] 도구 {len(pending)}개 병렬 실행 (max_workers={self.max_parallel_tools}) ---")
+        with ThreadPoolExecutor(max_workers=min(self.max_parallel_tools, len(pending)), thread_name_prefix="agent-tool") as pool:
+            # 세션 도구 캐시 등 ContextVar 를 작업 스레드에서도 사용하도록 호출마다 컨텍스트를 복사
+            futures = [pool.submit(contextvars.copy_context().run, call) for call in pending]
+            return [future.result() for future in futures]
+
+    def _iter_next_step(
+        self,
+        name_to_tool_map,
+        color_mapping,
+        inputs,
+        intermediate_steps,
+        run_manager=None,
+    ):
+        pending: List[Callable[[], AgentStep]] = []
+        token = _pending_tool_calls.set(pending)
+        try:
+            outputs = list(super()._iter_next_step(
+                name_to_tool_map, color_mapping, inputs, intermediate_steps, run_manager,
+            ))
+        finally:
+            _pending_tool_calls.reset(token)
+
+        steps = iter(self._run_pending(pending))
+        for output in outputs:
+            yield next(steps) if output is _PENDING else output
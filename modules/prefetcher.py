@@ -0,0 +1,101 @@
+# modules/prefetcher.py
+
+import threading
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import List, Dict, Any, Optional
+
+import streamlit as st
+
+import config
+from tools.tool_loader import ALL_TOOLS
+from tools.tool_cache import ToolResultCache, build_tool_cache_key
+from modules.tool_events import collect_tool_events
+from utils.tracing import span
+
+logger = config.get_logger(__name__)
+
+
+@st.cache_resource
+def get_prefetch_executor() -> ThreadPoolExecutor:
+    """프로세스 공용 프리페치 스레드 풀 (PREFETCH_MAX_WORKERS 로 동시 실행 수 제한)"""
+    logger.info(f"--- [Prefetch] 스레드 풀 생성 (max_workers={config.PREFETCH_MAX_WORKERS}) ---")
+    return ThreadPoolExecutor(max_workers=config.PREFETCH_MAX_WORKERS, thread_name_prefix="prefetch")
+
+
+class ToolPrefetcher:
+    """
+    가게 선택 직후, 첫 질문으로 자주 요청되는 도구(가게 분석, 축제 추천)를 기본 입력으로
+    백그라운드에서 미리 실행하여 세션 도구 캐시에 저장합니다.
+    - 사용자가 같은 요청을 하면 캐시(또는 실행 중인 결과)를 바로 사용
+    - cancel() 또는 가게 변경 시 대기 중인 작업은 취소되고, 실행 중인 작업의 결과는 저장하지 않음
+    """
+
+    def __init__(self, tool_cache: ToolResultCache):
+        self.tool_cache = tool_cache
+        self.tools_by_name = {t.name: t for t in ALL_TOOLS}
+        self.runs = 0
+        self._cancel_event = threading.Event()
+        self._futures: List[Future] = []
+
+    def _build_tool_args(self, tool_name: str, store_profile_json: str) -> Optional[Dict[str, Any]]:
+        """라우터/에이전트 호출과 같은 캐시 키가 되도록 도구 입력을 구성합니다."""
+        if tool_name == "analyze_merchant_profile":
+            return {"store_profile": store_profile_json}
+        if tool_name == "recommend_festivals":
+            return {"user_query": config.PREFETCH_RECOMMEND_QUERY, "store_profile": store_profile_json}
+        return None
+
+    def _run_tool(self, tool_name: str, tool_args: Dict[str, Any], key: str, cancel_event: threading.Event) -> Any:
+        if cancel_event.is_set():
+            return None
+        logger.info(f"--- [Prefetch] '{tool_name}' 선실행 시작 ---")
+        try:
+            with span("prefetch", tool=tool_name), collect_tool_events() as events:
+                result = self.tools_by_name[tool_name].invoke(tool_args)
+        except Exception as e:
+            logger.error(f"--- [Prefetch ERROR] '{tool_name}' 선실행 실패: {e} ---", exc_info=True)
+            return None
+        if cancel_event.is_set():
+            logger.info(f"--- [Prefetch] '{tool_name}' 취소됨 (결과 폐기) ---")
+            return None
+        self.tool_cache.put(tool_name, key, result, events=events.events())
+        logger.info(f"--- [Prefetch] '{tool_name}' 선실행 완료 → 세션 캐시 저장 ---")
+        return result
+
+    def start(self, store_profile_json: str) -> int:
+        """
+        설정된 도구들의 프리페치를 시작하고, 제출한 작업 수를 반환합니다.
+        이전 프리페치가 남아 있으면 먼저 취소합니다.
+        """
+        if not config.PREFETCH_ENABLED:
+            return 0
+        if self.runs >= config.PREFETCH_MAX_RUNS_PER_SESSION:
+            logger.info(f"--- [Prefetch] 세션당 최대 횟수({config.PREFETCH_MAX_RUNS_PER_SESSION}) 도달 → 생략 ---")
+            return 0
+
+        self.cancel()
+        self._cancel_event = threading.Event()
+        self.runs += 1
+
+        executor = get_prefetch_executor()
+        submitted = 0
+        for tool_name in config.PREFETCH_TOOLS:
+            tool_args = self._build_tool_args(tool_name, store_profile_json)
+            if tool_args is None or tool_name not in self.tools_by_name or not self.tool_cache.is_cacheable(tool_name):
+                continue
+            key = build_tool_cache_key(tool_name, tool_args)
+            future = executor.submit(self._run_tool, tool_name, tool_args, key, self._cancel_event)
+            self.tool_cache.register_pending(key, future)
+            self._futures.append(future)
+            submitted += 1
+
+        logger.info(f"--- [Prefetch] {submitted}개 도구 선실행 예약 (세션 {self.runs}회차) ---")
+        return submitted
+
+    def cancel(self):
+        """대기 중인 작업을 취소하고, 실행 중인 작업은 결과를 저장하지 않도록 표시합니다."""
+        self._cancel_event.set()
+        cancelled = sum(1 for f in self._futures if f.cancel())
+        if self._futures:
+            logger.info(f"--- [Prefetch] 취소 (대기 중 {cancelled}개 취소) ---")
+        self._futures = []
@@ -0,0 +1,137 @@
+# modules/profile_model.py
+
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, MutableMapping, Optional, Tuple
+
+import pandas as pd
+
+import config
+from modules.profile_utils import get_chat_profile_dict
+
+logger = config.get_logger(__name__)
+
+PROFILE_MODEL_STATE_KEY = "profile_model"
+
+AGE_LABELS = ('20대 이하', '30대', '40대', '50대 이상')
+
+
+def _percent(store_data: Dict[str, Any], key: str) -> float:
+    """비율 값을 float 로 변환합니다. (None / NaN 은 0 - Vega-Lite 스펙은 JSON 이므로 NaN 불가)"""
+    value = store_data.get(key)
+    return 0.0 if value is None or pd.isna(value) else float(value)
+
+
+def _percents_by_age(store_data: Dict[str, Any], gender: str) -> Tuple[float, ...]:
+    """AGE_LABELS 순서의 연령대별 비율 (50대와 60대 이상은 '50대 이상'으로 합산)"""
+    return (
+        _percent(store_data, f'{gender}20대이하비율'), _percent(store_data, f'{gender}30대비율'),
+        _percent(store_data, f'{gender}40대비율'),
+        _percent(store_data, f'{gender}50대비율') + _percent(store_data, f'{gender}60대이상비율'),
+    )
+
+
+def get_profile_data_version(profile_data: Dict[str, Any]) -> str:
+    """차트 캐시 키에 사용할 데이터 버전 (API 의 data_version, 없으면 기준년월)"""
+    store_data = profile_data.get("store_profile") or {}
+    return str(profile_data.get("data_version") or store_data.get("기준년월") or "")
+
+
+@dataclass(slots=True)
+class MerchantProfile:
+    """
+    /profile 응답으로 한 번 만드는 가게 프로필 모델. (세션 상태에 캐시, get_session_profile)
+    성별 / 연령대 / 고객 유형 / 충성도 집계는 생성 시 한 번 계산하고,
+    표시용 형식(채팅용 프로필, 기본 정보 표, 차트 스펙 등)은 처음 사용할 때 만들어 재사용합니다.
+    store 는 API 가 준 원본 딕셔너리이며 에이전트 / 도구에는 그대로 전달합니다.
+    """
+    merchant_id: str
+    name: str
+    data_version: str
+    store: Dict[str, Any]
+    average: Dict[str, Any]
+    male_by_age: Tuple[float, ...]
+    female_by_age: Tuple[float, ...]
+    customer_types: Dict[str, float]  # 0 인 유형 제외
+    loyalty: Dict[str, float]
+    main_segment: Optional[Tuple[str, float]]  # 가장 비율이 높은 (성별 연령대, 비율)
+    _views: Dict[str, Any] = field(default_factory=dict, repr=False, compare=False)
+
+    @classmethod
+    def from_store(cls, store: Dict[str, Any], data_version: str = "", average: Optional[Dict[str, Any]] = None) -> "MerchantProfile":
+        male, female = _percents_by_age(store, '남성'), _percents_by_age(store, '여성')
+        segments = {
+            f"{gender} {age}": value
+            for gender, values in (('남성', male), ('여성', female))
+            for age, value in zip(AGE_LABELS, values)
+        }
+        main_label = max(segments, key=segments.get)
+        customer_types = {
+            '유동인구': _percent(store, "유동인구이용비율"),
+            '거주자': _percent(store, "거주자이용비율"),
+            '직장인': _percent(store, "직장인이용비율"),
+        }
+        return cls(
+            merchant_id=str(store.get("가맹점ID", "")),
+            name=store.get("가맹점명", "선택 매장"),
+            data_version=data_version,
+            store=store,
+            average=average or {},
+            male_by_age=male,
+            female_by_age=female,
+            customer_types={label: size for label, size in customer_types.items() if size > 0},
+            loyalty={'신규 고객': _percent(store, '신규고객비율'), '재이용 고객': _percent(store, '재이용고객비율')},
+            main_segment=(main_label, segments[main_label]) if segments[main_label] > 0 else None,
+        )
+
+    @classmethod
+    def from_response(cls, profile_data: Dict[str, Any]) -> "MerchantProfile":
+        """/profile 응답({"store_profile", "average_profile", "data_version"})으로 생성합니다."""
+        return cls.from_store(
+            profile_data["store_profile"],
+            data_version=get_profile_data_version(profile_data),
+            average=profile_data.get("average_profile"),
+        )
+
+    def view(self, name: str, build: Callable[["MerchantProfile"], Any]) -> Any:
+        """name 으로 캐시되는 표시용 형식. 처음 요청될 때만 build(self) 를 호출합니다."""
+        try:
+            return self._views[name]
+        except KeyError:
+            value = self._views[name] = build(self)
+            return value
+
+    @property
+    def chat_profile(self) -> Dict[str, Any]:
+        """채팅용 프로필 딕셔너리 (profile_utils.get_chat_profile_dict)"""
+        return self.view("chat_profile", lambda p: get_chat_profile_dict(p.store))
+
+    @property
+    def summary_table(self) -> pd.DataFrame:
+        """기본 정보 표 (항목 → 내용, '자동추출특징' 제외)"""
+        def _build(p: "MerchantProfile") -> pd.DataFrame:
+            rows = [(k, str(v)) for k, v in p.chat_profile.items() if k != '자동추출특징']
+            return pd.DataFrame(rows, columns=["항목", "내용"]).set_index('항목')
+        return self.view("summary_table", _build)
+
+    @property
+    def main_segment_text(self) -> Optional[str]:
+        """주요 고객층 텍스트 ("'여성 20대 이하(30.0%)'"), 데이터가 없으면 None"""
+        if self.main_segment is None:
+            return None
+        label, value = self.main_segment
+        return f"'{label}({value:.1f}%)'"
+
+
+def get_session_profile(state: MutableMapping[str, Any]) -> Optional[MerchantProfile]:
+    """
+    세션의 profile_data 로 만든 MerchantProfile 을 반환합니다.
+    profile_data 가 바뀌었을 때(다른 가게 선택 / 세션 복원)만 다시 만들고, 그 외 rerun 에서는 캐시를 재사용합니다.
+    """
+    profile_data = state.get("profile_data")
+    if not profile_data or "store_profile" not in profile_data:
+        return None
+    profile = state.get(PROFILE_MODEL_STATE_KEY)
+    if profile is None or profile.store is not profile_data["store_profile"]:
+        profile = state[PROFILE_MODEL_STATE_KEY] = MerchantProfile.from_response(profile_data)
+        logger.info(f"--- [Profile Model] 프로필 모델 생성 ({profile.merchant_id}, version={profile.data_version}) ---")
+    return profile
@@ -1,7 +1,9 @@
 # modules/profile_utils.py
 
-from typing import Dict, Any
+import json
+from typing import Dict, Any, Union
 import config
+from utils.token_utils import estimate_tokens, truncate_to_token_budget
 
 logger = config.get_logger(__name__)
 
@@ -43,4 +45,122 @@ def get_chat_profile_dict(store_profile_dict: Dict[str, Any]) -> Dict[str, Any]:
             "자동추출특징": store_profile_dict.get('자동추출특징', {}),
             "주소": store_profile_dict.get('가맹점주소', '알 수 없음'),
             "error": "프로필 요약 중 오류 발생"
-        }
\ No newline at end of file
+        }
+
+# --- 압축 프로필 (프롬프트 토큰 절감용) ---
+# 채팅용 프로필의 키 -> 짧은 키
+COMPACT_PROFILE_KEYS = {
+    "가맹점명": "명",
+    "가맹점ID": "ID",
+    "상권": "상권",
+    "업종": "업종",
+    "주소": "주소",
+    "운영 기간 수준": "운영기간",
+    "매출 수준": "매출",
+    "매출 건수 수준": "매출건수",
+    "방문 고객수 수준": "고객수",
+    "객단가 수준": "객단가",
+    "신규/재방문율": "신규/재방문",
+    "동일 상권 대비 매출 순위": "상권순위",
+    "동일 업종 대비 매출 순위": "업종순위",
+    "자동추출특징": "특징",
+}
+COMPACT_FEATURE_KEYS = {
+    "핵심고객": "고객",
+    "핵심연령대": "연령",
+    # '매출순위'는 상권순위/업종순위와 중복되므로 압축 프로필에서 제외
+}
+_EXPAND_PROFILE_KEYS = {v: k for k, v in COMPACT_PROFILE_KEYS.items()}
+_EXPAND_FEATURE_KEYS = {v: k for k, v in COMPACT_FEATURE_KEYS.items()}
+
+# 토큰 예산 초과 시 먼저 제외할 키 (앞쪽부터 제외)
+_COMPACT_DROP_ORDER = ["ID", "주소", "운영기간", "매출건수", "업종순위", "상권순위", "명"]
+
+_EMPTY_VALUES = (None, "", "N/A", "알 수 없음", {}, [])
+
+
+def get_compact_chat_profile_dict(store_profile_dict: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    '채팅용 프로필 딕셔너리'를 프롬프트용으로 압축합니다.
+    N/A 등 빈 값을 제거하고 짧은 키를 사용합니다. (expand_profile_keys 로 복원 가능)
+    """
+    return _compact_profile(get_chat_profile_dict(store_profile_dict))
+
+
+def _compact_profile(chat_profile: Dict[str, Any]) -> Dict[str, Any]:
+    """원래 키를 사용하는 채팅용 프로필에서 빈 값을 제거하고 짧은 키로 바꿉니다."""
+    compact = {}
+    for key, value in chat_profile.items():
+        if key == "자동추출특징" and isinstance(value, dict):
+            value = {
+                COMPACT_FEATURE_KEYS[k]: v for k, v in value.items()
+                if k in COMPACT_FEATURE_KEYS and v not in _EMPTY_VALUES
+            }
+        if value in _EMPTY_VALUES:
+            continue
+        compact[COMPACT_PROFILE_KEYS.get(key, key)] = value
+    return compact
+
+
+def expand_profile_keys(profile: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    압축 프로필의 짧은 키를 채팅용 프로필의 원래 키로 복원합니다.
+    (이미 원래 키를 사용하는 딕셔너리는 그대로 반환됩니다.)
+    """
+    expanded = {}
+    for key, value in profile.items():
+        full_key = _EXPAND_PROFILE_KEYS.get(key, key)
+        if full_key == "자동추출특징" and isinstance(value, dict):
+            value = {_EXPAND_FEATURE_KEYS.get(k, k): v for k, v in value.items()}
+        expanded[full_key] = value
+    return expanded
+
+
+def parse_store_profile(store_profile: Union[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    도구가 받은 store_profile(JSON 문자열, 압축/일반 형식 모두)을
+    원래 키를 사용하는 딕셔너리로 변환합니다. 파싱 실패 시 빈 딕셔너리를 반환합니다.
+    """
+    if isinstance(store_profile, dict):
+        return expand_profile_keys(store_profile)
+    try:
+        parsed = json.loads(store_profile)
+    except (TypeError, ValueError):
+        return {}
+    return expand_profile_keys(parsed) if isinstance(parsed, dict) else {}
+
+
+def _dump_compact(profile: Dict[str, Any]) -> str:
+    return json.dumps(profile, ensure_ascii=False, separators=(",", ":"))
+
+
+def fit_profile_to_budget(store_profile: Union[str, Dict[str, Any]], max_tokens: int = None) -> str:
+    """
+    가게 프로필을 압축 JSON 문자열로 만들고, 토큰 예산(config.PROMPT_SECTION_TOKEN_BUDGETS['store_profile'])을
+    넘으면 중요도가 낮은 키부터 제외합니다. JSON이 아닌 문자열은 길이 기준으로 잘라냅니다.
+    """
+    if max_tokens is None:
+        max_tokens = config.PROMPT_SECTION_TOKEN_BUDGETS.get("store_profile", 0)
+
+    if isinstance(store_profile, dict):
+        profile = store_profile
+    else:
+        try:
+            profile = json.loads(store_profile)
+        except (TypeError, ValueError):
+            return truncate_to_token_budget(store_profile, max_tokens)
+        if not isinstance(profile, dict):
+            return truncate_to_token_budget(store_profile, max_tokens)
+
+    # 일반 채팅용 키로 들어온 경우에도 짧은 키로 통일
+    compact = _compact_profile(expand_profile_keys(profile))
+
+    text = _dump_compact(compact)
+    if max_tokens <= 0:
+        return text
+    for key in _COMPACT_DROP_ORDER:
+        if estimate_tokens(text) <= max_tokens:
+            break
+        if compact.pop(key, None) is not None:
+            text = _dump_compact(compact)
+    return text
@@ -0,0 +1,162 @@
+# modules/recommendation_cache.py
+
+import copy
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional
+
+import numpy as np
+import streamlit as st
+
+import config
+from modules.profile_utils import fit_profile_to_budget, parse_store_profile
+
+logger = config.get_logger(__name__)
+
+
+# 서명에 사용하는 압축 프로필 키 (fit_profile_to_budget 기준)
+# 추천 결과를 바꾸는 상권 / 업종 / 수준 항목과 핵심 고객 특징만 사용하고,
+# 가게를 식별하는 ID / 명 / 주소와 가게마다 다른 비율·순위 수치는 제외하여 비슷한 가게끼리 결과를 공유
+SIGNATURE_PROFILE_KEYS = ("상권", "업종", "운영기간", "매출", "매출건수", "고객수", "객단가")
+SIGNATURE_FEATURE_KEYS = ("고객", "연령")
+
+# 캐시에 저장하는 결과에서 가게명을 대신하는 자리표시자 (조회 시 현재 가게명으로 채움)
+STORE_NAME_PLACEHOLDER = "{가맹점명}"
+
+
+def build_profile_signature(store_profile: str, **options: Any) -> str:
+    """
+    시맨틱 캐시 키로 사용할 '가게 프로필 서명'을 생성합니다.
+    파이프라인이 LLM 에 보내는 압축 프로필(fit_profile_to_budget) 중 SIGNATURE_PROFILE_KEYS / 특징과
+    파이프라인 옵션(scoring_mode, format_mode 등)이 같은 가게는 (가맹점이 달라도) 같은 서명을 갖습니다.
+    """
+    try:
+        compact = json.loads(fit_profile_to_budget(store_profile))
+    except (TypeError, ValueError):
+        compact = {}
+    if not isinstance(compact, dict):
+        compact = {}
+    features = compact.get("특징") if isinstance(compact.get("특징"), dict) else {}
+    parts = [str(compact.get(key, "")) for key in SIGNATURE_PROFILE_KEYS]
+    parts += [str(features.get(key, "")) for key in SIGNATURE_FEATURE_KEYS]
+    parts += [f"{k}={options[k]}" for k in sorted(options)]
+    return "|".join(parts)
+
+
+def get_store_name(store_profile: str) -> Optional[str]:
+    """캐시 결과의 가게명 치환에 사용할 가맹점명 (없으면 None)"""
+    name = parse_store_profile(store_profile).get("가맹점명")
+    return name if isinstance(name, str) and name.strip() and name != "N/A" else None
+
+
+def _replace_text(value: Any, old: str, new: str) -> Any:
+    """문자열 / 딕셔너리 / 리스트 안의 모든 문자열에서 old 를 new 로 바꿉니다."""
+    if isinstance(value, str):
+        return value.replace(old, new)
+    if isinstance(value, dict):
+        return {k: _replace_text(v, old, new) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_replace_text(v, old, new) for v in value]
+    return value
+
+
+class SemanticRecommendationCache:
+    """
+    (가게 프로필 서명, 사용자 질문 임베딩) 기반의 축제 추천 결과 캐시.
+    같은 서명 내에서 질문 임베딩의 코사인 유사도가 임계값 이상이면 저장된 결과를 재사용합니다.
+    """
+
+    def __init__(
+        self,
+        similarity_threshold: float,
+        ttl_seconds: float,
+        max_entries_per_signature: int,
+        max_signatures: int,
+    ):
+        self.similarity_threshold = similarity_threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries_per_signature = max_entries_per_signature
+        self.max_signatures = max_signatures
+
+        # signature -> [(stored_at, normalized_embedding, result)]
+        self._entries: "OrderedDict[str, List[tuple]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+
+    @staticmethod
+    def _normalize(embedding) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+    def _evict_expired(self, now: float):
+        """TTL이 지난 항목을 제거합니다. (_lock 보유 상태에서 호출)"""
+        for signature in list(self._entries):
+            fresh = [e for e in self._entries[signature] if now - e[0] <= self.ttl_seconds]
+            self.stats["evictions"] += len(self._entries[signature]) - len(fresh)
+            if fresh:
+                self._entries[signature] = fresh
+            else:
+                del self._entries[signature]
+
+    def lookup(self, signature: str, query_embedding, store_name: Optional[str] = None) -> Optional[List[Dict[str, Any]]]:
+        """
+        임계값 이상으로 유사한 질문의 저장 결과가 있으면 (복사본을) 반환합니다.
+        store_name 이 있으면 결과의 가게명 자리표시자를 현재 가게명으로 채웁니다.
+        """
+        query = self._normalize(query_embedding)
+        with self._lock:
+            self._evict_expired(time.time())
+            entries = self._entries.get(signature)
+            if not entries:
+                self.stats["misses"] += 1
+                return None
+
+            matrix = np.stack([e[1] for e in entries])
+            similarities = matrix @ query
+            best = int(np.argmax(similarities))
+            if similarities[best] < self.similarity_threshold:
+                self.stats["misses"] += 1
+                return None
+
+            self._entries.move_to_end(signature)
+            self.stats["hits"] += 1
+            logger.info(f"--- [Semantic Cache] HIT (signature={signature}, similarity={similarities[best]:.3f}) ---")
+            result = entries[best][2]
+        return _replace_text(result, STORE_NAME_PLACEHOLDER, store_name) if store_name else copy.deepcopy(result)
+
+    def store(self, signature: str, query_embedding, result: List[Dict[str, Any]], store_name: Optional[str] = None):
+        """
+        추천 결과를 저장합니다. 서명별/전체 최대 개수를 넘으면 오래된 항목부터 제거합니다.
+        같은 서명을 다른 가게도 사용하므로, store_name 이 있으면 결과 문장 속 가게명을 자리표시자로 바꿔 저장합니다.
+        """
+        stored = _replace_text(result, store_name, STORE_NAME_PLACEHOLDER) if store_name else copy.deepcopy(result)
+        with self._lock:
+            entries = self._entries.setdefault(signature, [])
+            entries.append((time.time(), self._normalize(query_embedding), stored))
+            if len(entries) > self.max_entries_per_signature:
+                del entries[0]
+                self.stats["evictions"] += 1
+            self._entries.move_to_end(signature)
+            while len(self._entries) > self.max_signatures:
+                _, evicted = self._entries.popitem(last=False)
+                self.stats["evictions"] += len(evicted)
+            self.stats["stores"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+@st.cache_resource
+def get_recommendation_cache() -> SemanticRecommendationCache:
+    """프로세스 공용 시맨틱 추천 캐시를 반환합니다. (모든 세션이 공유)"""
+    logger.info("--- [Cache] 시맨틱 추천 캐시 생성 ---")
+    return SemanticRecommendationCache(
+        similarity_threshold=config.FESTIVAL_CACHE_SIMILARITY_THRESHOLD,
+        ttl_seconds=config.FESTIVAL_CACHE_TTL_SECONDS,
+        max_entries_per_signature=config.FESTIVAL_CACHE_MAX_ENTRIES_PER_SIGNATURE,
+        max_signatures=config.FESTIVAL_CACHE_MAX_SIGNATURES,
+    )
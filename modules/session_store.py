@@ -0,0 +1,300 @@
+# modules/session_store.py
+
+import json
+import sqlite3
+import threading
+import time
+import uuid
+import zlib
+from pathlib import Path
+from typing import List, Dict, Any, MutableMapping, Optional
+
+import streamlit as st
+from langchain_core.messages import BaseMessage
+
+import config
+from modules.chat_history import ChatHistoryManager, SUMMARY_STATE_KEY, SUMMARIZED_COUNT_STATE_KEY
+
+logger = config.get_logger(__name__)
+
+SESSION_ID_STATE_KEY = "session_id"
+MESSAGES_STATE_KEY = "messages"                # 메모리에 유지 중인 최근 메시지 (dict 목록)
+MESSAGES_OFFSET_STATE_KEY = "messages_offset"  # messages[0] 의 전체 대화 기준 인덱스
+OLDER_MESSAGES_STATE_KEY = "older_messages"    # '이전 대화 더 보기'로 불러온 메시지 (화면 표시 전용)
+
+# 상담 재시작 시 초기화할 세션 상태 키
+SESSION_STATE_KEYS = (SESSION_ID_STATE_KEY, MESSAGES_STATE_KEY, MESSAGES_OFFSET_STATE_KEY, OLDER_MESSAGES_STATE_KEY)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    session_id TEXT PRIMARY KEY,
+    merchant_id TEXT,
+    merchant_name TEXT,
+    summary TEXT NOT NULL DEFAULT '',
+    summarized_count INTEGER NOT NULL DEFAULT 0,
+    last_recommended TEXT NOT NULL DEFAULT '[]',
+    message_count INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS messages (
+    session_id TEXT NOT NULL,
+    idx INTEGER NOT NULL,
+    role TEXT NOT NULL,
+    content BLOB NOT NULL,
+    compressed INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (session_id, idx)
+);
+CREATE INDEX IF NOT EXISTS idx_sessions_updated_at ON sessions (updated_at);
+"""
+
+_SESSION_COLUMNS = ("merchant_id", "merchant_name", "summary", "summarized_count", "last_recommended", "message_count")
+
+
+def _encode(content: str) -> tuple:
+    """긴 메시지(마크다운 리포트)는 zlib 으로 압축하여 저장합니다."""
+    if len(content) >= config.SESSION_COMPRESS_MIN_CHARS:
+        return zlib.compress(content.encode("utf-8"), 6), 1
+    return content, 0
+
+
+def _decode(content, compressed: int) -> str:
+    return zlib.decompress(content).decode("utf-8") if compressed else content
+
+
+class SessionStore:
+    """
+    상담 세션(가게 정보 / 대화 요약 / 메시지)을 로컬 SQLite 에 저장합니다.
+    메시지는 (세션, 인덱스) 단위로 추가만 하므로 턴마다 전체 대화를 다시 쓰지 않으며,
+    필요한 구간만 인덱스 범위로 읽어옵니다.
+    """
+
+    def __init__(self, path=None):
+        self.path = Path(path or config.PATH_SESSION_DB)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=10)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(_SCHEMA)
+
+    def create_session(self, merchant_id: str, merchant_name: str) -> str:
+        session_id = uuid.uuid4().hex
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO sessions (session_id, merchant_id, merchant_name, created_at, updated_at) VALUES (?, ?, ?, ?, ?)",
+                (session_id, merchant_id, merchant_name, now, now),
+            )
+        return session_id
+
+    def load_session(self, session_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM sessions WHERE session_id = ?", (session_id,)).fetchone()
+        if row is None:
+            return None
+        session = dict(row)
+        session["last_recommended"] = json.loads(session["last_recommended"] or "[]")
+        return session
+
+    def update_session(self, session_id: str, **fields: Any):
+        """sessions 테이블의 일부 컬럼(summary, summarized_count, last_recommended 등)을 갱신합니다."""
+        fields = {k: v for k, v in fields.items() if k in _SESSION_COLUMNS}
+        if "last_recommended" in fields:
+            fields["last_recommended"] = json.dumps(fields["last_recommended"] or [], ensure_ascii=False)
+        assignments = ", ".join(f"{k} = ?" for k in fields)
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"UPDATE sessions SET {assignments + ', ' if assignments else ''}updated_at = ? WHERE session_id = ?",
+                (*fields.values(), time.time(), session_id),
+            )
+
+    def append_message(self, session_id: str, index: int, role: str, content: str):
+        blob, compressed = _encode(content)
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO messages (session_id, idx, role, content, compressed, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (session_id, index, role, blob, compressed, now),
+            )
+            self._conn.execute(
+                "UPDATE sessions SET message_count = MAX(message_count, ?), updated_at = ? WHERE session_id = ?",
+                (index + 1, now, session_id),
+            )
+
+    def load_messages(self, session_id: str, start: int, end: int) -> List[Dict[str, str]]:
+        """[start, end) 구간의 메시지를 인덱스 순으로 반환합니다."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT role, content, compressed FROM messages WHERE session_id = ? AND idx >= ? AND idx < ? ORDER BY idx",
+                (session_id, start, end),
+            ).fetchall()
+        return [{"role": row["role"], "content": _decode(row["content"], row["compressed"])} for row in rows]
+
+    def purge_expired(self, ttl_days: Optional[float] = None) -> int:
+        """마지막 사용 후 ttl_days 가 지난 세션과 메시지를 삭제하고 삭제된 세션 수를 반환합니다."""
+        cutoff = time.time() - (ttl_days or config.SESSION_TTL_DAYS) * 24 * 60 * 60
+        with self._lock, self._conn:
+            self._conn.execute(
+                "DELETE FROM messages WHERE session_id IN (SELECT session_id FROM sessions WHERE updated_at < ?)", (cutoff,)
+            )
+            deleted = self._conn.execute("DELETE FROM sessions WHERE updated_at < ?", (cutoff,)).rowcount
+        return deleted
+
+
+@st.cache_resource
+def get_session_store() -> SessionStore:
+    """프로세스 공용 세션 저장소 (생성 시 만료된 세션 정리)"""
+    store = SessionStore()
+    try:
+        deleted = store.purge_expired()
+        logger.info(f"--- [Session Store] 저장소 로드 ({store.path}, 만료 세션 {deleted}개 삭제) ---")
+    except sqlite3.Error as e:
+        logger.error(f"--- [Session Store ERROR] 만료 세션 정리 실패: {e} ---", exc_info=True)
+    return store
+
+
+class ChatSession:
+    """
+    Streamlit 세션 상태 위의 상담 대화.
+    - 메모리에는 최근 SESSION_MEMORY_MAX_MESSAGES 개와 아직 요약되지 않은 메시지만 유지하고,
+      전체 대화는 SQLite 에 저장합니다. (오래된 메시지는 '이전 대화 더 보기' 시에만 로드)
+    - 에이전트용 chat_history 는 ChatHistoryManager 의 누적 요약 / 변환 캐시를 그대로 사용하며,
+      요약 상태도 함께 저장하여 재접속 시 LLM 재요약 없이 복원합니다.
+    저장소 오류가 발생해도 대화는 메모리에서 계속 진행됩니다.
+    """
+
+    def __init__(self, state: MutableMapping[str, Any], store: Optional[SessionStore] = None):
+        self.state = state
+        self._store = store
+
+    @property
+    def store(self) -> SessionStore:
+        if self._store is None:
+            self._store = get_session_store()
+        return self._store
+
+    @property
+    def session_id(self) -> Optional[str]:
+        return self.state.get(SESSION_ID_STATE_KEY)
+
+    @property
+    def messages(self) -> List[Dict[str, str]]:
+        return self.state.setdefault(MESSAGES_STATE_KEY, [])
+
+    @property
+    def offset(self) -> int:
+        return int(self.state.get(MESSAGES_OFFSET_STATE_KEY, 0) or 0)
+
+    @property
+    def older_messages(self) -> List[Dict[str, str]]:
+        return self.state.get(OLDER_MESSAGES_STATE_KEY) or []
+
+    @property
+    def has_older(self) -> bool:
+        return self.offset - len(self.older_messages) > 0
+
+    def _persist(self, action: str, func, *args, **kwargs):
+        if not self.session_id:
+            return None
+        try:
+            return func(self.session_id, *args, **kwargs)
+        except sqlite3.Error as e:
+            logger.error(f"--- [Session Store ERROR] {action} 실패 ({self.session_id[:8]}): {e} ---", exc_info=True)
+            return None
+
+    def clear(self):
+        """메모리의 대화 상태를 비웁니다. (저장된 세션은 삭제하지 않음)"""
+        self.state[SESSION_ID_STATE_KEY] = None
+        self.state[MESSAGES_STATE_KEY] = []
+        self.state[MESSAGES_OFFSET_STATE_KEY] = 0
+        self.state[OLDER_MESSAGES_STATE_KEY] = []
+        ChatHistoryManager(self.state).reset()
+
+    def start(self, merchant_id: str, merchant_name: str) -> Optional[str]:
+        """새 상담 세션을 만들고 대화 상태를 초기화합니다. 저장소를 쓸 수 없으면 None (메모리 전용 세션)."""
+        self.clear()
+        try:
+            self.state[SESSION_ID_STATE_KEY] = self.store.create_session(merchant_id, merchant_name)
+        except sqlite3.Error as e:
+            logger.error(f"--- [Session Store ERROR] 세션 생성 실패, 메모리 전용으로 진행: {e} ---", exc_info=True)
+        return self.session_id
+
+    def restore(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """
+        저장된 세션을 복원합니다. (요약 상태 + 최근 메시지만 로드)
+        세션이 없으면 None, 있으면 세션 정보(merchant_id, merchant_name, last_recommended 등)를 반환합니다.
+        """
+        try:
+            session = self.store.load_session(session_id)
+            if session is None:
+                return None
+            total = session["message_count"]
+            keep_from = min(session["summarized_count"], max(total - config.SESSION_MEMORY_MAX_MESSAGES, 0))
+            messages = self.store.load_messages(session_id, keep_from, total)
+        except sqlite3.Error as e:
+            logger.error(f"--- [Session Store ERROR] 세션 복원 실패 ({session_id[:8]}): {e} ---", exc_info=True)
+            return None
+
+        self.clear()
+        self.state[SESSION_ID_STATE_KEY] = session_id
+        self.state[MESSAGES_STATE_KEY] = messages
+        self.state[MESSAGES_OFFSET_STATE_KEY] = keep_from
+        self.state[SUMMARY_STATE_KEY] = session["summary"]
+        self.state[SUMMARIZED_COUNT_STATE_KEY] = session["summarized_count"]
+        logger.info(
+            f"--- [Session Store] 세션 복원 ({session_id[:8]}, 전체 {total}개 중 최근 {len(messages)}개 로드) ---"
+        )
+        return session
+
+    def append(self, role: str, content: str):
+        """메시지를 대화에 추가하고 저장합니다."""
+        index = self.offset + len(self.messages)
+        self.messages.append({"role": role, "content": content})
+        self._persist("메시지 저장", self.store.append_message, index, role, content)
+
+    def agent_history(self) -> List[BaseMessage]:
+        """
+        방금 추가한 현재 질문을 제외한 대화로 에이전트용 chat_history 를 만듭니다.
+        요약이 갱신되면 저장하고, 요약되어 더 이상 필요 없는 오래된 메시지는 메모리에서 내립니다.
+        """
+        manager = ChatHistoryManager(self.state)
+        summarized_before = manager.summarized_count
+        history = manager.build(self.messages[:-1], offset=self.offset)
+        if manager.summarized_count != summarized_before:
+            self._persist(
+                "요약 저장", self.store.update_session,
+                summary=manager.summary, summarized_count=manager.summarized_count,
+            )
+        self._trim(manager.summarized_count)
+        return history
+
+    def save_recommended(self, festivals: List[str]):
+        self._persist("추천 축제 저장", self.store.update_session, last_recommended=festivals)
+
+    def load_older(self) -> int:
+        """화면에 표시할 이전 메시지를 SESSION_HISTORY_PAGE_SIZE 개 불러오고, 불러온 개수를 반환합니다."""
+        end = self.offset - len(self.older_messages)
+        start = max(end - config.SESSION_HISTORY_PAGE_SIZE, 0)
+        if end <= 0:
+            return 0
+        loaded = self._persist("이전 메시지 로드", self.store.load_messages, start, end) or []
+        self.state[OLDER_MESSAGES_STATE_KEY] = loaded + self.older_messages
+        return len(loaded)
+
+    def _trim(self, summarized_count: int):
+        """요약된 메시지 중 최근 SESSION_MEMORY_MAX_MESSAGES 개 밖의 메시지를 메모리에서 제거합니다."""
+        if not self.session_id:
+            return  # 저장소가 없으면 화면 표시를 위해 메모리에 유지
+        total = self.offset + len(self.messages)
+        keep_from = min(summarized_count, total - config.SESSION_MEMORY_MAX_MESSAGES)
+        if keep_from <= self.offset:
+            return
+        removed = keep_from - self.offset
+        del self.messages[:removed]
+        self.state[MESSAGES_OFFSET_STATE_KEY] = keep_from
+        # 불러온 이전 메시지와 구간이 끊기므로 다시 불러오도록 초기화
+        self.state[OLDER_MESSAGES_STATE_KEY] = []
+        logger.info(f"--- [Session Store] 오래된 메시지 {removed}개를 메모리에서 제거 (SQLite 에 보관, 메모리 {len(self.messages)}개) ---")
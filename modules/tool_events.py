@@ -0,0 +1,125 @@
+# modules/tool_events.py
+
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import List, Dict, Any, NamedTuple, Optional, Tuple, Iterator
+
+import config
+
+logger = config.get_logger(__name__)
+
+
+class RecommendedFestival(NamedTuple):
+    """추천된 축제 하나. festival_df 에 별도 ID 컬럼이 없으므로 축제명을 식별자로 사용합니다."""
+    festival_id: str
+    score: Optional[float] = None
+
+
+class FestivalsRecommended(NamedTuple):
+    """recommend_festivals 도구가 추천을 완료했을 때 발행하는 이벤트 (추천 순서 유지)"""
+    festivals: Tuple[RecommendedFestival, ...]
+
+    @property
+    def festival_ids(self) -> List[str]:
+        return [f.festival_id for f in self.festivals]
+
+
+# 직렬화 시 사용하는 이벤트 타입 이름 (에이전트 서비스 응답 등)
+EVENT_TYPES = {"festivals_recommended": FestivalsRecommended}
+
+# 현재 에이전트 턴(또는 캐시 가능한 도구 실행)의 이벤트 채널
+_current_channel: ContextVar[Optional["ToolEventChannel"]] = ContextVar("tool_event_channel", default=None)
+
+
+class ToolEventChannel:
+    """
+    도구가 발행한 구조화된 결과(이벤트)를 모으는 채널.
+    바깥 채널이 있으면 이벤트를 함께 전달하므로, 도구 캐시는 한 번의 도구 실행에서 나온 이벤트만 따로 기록할 수 있습니다.
+    병렬 도구 실행(contextvars.copy_context)에서도 같은 채널 객체를 공유하므로 스레드 안전하게 기록합니다.
+    """
+
+    def __init__(self, parent: Optional["ToolEventChannel"] = None):
+        self.parent = parent
+        self._events: List[Any] = []
+        self._lock = threading.Lock()
+
+    def publish(self, event: Any):
+        with self._lock:
+            self._events.append(event)
+        if self.parent is not None:
+            self.parent.publish(event)
+
+    def events(self) -> List[Any]:
+        with self._lock:
+            return list(self._events)
+
+
+@contextmanager
+def collect_tool_events() -> Iterator[ToolEventChannel]:
+    """with 블록 안에서 발행된 도구 이벤트를 모읍니다. (바깥 채널에도 전달)"""
+    channel = ToolEventChannel(parent=_current_channel.get())
+    token = _current_channel.set(channel)
+    try:
+        yield channel
+    finally:
+        _current_channel.reset(token)
+
+
+def publish_tool_event(event: Any):
+    """현재 채널에 이벤트를 발행합니다. 채널이 없으면(도구 단독 실행 등) 무시합니다."""
+    channel = _current_channel.get()
+    if channel is not None:
+        channel.publish(event)
+
+
+def festivals_recommended_from_results(results: List[Dict[str, Any]]) -> Optional[FestivalsRecommended]:
+    """recommend_festivals 결과(dict 목록)에서 이벤트를 만듭니다. 오류 결과이면 None."""
+    if not results or not isinstance(results[0], dict) or "error" in results[0]:
+        return None
+    festivals = []
+    for item in results:
+        name = item.get("축제명") if isinstance(item, dict) else None
+        if not name:
+            continue
+        score = item.get("추천_점수")
+        festivals.append(RecommendedFestival(name, float(score) if isinstance(score, (int, float)) else None))
+    return FestivalsRecommended(tuple(festivals)) if festivals else None
+
+
+def recommended_festival_ids(events: List[Any]) -> List[str]:
+    """이번 턴에 마지막으로 추천된 축제 ID 목록 (추천이 없었으면 빈 목록)"""
+    for event in reversed(events or []):
+        if isinstance(event, FestivalsRecommended):
+            return event.festival_ids
+    return []
+
+
+def format_festival_ids(festival_ids: Optional[List[str]]) -> str:
+    """프롬프트에 넣을 축제 ID 목록 (쉼표 구분, 없으면 '없음')"""
+    return ", ".join(festival_ids) if festival_ids else "없음"
+
+
+def serialize_events(events: List[Any]) -> List[Dict[str, Any]]:
+    """이벤트 목록을 JSON 직렬화 가능한 dict 목록으로 변환합니다."""
+    serialized = []
+    for event in events or []:
+        if isinstance(event, FestivalsRecommended):
+            serialized.append({
+                "type": "festivals_recommended",
+                "festivals": [f._asdict() for f in event.festivals],
+            })
+    return serialized
+
+
+def deserialize_events(data: List[Dict[str, Any]]) -> List[Any]:
+    """serialize_events 결과를 이벤트 객체로 복원합니다. 알 수 없는 타입은 건너뜁니다."""
+    events = []
+    for item in data or []:
+        if EVENT_TYPES.get(item.get("type")) is FestivalsRecommended:
+            events.append(FestivalsRecommended(tuple(
+                RecommendedFestival(f.get("festival_id"), f.get("score")) for f in item.get("festivals", [])
+            )))
+        else:
+            logger.warning(f"--- [Tool Events WARNING] 알 수 없는 이벤트 타입: {item.get('type')} ---")
+    return events
@@ -1,19 +1,42 @@
 # modules/visualization.py
 
-import pandas as pd
+import io
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+
+import matplotlib
+matplotlib.use("Agg")  # PNG 렌더링 전용 (GUI 백엔드 불필요)
 import matplotlib.pyplot as plt
 from matplotlib import font_manager
 import numpy as np
 import streamlit as st
 
 import config
-from modules.profile_utils import get_chat_profile_dict
+from modules.profile_model import AGE_LABELS, MerchantProfile
 
 logger = config.get_logger(__name__)
 
+PROFILE_VIEW_STATE_KEY = "profile_view"
+
+# (탭 라벨, 차트 종류) - 차트 종류가 None 이면 표/텍스트만 렌더링
+PROFILE_VIEWS = [
+    ("📋 기본 정보", None),
+    ("🧑‍🤝‍🧑 주요 고객층 (성별/연령대)", "customer_distribution"),
+    ("🚶 주요 고객 유형 (상권)", "customer_type"),
+    ("🔁 고객 충성도 (신규/재방문)", "loyalty"),
+]
+
+CHART_SUBHEADERS = {
+    "customer_distribution": "🧑‍🤝‍🧑 주요 고객층 분포 (성별/연령대)",
+    "customer_type": "🚶 주요 고객 유형 (상권)",
+    "loyalty": "🔁 신규 vs 재방문 고객 비율",
+}
+
+@lru_cache(maxsize=1)
 def set_korean_font():
     """
     시스템에 설치된 한글 폰트를 찾아 Matplotlib에 설정합니다.
+    (폰트 목록 탐색은 프로세스당 한 번만 수행)
     """
     font_list = ['Malgun Gothic', 'AppleGothic', 'NanumGothic']
     
@@ -31,106 +54,183 @@ def set_korean_font():
     plt.rcParams['axes.unicode_minus'] = False
 
 
-def display_merchant_profile(profile_data: dict):
+def _figure_to_png(fig) -> bytes:
+    """Figure 를 PNG 바이트로 변환하고 닫습니다. (rerun 마다 Figure 가 누적되지 않도록)"""
+    try:
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format="png", dpi=config.CHART_PNG_DPI, bbox_inches="tight")
+        return buffer.getvalue()
+    finally:
+        plt.close(fig)
+
+
+@st.cache_data(max_entries=config.CHART_CACHE_MAX_ENTRIES, show_spinner=False)
+def render_chart_png(kind: str, merchant_id: str, data_version: str, _profile: MerchantProfile) -> bytes:
+    """
+    (차트 종류, 가맹점ID, 데이터 버전) 별로 차트를 한 번만 렌더링하여 PNG 바이트로 캐시합니다.
+    _profile 은 해시하지 않으므로 (밑줄 접두사) 캐시 키는 앞의 세 값만으로 결정됩니다.
+    """
     set_korean_font()
+    logger.info(f"--- [Chart] '{kind}' 렌더링 ({merchant_id}, version={data_version}) ---")
+    return _figure_to_png(CHART_RENDERERS[kind](_profile))
+
+
+def _render_chart(kind: str, profile: MerchantProfile):
+    """
+    차트를 렌더링합니다.
+    - vega_lite: 데이터 몇 줄과 Vega-Lite 스펙(JSON)만 브라우저로 보내고, 그리기는 브라우저가 담당 (서버 CPU / 전송량 절감)
+    - matplotlib: 서버에서 PNG 로 래스터화하여 이미지로 전송
+    vega_lite 에서도 기존 matplotlib 차트를 PNG 로 내보낼 수 있으며, 내보내기를 켰을 때만 렌더링됩니다.
+    """
+    if config.CHART_BACKEND != "vega_lite":
+        st.image(render_chart_png(kind, profile.merchant_id, profile.data_version, profile))
+        return
 
+    spec = profile.view(f"chart_spec:{kind}", CHART_SPEC_BUILDERS[kind])
+    if spec is None:
+        st.info("데이터 없음")
+        return
+    st.vega_lite_chart(spec, use_container_width=True)
+    if st.toggle("🖼️ PNG 이미지로 내보내기", key=f"chart_png_export_{kind}"):
+        st.download_button(
+            "PNG 다운로드", data=render_chart_png(kind, profile.merchant_id, profile.data_version, profile),
+            file_name=f"{profile.merchant_id or 'chart'}_{kind}.png", mime="image/png", key=f"chart_png_{kind}",
+        )
+
+
+@st.fragment
+def _render_profile_views(profile: MerchantProfile):
+    """
+    선택된 탭의 내용만 렌더링합니다. (st.tabs 는 모든 탭을 매번 그리므로 segmented control 로 대체)
+    fragment 이므로 탭 전환 시 채팅 영역 등 앱 전체가 다시 실행되지 않습니다.
+    """
+    labels = [label for label, _ in PROFILE_VIEWS]
+    selected = st.segmented_control(
+        "분석 항목", labels, default=labels[0], key=PROFILE_VIEW_STATE_KEY, label_visibility="collapsed"
+    ) or labels[0]
+    kind = dict(PROFILE_VIEWS)[selected]
+
+    if kind is None:
+        render_basic_info_table(profile)
+        return
+
+    st.subheader(CHART_SUBHEADERS[kind])
+    _render_chart(kind, profile)
+
+
+def display_merchant_profile(profile: Optional[MerchantProfile]):
     """
     분석된 가맹점 프로필 전체를 Streamlit 화면에 시각화합니다.
+    (profile 은 세션에 캐시된 모델, modules/profile_model.get_session_profile)
     """
-    if not profile_data or "store_profile" not in profile_data:
+    if profile is None:
         st.error("분석할 가맹점 데이터가 없습니다.")
         return
 
-    store_data = profile_data["store_profile"]
-    store_name = store_data.get('가맹점명', '선택 매장')
-
-    st.info(f"**'{store_name}'**의 상세 분석 결과입니다.")
-
-    tab1, tab2, tab3, tab4 = st.tabs([
-        "📋 기본 정보", 
-        "🧑‍🤝‍🧑 주요 고객층 (성별/연령대)", 
-        "🚶 주요 고객 유형 (상권)", 
-        "🔁 고객 충성도 (신규/재방문)"
-    ])
-
-    with tab1:
-        render_basic_info_table(store_data)
-
-    with tab2:
-        st.subheader("🧑‍🤝‍🧑 주요 고객층 분포 (성별/연령대)")
-        fig2 = plot_customer_distribution(store_data)
-        st.pyplot(fig2)
-
-    with tab3:
-        st.subheader("🚶 주요 고객 유형 (상권)")
-        fig3 = plot_customer_type_pie(store_data)
-        st.pyplot(fig3)
-
-    with tab4:
-        st.subheader("🔁 신규 vs 재방문 고객 비율") 
-        fig4 = plot_loyalty_donut(store_data)
-        st.pyplot(fig4)
-
-
-def get_main_customer_segment(store_data):
-    """주요 고객층(성별/연령대) 텍스트를 반환합니다."""
-    segments = {
-        '남성 20대 이하': store_data.get('남성20대이하비율', 0),
-        '남성 30대': store_data.get('남성30대비율', 0),
-        '남성 40대': store_data.get('남성40대비율', 0),
-        '남성 50대 이상': store_data.get('남성50대비율', 0) + store_data.get('남성60대이상비율', 0),
-        '여성 20대 이하': store_data.get('여성20대이하비율', 0),
-        '여성 30대': store_data.get('여성30대비율', 0),
-        '여성 40대': store_data.get('여성40대비율', 0),
-        '여성 50대 이상': store_data.get('여성50대비율', 0) + store_data.get('여성60대이상비율', 0)
-    }
-    
-    if not any(segments.values()):
-        return None
-    
-    max_segment = max(segments, key=segments.get)
-    max_value = segments[max_segment]
-    
-    if max_value == 0:
-        return None
-        
-    return f"'{max_segment}({max_value:.1f}%)'"
+    st.info(f"**'{profile.name}'**의 상세 분석 결과입니다.")
+    _render_profile_views(profile)
 
 
-def render_basic_info_table(store_data):
+def render_basic_info_table(profile: MerchantProfile):
     """(Tab 1) 기본 정보 요약 표와 텍스트를 렌더링합니다."""
     
-    summary_data = get_chat_profile_dict(store_data)
+    summary_data = profile.chat_profile
     
     st.subheader("📋 가맹점 기본 정보")
-    summary_df = pd.DataFrame(summary_data.items(), columns=["항목", "내용"])
-    summary_df = summary_df[summary_df['항목'] != '자동추출특징']
-    summary_df = summary_df.astype(str) 
-    st.table(summary_df.set_index('항목'))
+    st.table(profile.summary_table)
 
     st.subheader("📌 분석 요약")
     st.write(f"✅ **{summary_data.get('가맹점명', 'N/A')}**은(는) '{summary_data.get('상권', 'N/A')}' 상권의 '{summary_data.get('업종', 'N/A')}' 업종 가맹점입니다.")
     st.write(f"📈 매출 수준은 **{summary_data.get('매출 수준', 'N/A')}**이며, 동일 상권 내 매출 순위는 **{summary_data.get('동일 상권 대비 매출 순위', 'N/A')}**입니다.")
     st.write(f"💰 방문 고객수는 **{summary_data.get('방문 고객수 수준', 'N/A')}** 수준이며, 객단가는 **{summary_data.get('객단가 수준', 'N/A')}** 수준입니다.")
     
-    main_customer = get_main_customer_segment(store_data)
+    main_customer = profile.main_segment_text
     if main_customer:
         st.write(f"👥 주요 고객층은 **{main_customer}**이(가) 가장 많습니다.")
 
 
-def plot_customer_distribution(store_data):
-    """(Tab 2) 고객 특성 분포 (성별/연령대)를 보여주는 막대 그래프를 생성합니다."""
-    labels = ['20대 이하', '30대', '40대', '50대 이상']
-    male_percents = [
-        store_data.get('남성20대이하비율', 0), store_data.get('남성30대비율', 0),
-        store_data.get('남성40대비율', 0),
-        store_data.get('남성50대비율', 0) + store_data.get('남성60대이상비율', 0)
+# --- Vega-Lite 스펙 (CHART_BACKEND = "vega_lite") ---
+# 집계 값은 MerchantProfile 에서 가져오며, 데이터가 없으면 None 을 반환하고 화면에는 '데이터 없음'을 표시합니다.
+
+def customer_distribution_spec(profile: MerchantProfile) -> Optional[Dict[str, Any]]:
+    """(Tab 2) 성별/연령대 고객 분포 - 그룹 막대 그래프"""
+    labels, male_percents, female_percents = list(AGE_LABELS), profile.male_by_age, profile.female_by_age
+    if not any(male_percents + female_percents):
+        return None
+    values = [
+        {"연령대": label, "성별": gender, "비율": round(percent, 1)}
+        for gender, percents in (("남성", male_percents), ("여성", female_percents))
+        for label, percent in zip(labels, percents)
     ]
-    female_percents = [
-        store_data.get('여성20대이하비율', 0), store_data.get('여성30대비율', 0),
-        store_data.get('여성40대비율', 0),
-        store_data.get('여성50대비율', 0) + store_data.get('여성60대이상비율', 0)
+    return {
+        "data": {"values": values},
+        "height": 360,
+        "encoding": {
+            "x": {"field": "연령대", "type": "nominal", "sort": labels, "title": None, "axis": {"labelAngle": 0}},
+            "xOffset": {"field": "성별", "sort": ["남성", "여성"]},
+            "y": {"field": "비율", "type": "quantitative", "title": "고객 비율 (%)"},
+            "color": {
+                "field": "성별", "type": "nominal",
+                "scale": {"domain": ["남성", "여성"], "range": ["cornflowerblue", "salmon"]},
+            },
+            "tooltip": [{"field": "성별"}, {"field": "연령대"}, {"field": "비율", "format": ".1f"}],
+        },
+        "layer": [
+            {"mark": "bar"},
+            {
+                "mark": {"type": "text", "dy": -8},
+                "encoding": {"text": {"field": "비율", "format": ".1f"}, "color": {"value": "#333333"}},
+            },
+        ],
+    }
+
+
+def _arc_spec(data: Dict[str, float], field: str, inner_radius: int = 0, colors: Optional[List[str]] = None) -> Dict[str, Any]:
+    """비율 dict 로 파이/도넛 차트 스펙을 만듭니다. (라벨에 각 항목의 비중 % 표시)"""
+    total = sum(data.values())
+    values = [
+        {field: label, "비율": round(size, 1), "비중": f"{label} {size / total * 100:.1f}%"}
+        for label, size in data.items()
     ]
+    color = {"field": field, "type": "nominal", "sort": list(data)}
+    if colors:
+        color["scale"] = {"domain": list(data), "range": colors}
+    return {
+        "data": {"values": values},
+        "height": 320,
+        "encoding": {
+            "theta": {"field": "비율", "type": "quantitative", "stack": True},
+            "color": color,
+            "order": {"field": field, "sort": "descending"},
+            "tooltip": [{"field": field}, {"field": "비율", "format": ".1f"}],
+        },
+        "layer": [
+            {"mark": {"type": "arc", "innerRadius": inner_radius, "outerRadius": 120}},
+            {"mark": {"type": "text", "radius": 150}, "encoding": {"text": {"field": "비중"}, "color": {"value": "#333333"}}},
+        ],
+        "view": {"stroke": None},
+    }
+
+
+def customer_type_spec(profile: MerchantProfile) -> Optional[Dict[str, Any]]:
+    """(Tab 3) 주요 고객 유형 - 파이 차트"""
+    data = profile.customer_types
+    return _arc_spec(data, "고객 유형") if data else None
+
+
+def loyalty_spec(profile: MerchantProfile) -> Optional[Dict[str, Any]]:
+    """(Tab 4) 신규 vs 재방문 고객 비율 - 도넛 차트"""
+    data = profile.loyalty
+    if sum(data.values()) == 0:
+        return None
+    return _arc_spec(data, "고객 구분", inner_radius=80, colors=['lightcoral', 'skyblue'])
+
+
+# --- matplotlib Figure (CHART_BACKEND = "matplotlib", 또는 PNG 다운로드) ---
+
+def plot_customer_distribution(profile: MerchantProfile):
+    """(Tab 2) 고객 특성 분포 (성별/연령대)를 보여주는 막대 그래프를 생성합니다."""
+    labels, male_percents, female_percents = AGE_LABELS, profile.male_by_age, profile.female_by_age
 
     x = np.arange(len(labels))
     width = 0.35
@@ -152,17 +252,10 @@ def plot_customer_distribution(store_data):
     return fig
 
 
-def plot_customer_type_pie(store_data):
+def plot_customer_type_pie(profile: MerchantProfile):
     """(Tab 3) 주요 고객 유형 (거주자, 직장인, 유동인구)을 파이 차트로 생성합니다."""
     
-    customer_data = {
-        '유동인구': store_data.get("유동인구이용비율", 0),
-        '거주자': store_data.get("거주자이용비율", 0),
-        '직장인': store_data.get("직장인이용비율", 0)
-    }
-    
-    filtered_data = {label: (size or 0) for label, size in customer_data.items()}
-    filtered_data = {label: size for label, size in filtered_data.items() if size > 0}
+    filtered_data = profile.customer_types
     
     sizes = list(filtered_data.values())
     labels = list(filtered_data.keys())
@@ -192,13 +285,10 @@ def plot_customer_type_pie(store_data):
     return fig
 
 
-def plot_loyalty_donut(store_data):
+def plot_loyalty_donut(profile: MerchantProfile):
     """(Tab 4) 신규 vs 재방문 고객 비율을 도넛 차트로 생성합니다."""
     
-    visit_ratio = {
-        '신규 고객': store_data.get('신규고객비율') or 0,
-        '재이용 고객': store_data.get('재이용고객비율') or 0
-    }
+    visit_ratio = profile.loyalty
     
     sizes = list(visit_ratio.values())
     labels = list(visit_ratio.keys())
@@ -227,4 +317,17 @@ def plot_loyalty_donut(store_data):
     ax.set_title("신규 vs 재방문 고객 비율", fontsize=14)
     ax.axis('equal')
     
-    return fig
\ No newline at end of file
+    return fig
+
+
+CHART_RENDERERS = {
+    "customer_distribution": plot_customer_distribution,
+    "customer_type": plot_customer_type_pie,
+    "loyalty": plot_loyalty_donut,
+}
+
+CHART_SPEC_BUILDERS = {
+    "customer_distribution": customer_distribution_spec,
+    "customer_type": customer_type_spec,
+    "loyalty": loyalty_spec,
+}
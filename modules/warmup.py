@@ -0,0 +1,93 @@
+# modules/warmup.py
+
+import importlib
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+import streamlit as st
+
+import config
+
+logger = config.get_logger(__name__)
+
+
+def _import(module_name: str) -> Callable[[], None]:
+    return lambda: importlib.import_module(module_name)
+
+
+def _load_vectorstores():
+    # 임베딩 모델(torch) 로딩이 포함되므로 가장 오래 걸리는 단계
+    from modules.knowledge_base import load_marketing_vectorstore, load_festival_vectorstore
+    load_marketing_vectorstore()
+    load_festival_vectorstore()
+
+
+def _warmup_steps() -> List[Tuple[str, Callable[[], None]]]:
+    """워밍업 단계 (이름, 함수). 원격 에이전트 모드에서는 UI 에 필요한 모듈만 로드합니다."""
+    steps = [("visualization", _import("modules.visualization"))]
+    if config.AGENT_BACKEND == "remote":
+        return steps + [("agent_client", _import("modules.agent_client"))]
+    return steps + [
+        ("agent_modules", _import("orchestrator")),
+        ("vectorstores", _load_vectorstores),
+    ]
+
+
+class Warmup:
+    """
+    Streamlit 프로세스 시작 직후, 가게 선택 화면을 띄우는 동안 무거운 모듈(LangChain 에이전트 / 도구 /
+    임베딩 모델 / FAISS / matplotlib)을 백그라운드 스레드에서 미리 로드합니다.
+    각 단계의 결과는 모듈 임포트 캐시와 st.cache_resource 에 남으므로, 이후 실제 사용 시점에는 즉시 반환됩니다.
+    """
+
+    def __init__(self, steps: List[Tuple[str, Callable[[], None]]]):
+        self.steps = steps
+        self.durations: Dict[str, float] = {}
+        self.errors: Dict[str, str] = {}
+        self.started_at = time.time()
+        self._done = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True, name="warmup")
+
+    def start(self) -> "Warmup":
+        self._thread.start()
+        return self
+
+    @property
+    def done(self) -> bool:
+        return self._done.is_set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """워밍업이 끝날 때까지 기다립니다. 시간 안에 끝났으면 True."""
+        return self._done.wait(timeout)
+
+    def _run(self):
+        try:
+            for name, func in self.steps:
+                start = time.perf_counter()
+                try:
+                    func()
+                except Exception as e:
+                    # 실패한 단계는 실제 사용 시점에 다시 시도되고, 그때 오류가 화면에 표시됨
+                    self.errors[name] = str(e)
+                    logger.error(f"--- [Warmup ERROR] '{name}' 워밍업 실패: {e} ---", exc_info=True)
+                self.durations[name] = time.perf_counter() - start
+                logger.info(f"--- [Warmup] '{name}' 완료 ({self.durations[name]:.2f}s) ---")
+        finally:
+            self._done.set()
+            logger.info(f"--- [Warmup] 전체 완료 ({time.time() - self.started_at:.2f}s) ---")
+
+
+@st.cache_resource
+def start_warmup() -> Optional[Warmup]:
+    """프로세스당 한 번 백그라운드 워밍업을 시작합니다. (WARMUP_ENABLED 가 False 이면 None)"""
+    if not config.WARMUP_ENABLED:
+        return None
+    logger.info("--- [Warmup] 백그라운드 워밍업 시작 ---")
+    return Warmup(_warmup_steps()).start()
+
+
+def wait_for_warmup(timeout: Optional[float] = None) -> bool:
+    """진행 중인 워밍업을 기다립니다. 워밍업이 꺼져 있으면 바로 True."""
+    warmup = start_warmup()
+    return warmup is None or warmup.wait(timeout)
@@ -1,33 +1,42 @@
 # orchestrator.py
 
 import json
+import time
 import traceback
 from typing import List, Optional, Dict, Any 
 from pydantic import ValidationError
 
-from langchain.agents import AgentExecutor, create_tool_calling_agent
+from langchain.agents import create_tool_calling_agent
+from langchain_core.agents import AgentAction
+from langchain_core.messages import SystemMessage, HumanMessage
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain.tools.render import render_text_description
+from langchain_core.utils.function_calling import convert_to_openai_tool
 
 import config
-from modules.llm_provider import set_llm
-from modules.profile_utils import get_chat_profile_dict
+from modules.llm_provider import get_or_create_base_llm
+from modules.profile_utils import get_compact_chat_profile_dict, fit_profile_to_budget
+from modules.intent_router import IntentRouter, RouteDecision
+from utils.token_utils import estimate_tokens, budget_prompt_section
+from utils.tracing import span
 
 # tools/tool_loader.py 에서 모든 도구를 가져옴
 from tools.tool_loader import ALL_TOOLS
+from tools.tool_cache import ToolResultCache, activate_tool_cache, is_error_output, wrap_tools_with_cache
+from modules.prefetcher import ToolPrefetcher
+from modules.parallel_executor import ParallelAgentExecutor
+from modules.tool_events import collect_tool_events, format_festival_ids
 
 logger = config.get_logger(__name__)
 
 # --- 헬퍼 함수를 공통 유틸리티 호출로 변경 ---
 def _get_chat_profile_json_string(store_profile_dict: Dict[str, Any]) -> str:
     """
-    공통 유틸리티(profile_utils.py)를 호출하여 '채팅용 프로필 딕셔너리'를 생성하고,
-    이를 JSON 문자열로 변환하여 반환합니다.
+    공통 유틸리티(profile_utils.py)를 호출하여 '채팅용 프로필 딕셔너리'를 압축(짧은 키, N/A 제거)하고,
+    토큰 예산 내의 JSON 문자열로 변환하여 반환합니다.
     """
     try:
-        summary_dict = get_chat_profile_dict(store_profile_dict)
-        return json.dumps(summary_dict, ensure_ascii=False)
+        summary_dict = get_compact_chat_profile_dict(store_profile_dict)
+        return fit_profile_to_budget(summary_dict)
         
     except Exception as e:
         logger.critical(f"--- [Orchestrator CRITICAL] 채팅용 JSON 생성 실패: {e} ---", exc_info=True)
@@ -40,20 +49,69 @@ def _get_chat_profile_json_string(store_profile_dict: Dict[str, Any]) -> str:
         return json.dumps(fallback_data, ensure_ascii=False)
 
 
+# 라우터가 직접 답변을 구성할 때 덧붙이는 [다음 질문 예시] (시스템 프롬프트의 가이드라인과 동일)
+_NEXT_QUESTION_SUGGESTIONS = """
+
+---
+**[다음 질문 예시]**
+* "방금 추천해준 축제들의 마케팅 전략을 알려줘"
+* "[축제이름]에 대한 마케팅 전략을 짜줘"
+* "내 가게의 강점을 활용한 다른 홍보 방법은?"
+"""
+
+
+def _render_recommendations_markdown(recommendations: List[Dict[str, Any]]) -> str:
+    """recommend_festivals 도구 결과(리스트)를 최종 답변 마크다운으로 변환합니다."""
+    lines = ["사장님 가게에 맞는 축제를 추천해 드립니다.\n"]
+    for i, item in enumerate(recommendations, start=1):
+        lines.append(f"### {i}. {item.get('축제명', 'N/A')} (추천 점수: {item.get('추천_점수', 'N/A')}점)")
+        if item.get("축제_기본정보"):
+            lines.append(f"* **축제 정보:** {item['축제_기본정보']}")
+        if item.get("추천_이유"):
+            lines.append(f"* **추천 이유:** {item['추천_이유']}")
+        if item.get("2026년 예상 시기"):
+            lines.append(f"* **2026년 예상 시기:** {item['2026년 예상 시기']}")
+        if item.get("홈페이지"):
+            lines.append(f"* **홈페이지:** {item['홈페이지']}")
+        lines.append("")
+    return "\n".join(lines)
+
+
+# 정상 답변 대신 반환하는 오류 / 대체 답변 (부하 테스트에서 실패 턴 판별에 사용, is_error_response)
+EMPTY_RESPONSE_FALLBACK = "죄송합니다. 요청을 처리하는 중 오류가 발생했습니다. 질문을 조금 더 명확히 말씀해주시겠어요?"
+VALIDATION_ERROR_RESPONSE = "죄송합니다. 도구 입력값(Pydantic) 오류가 발생했습니다"
+UNKNOWN_ERROR_RESPONSE = "죄송합니다. 알 수 없는 오류가 발생했습니다"
+
+
+def is_error_response(final_response: Optional[str]) -> bool:
+    """invoke_agent 의 final_response 가 오류 / 대체 답변인지 판단합니다."""
+    text = (final_response or "").strip()
+    return not text or text.startswith((EMPTY_RESPONSE_FALLBACK, VALIDATION_ERROR_RESPONSE, UNKNOWN_ERROR_RESPONSE))
+
+
+def _render_tool_output(tool_name: str, output: Any) -> str:
+    """도구 결과를 LLM 없이 최종 답변 마크다운으로 변환합니다."""
+    if tool_name == "recommend_festivals" and isinstance(output, list):
+        body = _render_recommendations_markdown(output)
+    elif isinstance(output, str):
+        body = output
+    else:
+        body = json.dumps(output, ensure_ascii=False, indent=2)
+    return body.rstrip() + _NEXT_QUESTION_SUGGESTIONS
+
+
 class AgentOrchestrator:
     def __init__(self, google_api_key):
         """Gemini Flash 기반 Agent Orchestrator 초기화"""
-        self.llm = ChatGoogleGenerativeAI(
-            model=config.LLM_MODEL_NAME,
-            google_api_key=google_api_key,
-            temperature=0.1  
-        )
-        set_llm(self.llm)
+        # 세션마다 새 클라이언트를 만들지 않고, 프로세스 공용 LLM 인스턴스를 재사용
+        self.llm = get_or_create_base_llm(google_api_key, temperature=0.1)
 
         # tool_loader 에서 도구 목록을 가져옴
-        self.tools = ALL_TOOLS
+        self.tools = wrap_tools_with_cache(ALL_TOOLS)
 
-        self.rendered_tools = render_text_description(self.tools)
+        # 상담 세션 단위 도구 결과 캐시 (같은 인자의 반복 호출은 즉시 반환)
+        self.tool_cache = ToolResultCache()
+        self.prefetcher = ToolPrefetcher(self.tool_cache)
 
         self.system_prompt_template = """
         {base_system_prompt}
@@ -70,25 +128,98 @@ class AgentOrchestrator:
         도구 라우팅 규칙(1~4순위)에 따라 *적절한 단 하나의 도구를 호출*해야 합니다.
         """
 
+        # 정적 시스템 프롬프트는 오케스트레이터당 한 번만 생성하여 템플릿에 고정 (partial)
+        self.base_system_prompt = self.setup_system_prompt()
+
         self.prompt = ChatPromptTemplate.from_messages([
             ("system", self.system_prompt_template),
             ("placeholder", "{chat_history}"),
             ("human", "{input}"),
             ("placeholder", "{agent_scratchpad}"),
-        ])
+        ]).partial(base_system_prompt=self.base_system_prompt)
+
+        # 가게 프로필 컨텍스트 캐시 (가맹점이 바뀔 때만 재생성)
+        self._profile_context_key: Optional[tuple] = None
+        self._profile_context_json: Optional[str] = None
+
+        self.prompt_stats = self._measure_static_prompt()
 
         self.agent = create_tool_calling_agent(self.llm, self.tools, self.prompt)
 
-        self.agent_executor = AgentExecutor(
+        # 명확한 의도는 에이전트(LLM 라우팅) 없이 바로 도구로 연결
+        self.router = IntentRouter() if config.INTENT_ROUTER_ENABLED else None
+        self.tools_by_name = {t.name: t for t in self.tools}
+
+        # 한 단계에서 여러 도구를 호출하면 병렬 실행 (결과 순서는 유지)
+        self.agent_executor = ParallelAgentExecutor(
             agent=self.agent,
             tools=self.tools,
             verbose=True,
             handle_parsing_errors=True,
             return_intermediate_steps=True,
+            max_parallel_tools=config.AGENT_MAX_PARALLEL_TOOLS,
         )
+        # 비정상 응답 재시도 계측 (synthesized: 도구 재실행 없이 기존 결과로 답변 생성)
+        self.retry_stats = {"retries": 0, "synthesized": 0, "agent_reruns": 0, "saved_seconds": 0.0}
+
         logger.info(f"--- [Streamlit] AgentOrchestrator 초기화 완료 (Model: {config.LLM_MODEL_NAME}) ---")
 
 
+    def _measure_static_prompt(self) -> Dict[str, Any]:
+        """
+        매 턴 동일하게 전송되는 정적 접두부(시스템 프롬프트 + 도구 스키마)의 크기를 측정합니다.
+        접두부가 충분히 크면 Provider 측 컨텍스트 캐싱(implicit caching)의 대상이 됩니다.
+        """
+        tool_schema_json = json.dumps(
+            [convert_to_openai_tool(t) for t in self.tools], ensure_ascii=False
+        )
+        stats = {
+            "system_prompt_chars": len(self.base_system_prompt),
+            "system_prompt_tokens": estimate_tokens(self.base_system_prompt),
+            "tool_schema_chars": len(tool_schema_json),
+            "tool_schema_tokens": estimate_tokens(tool_schema_json),
+        }
+        stats["static_prefix_tokens"] = stats["system_prompt_tokens"] + stats["tool_schema_tokens"]
+        stats["context_cache_eligible"] = stats["static_prefix_tokens"] >= config.LLM_CONTEXT_CACHE_MIN_TOKENS
+        logger.info(
+            f"--- [Orchestrator] 정적 프롬프트 접두부 약 {stats['static_prefix_tokens']} 토큰 "
+            f"(시스템 {stats['system_prompt_tokens']}, 도구 스키마 {stats['tool_schema_tokens']}, "
+            f"컨텍스트 캐싱 대상: {stats['context_cache_eligible']}) ---"
+        )
+        return stats
+
+    def _get_profile_context(self, store_profile_dict: Dict[str, Any]) -> str:
+        """
+        가게 프로필 컨텍스트(JSON)를 세션 단위로 캐시합니다.
+        가맹점(가맹점ID, 기준년월)이 바뀔 때만 다시 직렬화합니다.
+        """
+        key = (store_profile_dict.get('가맹점ID'), store_profile_dict.get('기준년월'))
+        if key != self._profile_context_key or self._profile_context_json is None:
+            self._profile_context_json = _get_chat_profile_json_string(store_profile_dict)
+            self._profile_context_key = key
+            self.prompt_stats["profile_context_tokens"] = estimate_tokens(self._profile_context_json)
+            logger.info(f"--- [Orchestrator] 가게 프로필 컨텍스트 갱신 (가맹점ID: {key[0]}) ---")
+        return self._profile_context_json
+
+    def start_prefetch(self, store_profile_dict: Dict[str, Any]) -> int:
+        """
+        (opt-in, config.PREFETCH_ENABLED) 가게 선택 직후 자주 요청되는 도구를 백그라운드에서 미리 실행합니다.
+        라우터/에이전트와 같은 프로필 컨텍스트를 입력으로 사용하므로 결과가 세션 캐시에서 재사용됩니다.
+        """
+        if not config.PREFETCH_ENABLED:
+            return 0
+        return self.prefetcher.start(self._get_profile_context(store_profile_dict))
+
+    def cancel_prefetch(self):
+        self.prefetcher.cancel()
+
+    def cancel_run(self):
+        """로컬 실행은 invoke_agent 콜백(modules/agent_runner)으로 취소됩니다. (RemoteAgentOrchestrator 와 인터페이스 호환용)"""
+
+    def get_prompt_stats(self) -> Dict[str, Any]:
+        """정적 프롬프트 접두부 / 가게 프로필 컨텍스트의 크기(추정 토큰) 정보를 반환합니다."""
+        return dict(self.prompt_stats)
+
     def setup_system_prompt(self):
         """Gemini Flash 전용 강화 프롬프트"""
         
@@ -159,32 +290,144 @@ class AgentOrchestrator:
         * "내 가게의 강점을 활용한 다른 홍보 방법은?"
         """
     
+    def _invoke_routed_tool(
+        self,
+        decision: RouteDecision,
+        store_profile_json: str,
+        callbacks: Optional[List[Any]] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """
+        라우터가 선택한 도구를 직접 실행하고, 결과를 에이전트와 같은 형식으로 반환합니다.
+        도구 결과가 비정상이면 None을 반환하여 에이전트로 위임합니다.
+        """
+        tool = self.tools_by_name.get(decision.tool_name)
+        if tool is None:
+            return None
+
+        tool_input = dict(decision.tool_args)
+        if "store_profile" in tool.args:
+            tool_input["store_profile"] = store_profile_json
+
+        output = tool.invoke(tool_input, config={"callbacks": callbacks})
+        if is_error_output(output):
+            logger.warning(f"--- [Orchestrator] 라우터 도구 결과 비정상 → 에이전트로 위임 ({decision.tool_name}) ---")
+            return None
+
+        action = AgentAction(tool=decision.tool_name, tool_input=tool_input, log=f"[Router] {decision.reason}")
+        return {
+            "final_response": _render_tool_output(decision.tool_name, output),
+            "intermediate_steps": [(action, output)],
+        }
+
+    def _synthesize_from_steps(
+        self,
+        user_query: str,
+        intermediate_steps: List[Any],
+    ) -> Optional[str]:
+        """
+        첫 시도에서 이미 실행된 도구 결과(intermediate_steps)로 최종 답변을 생성합니다.
+        도구는 다시 실행하지 않으며, LLM 호출이 실패하면 도구 결과를 그대로 렌더링합니다.
+        정상 도구 결과가 없으면 None을 반환합니다.
+        """
+        usable_steps = [
+            (action, output) for action, output in intermediate_steps
+            if not is_error_output(output)
+        ]
+        if not usable_steps:
+            return None
+
+        tool_results = "\n\n".join(
+            f"[{action.tool}]\n"
+            + budget_prompt_section(
+                output if isinstance(output, str) else json.dumps(output, ensure_ascii=False),
+                "tool_output",
+            )
+            for action, output in usable_steps
+        )
+        try:
+            response = self.llm.invoke([
+                SystemMessage(content=self.base_system_prompt),
+                HumanMessage(content=(
+                    f"사용자 질문: \"{user_query}\"\n\n"
+                    f"[도구 실행 결과]\n{tool_results}\n\n"
+                    "위 도구 실행 결과만을 바탕으로, [최종 답변 가이드라인]에 따라 최종 답변을 작성하세요. "
+                    "도구를 다시 호출하지 마세요."
+                )),
+            ])
+            answer = (response.content or "").strip() if isinstance(response.content, str) else ""
+            if answer:
+                return answer
+            logger.warning("--- [Orchestrator WARNING] 재시도 답변 합성 결과가 비어있음 → 도구 결과 렌더링 ---")
+        except Exception as e:
+            logger.error(f"--- [Orchestrator ERROR] 재시도 답변 합성 실패 → 도구 결과 렌더링: {e} ---", exc_info=True)
+
+        action, output = usable_steps[-1]
+        return _render_tool_output(action.tool, output)
+
+    def get_retry_stats(self) -> Dict[str, Any]:
+        """비정상 응답 재시도 계측 정보를 반환합니다."""
+        return dict(self.retry_stats)
+
     def invoke_agent(
         self,
         user_query: str,                  
         store_profile_dict: dict,          
         chat_history: list,
         last_recommended_festivals: Optional[List[str]] = None,
+        callbacks: Optional[List[Any]] = None,
     ):
 
-        """사용자 입력을 받아 Agent를 실행하고 결과를 반환"""
+        """
+        사용자 입력을 받아 Agent를 실행하고 결과를 반환
+        callbacks: 도구/LLM 실행 이벤트를 전달받을 LangChain 콜백 핸들러 (예: SSE 스트리밍)
+        반환값의 "events" 는 이번 턴에 도구가 발행한 구조화된 결과입니다. (modules/tool_events.py)
+        """
+        with span("agent_turn", query_chars=len(user_query), history_messages=len(chat_history)) as turn_span:
+            with activate_tool_cache(self.tool_cache), collect_tool_events() as events:
+                result = self._run_agent(user_query, store_profile_dict, chat_history, last_recommended_festivals, callbacks)
+            result["events"] = events.events()
+            steps = result.get("intermediate_steps", [])
+            turn_span.set(
+                routed=any(str(getattr(action, "log", "")).startswith("[Router]") for action, _ in steps),
+                tools=[getattr(action, "tool", None) for action, _ in steps],
+            )
+        logger.info(f"--- [Tool Cache] 세션 캐시 통계: {self.tool_cache.stats} ---")
+        return result
+
+    def _run_agent(
+        self,
+        user_query: str,
+        store_profile_dict: dict,
+        chat_history: list,
+        last_recommended_festivals: Optional[List[str]] = None,
+        callbacks: Optional[List[Any]] = None,
+    ):
+        """(invoke_agent 내부) 라우터 → 에이전트 순으로 실행합니다."""
+        run_config = {"callbacks": callbacks} if callbacks else None
         logger.info(f"--- [Orchestrator] Agent 실행 시작 (Query: {user_query[:30]}...) ---")
         
-        base_system_prompt = self.setup_system_prompt()
-        store_profile_chat_json_str = _get_chat_profile_json_string(store_profile_dict)
-        last_recommended_festivals_str = (
-            "없음" if not last_recommended_festivals else str(last_recommended_festivals)
-        )
+        store_profile_chat_json_str = self._get_profile_context(store_profile_dict)
+        last_recommended_festivals_str = format_festival_ids(last_recommended_festivals)
         
         try:
-            response = self.agent_executor.invoke({
-                "input": user_query, 
-                "chat_history": chat_history,
-                "store_profile_context": store_profile_chat_json_str, 
-                "store_profile": store_profile_chat_json_str,       
-                "last_recommended_festivals": last_recommended_festivals_str,
-                "base_system_prompt": base_system_prompt, 
-            })
+            if self.router is not None:
+                with span("router") as router_span:
+                    decision = self.router.route(user_query, last_recommended_festivals)
+                    router_span.set(tool=decision.tool_name if decision else None)
+                if decision is not None:
+                    routed = self._invoke_routed_tool(decision, store_profile_chat_json_str, callbacks)
+                    if routed is not None:
+                        logger.info(f"--- [Orchestrator] 라우터로 처리 완료 ({decision.tool_name}) ---\n")
+                        return routed
+
+            first_attempt_start = time.perf_counter()
+            with span("agent_executor", attempt=1):
+                response = self.agent_executor.invoke({
+                    "input": user_query, 
+                    "chat_history": chat_history,
+                    "store_profile_context": store_profile_chat_json_str, 
+                    "last_recommended_festivals": last_recommended_festivals_str,
+                }, config=run_config)
 
             output_text = response.get("output", "").strip()
 
@@ -193,12 +436,33 @@ class AgentOrchestrator:
             )
 
             if not output_text or is_garbage_response:
+                first_attempt_seconds = time.perf_counter() - first_attempt_start
+                self.retry_stats["retries"] += 1
                 
                 if is_garbage_response:
                     logger.warning(f"--- [Orchestrator WARNING] 비정상 응답 감지 ('{output_text}') → 재시도 수행 ---")
                 else:
                     logger.warning("--- [Orchestrator WARNING] 응답 비어있음 → 재시도 수행 ---")
 
+                # 1) 첫 시도의 도구 결과가 있으면 도구 재실행 없이 답변만 합성
+                synthesis_start = time.perf_counter()
+                with span("retry_synthesis"):
+                    synthesized = self._synthesize_from_steps(user_query, response.get("intermediate_steps", []))
+                if synthesized:
+                    saved_seconds = max(first_attempt_seconds - (time.perf_counter() - synthesis_start), 0.0)
+                    self.retry_stats["synthesized"] += 1
+                    self.retry_stats["saved_seconds"] += saved_seconds
+                    logger.info(
+                        f"--- [Orchestrator] 기존 도구 결과로 답변 합성 (절감 약 {saved_seconds:.1f}s, "
+                        f"누적 {self.retry_stats}) ---"
+                    )
+                    return {
+                        "final_response": synthesized,
+                        "intermediate_steps": response.get("intermediate_steps", []),
+                    }
+
+                # 2) 사용할 도구 결과가 없으면 에이전트를 다시 실행
+                self.retry_stats["agent_reruns"] += 1
                 retry_input = f"""
                 [재시도 요청]
                 이전 응답이 비어있거나 비정상적인 값('{output_text}')이었습니다.
@@ -208,14 +472,13 @@ class AgentOrchestrator:
                 도구 라우팅 규칙(1~4순위)에 따라 적절한 도구를 선택하고 호출하십시오.
                 """
                 
-                response = self.agent_executor.invoke({
-                    "input": retry_input,
-                    "chat_history": chat_history,
-                    "store_profile_context": store_profile_chat_json_str, 
-                    "store_profile": store_profile_chat_json_str,       
-                    "last_recommended_festivals": last_recommended_festivals_str,
-                    "base_system_prompt": base_system_prompt,
-                })
+                with span("agent_executor", attempt=2):
+                    response = self.agent_executor.invoke({
+                        "input": retry_input,
+                        "chat_history": chat_history,
+                        "store_profile_context": store_profile_chat_json_str, 
+                        "last_recommended_festivals": last_recommended_festivals_str,
+                    }, config=run_config)
                 
                 final_response = response.get("output", "").strip()
             
@@ -223,7 +486,7 @@ class AgentOrchestrator:
                 final_response = output_text
 
             if not final_response:
-                final_response = "죄송합니다. 요청을 처리하는 중 오류가 발생했습니다. 질문을 조금 더 명확히 말씀해주시겠어요?"
+                final_response = EMPTY_RESPONSE_FALLBACK
 
             logger.info("--- [Orchestrator] Agent 실행 완료 ---\n")
             
@@ -235,13 +498,13 @@ class AgentOrchestrator:
         except ValidationError as e:
             logger.error(f"--- [Orchestrator Pydantic ERROR] {e} ---\n", exc_info=True)
             return {
-                "final_response": f"죄송합니다. 도구 입력값(Pydantic) 오류가 발생했습니다: {e}",
+                "final_response": f"{VALIDATION_ERROR_RESPONSE}: {e}",
                 "intermediate_steps": []
             }
 
         except Exception as e:
             logger.critical(f"--- [Orchestrator CRITICAL ERROR] {e} ---\n", exc_info=True)
             return {
-                "final_response": f"죄송합니다. 알 수 없는 오류가 발생했습니다: {e}",
+                "final_response": f"{UNKNOWN_ERROR_RESPONSE}: {e}",
                 "intermediate_steps": []
             }
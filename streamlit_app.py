@@ -2,19 +2,18 @@
 
 import streamlit as st
 import os
-import pandas as pd
 import json
 import traceback
 import requests
 from PIL import Image # 이미지 로딩을 위해 추가
 from pathlib import Path # 경로 처리를 위해 추가
 
-from langchain_core.messages import HumanMessage, AIMessage
-
 import config 
-from orchestrator import AgentOrchestrator
-from modules.visualization import display_merchant_profile
-from modules.knowledge_base import load_marketing_vectorstore, load_festival_vectorstore
+from modules.api_client import get_api_client
+from modules.merchant_picker import get_merchant_picker
+from modules.warmup import start_warmup, wait_for_warmup
+# 에이전트 / 대화 기록 / 차트 모듈은 LangChain, torch, matplotlib 을 로드하므로 사용하는 함수 안에서 임포트
+# (가게 선택 화면을 먼저 띄우고, modules/warmup.py 가 백그라운드에서 미리 로드)
 
 logger = config.get_logger(__name__)
 
@@ -45,19 +44,20 @@ def load_image(image_name: str) -> Image.Image | None:
         return None
 
 # --- 데이터 로드 함수 ---
-@st.cache_data
+@st.cache_data(ttl=config.MERCHANT_PICKER_CACHE_TTL_SECONDS, show_spinner=False)
 def load_data():
-    """ FastAPI 서버로부터 가맹점 목록 데이터를 로드합니다. """
+    """
+    FastAPI 서버로부터 가게 선택 목록(/merchants/picker)을 로드합니다.
+    TTL 이 지나면 ETag 조건부 요청으로 변경 여부만 확인하고, 검색 인덱스는 목록 해시별로 한 번만 만듭니다.
+    """
     try:
-        logger.info(f"API 서버에서 가게 목록 로드 시도: {config.API_MERCHANTS_ENDPOINT}")
-        response = requests.get(config.API_MERCHANTS_ENDPOINT)
-        response.raise_for_status()
-        data = response.json()
-        if not data:
+        logger.info(f"API 서버에서 가게 목록 로드 시도: {config.API_MERCHANT_PICKER_ENDPOINT}")
+        data = get_api_client().get_merchant_picker()
+        if not data or not data.get("ids"):
             st.error("API 서버에서 가게 목록을 받았으나 데이터가 비어있습니다.")
             return None
-        logger.info(f"가게 목록 {len(data)}개 로드 성공.")
-        return pd.DataFrame(data)
+        logger.info(f"가게 목록 {len(data['ids'])}개 로드 성공. (hash={data.get('hash')})")
+        return data
     except requests.exceptions.ConnectionError:
         st.error(f"API 서버({config.API_SERVER_URL})에 연결할 수 없습니다. FastAPI 서버가 실행 중인지 확인하세요.")
         return None
@@ -67,42 +67,19 @@ def load_data():
         return None
 
 # --- 데이터 로드 실행 ---
-merchant_df = load_data()
-if merchant_df is None:
+merchant_picker_data = load_data()
+if merchant_picker_data is None:
     st.error("🚨 데이터 로딩 실패! API 서버 연결 및 데이터 파일을 확인해주세요.")
     st.stop()
+merchant_picker = get_merchant_picker(merchant_picker_data["hash"], merchant_picker_data)
 
 # --- 세션 초기화 함수 ---
 def initialize_session():
-    """ 세션 초기화 및 AI 모듈 로드 """
-    if "orchestrator" not in st.session_state:
-        google_api_key = os.environ.get("GOOGLE_API_KEY")
-        if not google_api_key:
-            st.error("🔑 GOOGLE_API_KEY 환경변수가 설정되지 않았습니다!")
-            st.stop()
-        with st.spinner("🧠 AI 모델과 빅데이터를 로딩하고 있어요... 잠시만 기다려주세요!"):
-            try:
-                # LLM 캐시 설정
-                try:
-                    from langchain.cache import InMemoryCache
-                    from langchain.globals import set_llm_cache
-                    set_llm_cache(InMemoryCache())
-                    logger.info("--- [Streamlit] 전역 LLM 캐시(InMemoryCache) 활성화 ---")
-                except ImportError:
-                     logger.warning("--- [Streamlit] langchain.cache 임포트 실패. LLM 캐시 비활성화 ---")
-
-
-                load_marketing_vectorstore()
-                db = load_festival_vectorstore()
-                if db is None:
-                    st.error("💾 축제 벡터 DB 로딩 실패! 'build_vector_store.py' 실행 여부를 확인하세요.")
-                    st.stop()
-                logger.info("--- [Streamlit] 모든 AI 모듈 로딩 완료 ---")
-            except Exception as e:
-                st.error(f"🤯 AI 모듈 초기화 중 오류 발생: {e}")
-                logger.critical(f"AI 모듈 초기화 실패: {e}", exc_info=True)
-                st.stop()
-        st.session_state.orchestrator = AgentOrchestrator(google_api_key)
+    """ 세션 초기화 (AI 모듈은 백그라운드에서 로드하고, 에이전트는 첫 사용 시 생성) """
+    start_warmup()
+    if config.AGENT_BACKEND != "remote" and not os.environ.get("GOOGLE_API_KEY"):
+        st.error("🔑 GOOGLE_API_KEY 환경변수가 설정되지 않았습니다!")
+        st.stop()
 
     # 세션 상태 변수 초기화
     if "step" not in st.session_state:
@@ -114,14 +91,104 @@ def initialize_session():
         st.session_state.consultation_result = None
         if "last_recommended_festivals" not in st.session_state:
             st.session_state.last_recommended_festivals = []
+        restore_chat_session()
+
+
+def ensure_orchestrator():
+    """ 세션의 에이전트(오케스트레이터)를 반환합니다. 없으면 백그라운드 워밍업 완료를 기다린 뒤 생성합니다. """
+    if "orchestrator" in st.session_state:
+        return st.session_state.orchestrator
+
+    if config.AGENT_BACKEND == "remote":
+        # 에이전트 서비스가 LLM / 벡터 스토어를 보유하므로 UI 에서는 세션만 생성
+        from modules.agent_client import RemoteAgentOrchestrator
+        try:
+            st.session_state.orchestrator = RemoteAgentOrchestrator(config.AGENT_SERVICE_URL)
+        except Exception as e:
+            st.error(f"🤯 AI 에이전트 서버({config.AGENT_SERVICE_URL})에 연결할 수 없습니다: {e}")
+            logger.critical(f"원격 에이전트 세션 생성 실패: {e}", exc_info=True)
+            st.stop()
+        return st.session_state.orchestrator
+
+    google_api_key = os.environ.get("GOOGLE_API_KEY")
+    with st.spinner("🧠 AI 모델과 빅데이터를 로딩하고 있어요... 잠시만 기다려주세요!"):
+        wait_for_warmup()
+        try:
+            from orchestrator import AgentOrchestrator
+            from modules.knowledge_base import load_marketing_vectorstore, load_festival_vectorstore
+
+            # LLM 캐시 설정
+            try:
+                from langchain.cache import InMemoryCache
+                from langchain.globals import set_llm_cache
+                set_llm_cache(InMemoryCache())
+                logger.info("--- [Streamlit] 전역 LLM 캐시(InMemoryCache) 활성화 ---")
+            except ImportError:
+                 logger.warning("--- [Streamlit] langchain.cache 임포트 실패. LLM 캐시 비활성화 ---")
+
+
+            load_marketing_vectorstore()
+            db = load_festival_vectorstore()
+            if db is None:
+                st.error("💾 축제 벡터 DB 로딩 실패! 'build_vector_store.py' 실행 여부를 확인하세요.")
+                st.stop()
+            logger.info("--- [Streamlit] 모든 AI 모듈 로딩 완료 ---")
+        except Exception as e:
+            st.error(f"🤯 AI 모듈 초기화 중 오류 발생: {e}")
+            logger.critical(f"AI 모듈 초기화 실패: {e}", exc_info=True)
+            st.stop()
+    st.session_state.orchestrator = AgentOrchestrator(google_api_key)
+    return st.session_state.orchestrator
+
+
+def restore_chat_session():
+    """ URL 의 세션 ID 로 이전 상담(가게 / 대화 요약 / 최근 메시지)을 복원합니다. (새로고침, 재접속) """
+    session_id = st.query_params.get(config.SESSION_QUERY_PARAM)
+    if not session_id:
+        return
+    from modules.session_store import ChatSession
+    chat_session = ChatSession(st.session_state)
+    session = chat_session.restore(session_id)
+    if session is None:
+        del st.query_params[config.SESSION_QUERY_PARAM]
+        return
+    try:
+        profile_data = get_api_client().get_profile(session["merchant_id"])
+    except Exception as e:
+        logger.error(f"--- [Session Store ERROR] 복원한 세션의 가게 프로필 로딩 실패: {e} ---", exc_info=True)
+        st.warning("이전 상담을 복원하지 못했습니다. 가게를 다시 선택해주세요.")
+        chat_session.clear()
+        del st.query_params[config.SESSION_QUERY_PARAM]
+        return
+    st.session_state.merchant_id = session["merchant_id"]
+    st.session_state.merchant_name = session["merchant_name"]
+    st.session_state.profile_data = profile_data
+    st.session_state.last_recommended_festivals = session["last_recommended"]
+    st.session_state.step = "show_profile_and_chat"
 
 # --- 처음으로 돌아가기 함수 ---
 def restart_consultation():
     """ 세션 상태 초기화 """
-    keys_to_reset = ["step", "merchant_name", "merchant_id", "profile_data", "messages", "consultation_result", "last_recommended_festivals"]
+    from modules.chat_history import SUMMARY_STATE_KEY, SUMMARIZED_COUNT_STATE_KEY, AGENT_MESSAGES_STATE_KEY
+    from modules.session_store import SESSION_STATE_KEYS
+    from modules.visualization import PROFILE_VIEW_STATE_KEY
+    from modules.profile_model import PROFILE_MODEL_STATE_KEY
+
+    keys_to_reset = [
+        "step", "merchant_name", "merchant_id", "profile_data", "messages", "consultation_result", "last_recommended_festivals",
+        SUMMARY_STATE_KEY, SUMMARIZED_COUNT_STATE_KEY, AGENT_MESSAGES_STATE_KEY, PROFILE_VIEW_STATE_KEY, PROFILE_MODEL_STATE_KEY, "agent_run",
+        *SESSION_STATE_KEYS,
+    ]
+    if "orchestrator" in st.session_state:
+        st.session_state.orchestrator.cancel_prefetch()
+    if st.session_state.get("agent_run") is not None:
+        st.session_state.agent_run.cancel("상담 재시작")
     for key in keys_to_reset:
         if key in st.session_state:
             del st.session_state[key]
+    # 세션은 SQLite 에 남겨두고, URL 에서만 분리하여 새 상담을 시작
+    if config.SESSION_QUERY_PARAM in st.query_params:
+        del st.query_params[config.SESSION_QUERY_PARAM]
 
 # --- 사이드바 렌더링 함수 ---
 def render_sidebar():
@@ -155,48 +222,39 @@ def render_sidebar():
 def render_get_merchant_name_step():
     """ UI 1단계: 가맹점 검색 및 선택 """
     st.subheader("🔍 컨설팅 받을 가게를 검색해주세요")
-    st.caption("가게 이름 또는 가맹점 ID의 일부를 입력하여 검색할 수 있습니다.")
+    st.caption("가게 이름, 상권, 업종, 가맹점 ID의 일부나 초성(예: ㅅㅅㅋㅍ)을 입력하여 검색할 수 있습니다.")
 
     search_query = st.text_input(
         "가게 이름 또는 가맹점 ID 검색",
-        placeholder="예: 메가커피, 스타벅스, 003AC99735 등",
+        placeholder="예: 메가커피, 성수 카페, ㅅㅅㅋㅍ, 003AC99735 등",
         label_visibility="collapsed"
     )
 
     if search_query:
-        mask = (
-            merchant_df['가맹점명'].str.contains(search_query, case=False, na=False, regex=False) |
-            merchant_df['가맹점ID'].str.contains(search_query, case=False, na=False, regex=False)
-        )
-        search_results = merchant_df[mask].copy()
+        # 검색은 메모리의 인덱스에서 수행 (API 서버 호출 없음)
+        search_results = merchant_picker.search(search_query)
 
-        if not search_results.empty:
-            search_results['display'] = search_results['가맹점명'] + " (" + search_results['가맹점ID'] + ")"
-            options = ["⬇ 아래 목록에서 가게를 선택해주세요..."] + search_results['display'].tolist()
-            selected_display_name = st.selectbox(
+        if search_results:
+            selected_index = st.selectbox(
                 "가게 선택:",
-                options,
+                [None] + search_results,
+                format_func=lambda i: "⬇️ 아래 목록에서 가게를 선택해주세요..." if i is None else merchant_picker.label(i),
                 label_visibility="collapsed"
             )
+            if len(search_results) >= config.MERCHANT_PICKER_MAX_RESULTS:
+                st.caption(f"상위 {config.MERCHANT_PICKER_MAX_RESULTS}개 결과만 표시합니다. 상권이나 업종을 함께 입력해 보세요. (예: 카페 성수)")
+
+            if selected_index is not None:
+                selected_merchant_id = merchant_picker.ids[selected_index]
+                selected_merchant_name = merchant_picker.names[selected_index]
+                button_label = f"🚀 '{selected_merchant_name}' 분석 시작하기"
 
-            if selected_display_name != "⬇️ 아래 목록에서 가게를 선택해주세요...":
-                try:
-                    selected_row = search_results[search_results['display'] == selected_display_name].iloc[0]
-                    selected_merchant_id = selected_row['가맹점ID']
-                    selected_merchant_name = selected_row['가맹점명']
-                    button_label = f"🚀 '{selected_merchant_name}' 분석 시작하기"
-                    is_selection_valid = True
-                except (IndexError, KeyError):
-                    button_label = "분석 시작하기"
-                    is_selection_valid = False
-
-                if st.button(button_label, disabled=not is_selection_valid, type="primary", use_container_width=True):
+                if st.button(button_label, type="primary", use_container_width=True):
                     with st.spinner(f"📈 '{selected_merchant_name}' 가게 정보를 분석 중입니다... 잠시만 기다려주세요!"):
                         profile_data = None
                         try:
-                            response = requests.post(config.API_PROFILE_ENDPOINT, json={"merchant_id": selected_merchant_id})
-                            response.raise_for_status()
-                            profile_data = response.json()
+                            # 연결 재사용 + 프로필 캐시 (같은 가게 재선택 시 API 재계산 없음)
+                            profile_data = get_api_client().get_profile(selected_merchant_id)
                             if "store_profile" not in profile_data or "average_profile" not in profile_data:
                                 st.error("API 응답 형식이 올바르지 않습니다.")
                                 profile_data = None
@@ -213,6 +271,17 @@ def render_get_merchant_name_step():
                             st.session_state.merchant_id = selected_merchant_id
                             st.session_state.profile_data = profile_data
                             st.session_state.step = "show_profile_and_chat"
+                            from modules.session_store import ChatSession
+                            session_id = ChatSession(st.session_state).start(selected_merchant_id, selected_merchant_name)
+                            if session_id:
+                                st.query_params[config.SESSION_QUERY_PARAM] = session_id
+                            # (opt-in) 첫 질문으로 자주 요청되는 분석/추천을 백그라운드에서 미리 실행
+                            # 프리페치를 쓰지 않으면 에이전트 생성(워밍업 대기)을 첫 질문 시점으로 미룸
+                            if config.PREFETCH_ENABLED:
+                                try:
+                                    ensure_orchestrator().start_prefetch(profile_data["store_profile"])
+                                except Exception as e:
+                                    logger.error(f"--- [Prefetch ERROR] 프리페치 시작 실패: {e} ---", exc_info=True)
                             st.success(f"✅ '{selected_merchant_name}' 분석 완료!")
                             st.rerun()
         else:
@@ -221,10 +290,16 @@ def render_get_merchant_name_step():
 # --- 프로필 및 채팅 UI 함수 ---
 def render_show_profile_and_chat_step():
     """UI 2단계: 프로필 확인 및 AI 채팅"""
+    from modules.visualization import display_merchant_profile
+    from modules.profile_model import get_session_profile
+    from modules.session_store import ChatSession
+    from modules.agent_runner import start_agent_run
+
     st.subheader(f"✨ '{st.session_state.merchant_name}' 가게 분석 완료")
     with st.expander("📊 상세 데이터 분석 리포트 보기", expanded=True):
         try:
-            display_merchant_profile(st.session_state.profile_data)
+            # 프로필 모델은 가게가 바뀔 때만 만들고 rerun 마다 재사용 (집계 / 표 / 차트 스펙 캐시)
+            display_merchant_profile(get_session_profile(st.session_state))
         except Exception as e:
             st.error(f"프로필 시각화 중 오류 발생: {e}")
             logger.error(f"--- [Visualize ERROR]: {e}\n{traceback.format_exc()}", exc_info=True)
@@ -233,72 +308,103 @@ def render_show_profile_and_chat_step():
     st.subheader("💬 AI 컨설턴트와 상담을 시작하세요.")
     st.info("가게 분석 정보를 바탕으로 궁금한 점을 질문해보세요. (예: '20대 여성 고객을 늘리고 싶어요')")
 
-    for message in st.session_state.messages:
+    chat_session = ChatSession(st.session_state)
+    if chat_session.has_older:
+        if st.button("⬆ 이전 대화 더 보기", key="load_older_messages"):
+            chat_session.load_older()
+            st.rerun()
+    for message in chat_session.older_messages + chat_session.messages:
         with st.chat_message(message["role"]):
             st.markdown(message["content"])
 
-    if prompt := st.chat_input("요청사항을 입력하세요..."):
-        st.session_state.messages.append({"role": "user", "content": prompt})
-        with st.chat_message("user"):
-            st.markdown(prompt)
-
-        with st.chat_message("assistant"):
-            with st.spinner("AI 컨설턴트가 답변을 생성 중입니다...(최대 1~2분)"):
-                orchestrator = st.session_state.orchestrator
-                
-                if "store_profile" not in st.session_state.profile_data:
-                    st.error("세션에 'store_profile' 데이터가 없습니다. 다시 시작해주세요.")
-                    st.stop()
-                    
-                agent_history = []
-                history_to_convert = st.session_state.messages[:-1][-10:]
-                
-                for msg in history_to_convert:
-                    if msg["role"] == "user":
-                        agent_history.append(HumanMessage(content=msg["content"]))
-                    elif msg["role"] == "assistant":
-                        agent_history.append(AIMessage(content=msg["content"]))
-                
-                result = orchestrator.invoke_agent(
-                    user_query=prompt,
-                    store_profile_dict=st.session_state.profile_data["store_profile"],
-                    chat_history=agent_history,
-                    last_recommended_festivals=st.session_state.last_recommended_festivals,
-                )
-
-                response_text = ""
-                st.session_state.last_recommended_festivals = []
-
-                if "error" in result:
-                    response_text = f"오류 발생: {result['error']}"
-
-                elif "final_response" in result:
-                    response_text = result.get("final_response", "응답을 생성하지 못했습니다.")
-                    intermediate_steps = result.get("intermediate_steps", [])
-                    
-                    try:
-                        for step in intermediate_steps:
-                            action = step[0]
-                            tool_output = step[1]
-                            
-                            if hasattr(action, 'tool') and action.tool == "recommend_festivals":
-                                if tool_output and isinstance(tool_output, list) and isinstance(tool_output[0], dict):
-                                    recommended_list = [
-                                        f.get("축제명") for f in tool_output if f.get("축제명")
-                                    ]
-                                    
-                                    st.session_state.last_recommended_festivals = recommended_list
-                                    logger.info(f"--- [Streamlit] 추천 축제 저장됨 (Intermediate Steps): {recommended_list} ---")
-                                    break 
-                                    
-                    except Exception as e:
-                        logger.critical(f"--- [Streamlit CRITICAL] Intermediate steps 처리 중 예외 발생: {e} ---", exc_info=True)
-
-                else:
-                    response_text = "알 수 없는 오류가 발생했습니다."
-
-                st.markdown(response_text)
-                st.session_state.messages.append({"role": "assistant", "content": response_text})
+    # 실행 중인 요청이 있을 때만 진행 상황을 폴링 (스크립트 스레드는 차단되지 않음)
+    # 요청이 없으면 fragment 를 호출하지 않으므로 유휴 탭에서는 run_every 주기 실행이 멈춤.
+    # 이미 끝난 실행도 호출하여 결과를 대화 기록에 반영 (반영 후 agent_run 이 제거되어 폴링 종료)
+    agent_run = st.session_state.get("agent_run")
+    if agent_run is not None:
+        render_agent_run_status()
+
+    agent_run = st.session_state.get("agent_run")
+    is_running = agent_run is not None and not agent_run.done
+    if prompt := st.chat_input("요청사항을 입력하세요...", disabled=is_running):
+        if "store_profile" not in st.session_state.profile_data:
+            st.error("세션에 'store_profile' 데이터가 없습니다. 다시 시작해주세요.")
+            st.stop()
+
+        chat_session.append("user", prompt)
+
+        # 최근 대화는 토큰 예산 내 원문, 오래된 대화는 누적 요약으로 전달
+        agent_history = chat_session.agent_history()
+
+        st.session_state.agent_run = start_agent_run(
+            ensure_orchestrator(),
+            user_query=prompt,
+            store_profile_dict=st.session_state.profile_data["store_profile"],
+            chat_history=agent_history,
+            last_recommended_festivals=st.session_state.last_recommended_festivals,
+        )
+        st.rerun()
+
+
+def handle_agent_result(result: dict) -> str:
+    """에이전트 결과에서 답변을 꺼내고, 추천 축제 목록을 세션에 저장합니다."""
+    response_text = ""
+    st.session_state.last_recommended_festivals = []
+
+    if "error" in result:
+        response_text = f"오류 발생: {result['error']}"
+
+    elif "final_response" in result:
+        response_text = result.get("final_response", "응답을 생성하지 못했습니다.")
+        # 추천 결과는 recommend_festivals 도구가 발행한 이벤트로 받음 (도구 출력 문자열/형식에 의존하지 않음)
+        from modules.tool_events import recommended_festival_ids
+        recommended_list = recommended_festival_ids(result.get("events"))
+        if recommended_list:
+            st.session_state.last_recommended_festivals = recommended_list
+            logger.info(f"--- [Streamlit] 추천 축제 저장됨 (Tool Events): {recommended_list} ---")
+
+    else:
+        response_text = "알 수 없는 오류가 발생했습니다."
+
+    return response_text
+
+
+@st.fragment(run_every=config.AGENT_RUN_POLL_SECONDS)
+def render_agent_run_status():
+    """
+    백그라운드 에이전트 실행의 진행 상황을 주기적으로 표시합니다. (fragment 만 다시 실행)
+    실행이 끝나면 답변을 대화 기록에 추가하고 앱 전체를 다시 실행합니다.
+    """
+    agent_run = st.session_state.get("agent_run")
+    if agent_run is None:
+        return
+    from modules.agent_runner import RUN_DONE, RUN_CANCELLED
+    from modules.session_store import ChatSession
+    agent_run.poll()
+
+    if agent_run.done:
+        del st.session_state["agent_run"]
+        if agent_run.status == RUN_DONE:
+            response_text = handle_agent_result(agent_run.result)
+        elif agent_run.status == RUN_CANCELLED:
+            response_text = "⏹ 요청이 취소되었습니다."
+        else:
+            response_text = f"죄송합니다. 답변 생성 중 오류가 발생했습니다: {agent_run.error}"
+        chat_session = ChatSession(st.session_state)
+        chat_session.append("assistant", response_text)
+        chat_session.save_recommended(st.session_state.last_recommended_festivals)
+        st.rerun()
+
+    with st.chat_message("assistant"):
+        if agent_run.cancel_event.is_set():
+            st.markdown(f"⏳ 요청을 취소하는 중입니다... ({agent_run.elapsed_seconds:.0f}초)")
+        else:
+            st.markdown(f"⏳ AI 컨설턴트가 답변을 생성 중입니다... ({agent_run.elapsed_seconds:.0f}초, 최대 1~2분)")
+        for line in agent_run.progress()[-5:]:
+            st.caption(line)
+        if st.button("⏹ 요청 취소", key=f"cancel_{agent_run.id}", disabled=agent_run.cancel_event.is_set()):
+            agent_run.cancel()
+            st.rerun(scope="fragment")
 
 # --- 메인 실행 함수 ---
 def main():
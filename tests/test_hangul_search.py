@@ -0,0 +1,43 @@
+# tests/test_hangul_search.py
+
+from utils.hangul_search import HangulMatcher, choseong, decompose, is_choseong_query
+
+
+def _ranked(texts, query):
+    matcher = HangulMatcher(texts, min_fuzzy_score=0.5)
+    return [texts[i] for i, _ in matcher.search(query)]
+
+
+def test_decompose():
+    assert decompose("카페") == "ㅋㅏㅍㅔ"
+    assert decompose("닭") == "ㄷㅏㄹㄱ"  # 겹받침은 입력 순서대로 분해
+    assert decompose("과") == "ㄱㅗㅏ"  # 겹모음
+    assert decompose("Cafe 24") == "cafe24"  # 소문자 / 공백 제거
+
+
+def test_choseong():
+    assert choseong("성수커피") == "ㅅㅅㅋㅍ"
+    assert choseong("카페 A1") == "ㅋㅍa1"
+    assert is_choseong_query("ㅅㅅㅋㅍ")
+    assert not is_choseong_query("성수")
+
+
+def test_search_prefix_before_substring():
+    # 가맹점명 앞부분 일치가 중간 일치보다 먼저
+    assert _ranked(["동네카페", "카페거리"], "카페") == ["카페거리", "동네카페"]
+
+
+def test_search_partial_syllable():
+    # 입력 중인 글자 ('캎' = '카' + 'ㅍ')
+    assert _ranked(["카페", "카레", "분식"], "캎") == ["카페"]
+
+
+def test_search_choseong_does_not_cross_syllables():
+    texts = ["김가네 분식", "명가 칼국수", "목구멍", "삼겹살"]
+    assert _ranked(texts, "ㅁㄱ") == ["목구멍", "명가 칼국수"]
+
+
+def test_search_all_tokens_must_match():
+    texts = ["성수커피 성수동 카페", "성수분식 성수동 분식", "연남커피 연남동 카페"]
+    assert _ranked(texts, "성수 커피") == ["성수커피 성수동 카페"]
+    assert _ranked(texts, "") == []
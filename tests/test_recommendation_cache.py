@@ -0,0 +1,66 @@
+# tests/test_recommendation_cache.py
+
+import json
+
+from modules.profile_utils import get_compact_chat_profile_dict
+from modules.recommendation_cache import SemanticRecommendationCache, build_profile_signature, get_store_name
+
+
+def _store_profile(merchant_id, name, address, **overrides):
+    store = {
+        "가맹점ID": merchant_id,
+        "가맹점명": name,
+        "가맹점주소": address,
+        "상권": "성수동",
+        "업종": "카페",
+        "운영개월수_수준": "상위 10~25%",
+        "매출구간_수준": "상위 25~50%",
+        "월매출건수_수준": "상위 25~50%",
+        "월유니크고객수_수준": "상위 10~25%",
+        "월객단가_수준": "상위 50~75%",
+        "신규고객비율": 30.0,
+        "재이용고객비율": 70.0,
+        "동일상권내매출순위비율": 20.0,
+        "동일업종내매출순위비율": 30.0,
+        "자동추출특징": {"핵심고객": "여성", "핵심연령대": "20대 이하"},
+    }
+    store.update(overrides)
+    return json.dumps(get_compact_chat_profile_dict(store), ensure_ascii=False)
+
+
+def _cache():
+    return SemanticRecommendationCache(
+        similarity_threshold=0.9, ttl_seconds=600, max_entries_per_signature=5, max_signatures=10,
+    )
+
+
+def test_signature_ignores_merchant_identity():
+    first = _store_profile("A001", "카페**", "서울 성동구 1", 신규고객비율=10.0, 동일상권내매출순위비율=5.0)
+    second = _store_profile("B002", "커피**", "서울 성동구 2")
+    assert build_profile_signature(first, scoring_mode="llm") == build_profile_signature(second, scoring_mode="llm")
+
+
+def test_signature_changes_with_profile_and_options():
+    base = _store_profile("A001", "카페**", "서울 성동구 1")
+    other_level = _store_profile("A001", "카페**", "서울 성동구 1", 월객단가_수준="상위 10% 이하")
+    other_feature = _store_profile("A001", "카페**", "서울 성동구 1", 자동추출특징={"핵심고객": "남성", "핵심연령대": "40대"})
+    signature = build_profile_signature(base, scoring_mode="llm", format_mode="llm")
+    assert build_profile_signature(other_level, scoring_mode="llm", format_mode="llm") != signature
+    assert build_profile_signature(other_feature, scoring_mode="llm", format_mode="llm") != signature
+    assert build_profile_signature(base, scoring_mode="llm", format_mode="template") != signature
+    assert build_profile_signature(base, scoring_mode="rule", format_mode="llm") != signature
+
+
+def test_other_merchant_hits_cache_with_its_own_name():
+    first = _store_profile("A001", "카페**", "서울 성동구 1")
+    second = _store_profile("B002", "커피**", "서울 성동구 2")
+    cache = _cache()
+    results = [{"축제명": "강릉커피축제", "추천_이유": "카페**의 20대 여성 고객과 잘 맞습니다."}]
+
+    cache.store(build_profile_signature(first), [1.0, 0.0], results, store_name=get_store_name(first))
+    hit = cache.lookup(build_profile_signature(second), [0.99, 0.05], store_name=get_store_name(second))
+
+    assert hit is not None
+    assert hit[0]["추천_이유"] == "커피**의 20대 여성 고객과 잘 맞습니다."
+    assert cache.stats["hits"] == 1
+    assert results[0]["추천_이유"].startswith("카페**")  # 원본 결과는 변경하지 않음
@@ -0,0 +1,19 @@
+# tests/test_tool_cache.py
+
+from tools.tool_cache import is_error_output
+
+
+def test_error_outputs():
+    assert is_error_output("")
+    assert is_error_output([])
+    assert is_error_output([{"error": "파싱 실패"}])
+    assert is_error_output('{"error": "축제를 찾을 수 없습니다."}')
+    assert is_error_output("오류: LLM 호출 실패")
+    assert is_error_output("죄송합니다. 마케팅 전략을 생성하는 중 오류가 발생했습니다: x")
+
+
+def test_usable_outputs():
+    assert not is_error_output([{"축제명": "강릉커피축제"}])
+    assert not is_error_output(["강릉커피축제", "광주김치축제"])  # dict 가 아닌 목록도 정상 결과
+    assert not is_error_output('{"축제명": "강릉커피축제"}')
+    assert not is_error_output("### 🎈 강릉커피축제 맞춤형 마케팅 전략")
@@ -1,15 +1,25 @@
 # tools/festival_recommender.py
 
 from langchain_core.tools import tool
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Literal
 
 import config
 from modules.filtering import FestivalRecommender
+from modules.knowledge_base import get_embedding_model
+from modules.recommendation_cache import get_recommendation_cache, build_profile_signature, get_store_name
+from modules.tool_events import publish_tool_event, festivals_recommended_from_results
+from utils.tracing import span
 
 logger = config.get_logger(__name__)
 
 @tool
-def recommend_festivals(user_query: str, store_profile: str) -> List[Dict[str, Any]]:
+def recommend_festivals(
+    user_query: str,
+    store_profile: str,
+    scoring_mode: Optional[Literal["llm", "rule"]] = None,
+    format_mode: Optional[Literal["llm", "template", "hybrid"]] = None,
+    use_cache: bool = True,
+) -> List[Dict[str, Any]]:
     """
     (도구) 사용자의 질문과 가게 프로필을 바탕으로 맞춤형 축제를 추천하는
     [하이브리드 5단계 파이프라인]을 실행합니다.
@@ -20,11 +30,51 @@ def recommend_festivals(user_query: str, store_profile: str) -> List[Dict[str, A
     5. 최종 답변 포맷팅 (LLM 기반)
     
     이 도구는 '축제 추천해줘'와 같은 요청 시 단독으로 사용되어야 합니다.
+    scoring_mode: 3단계 평가 방식 ("llm" 또는 "rule"). 지정하지 않으면 기본 설정을 따릅니다.
+    format_mode: 5단계 답변 포맷팅 방식 ("llm", "template", "hybrid"). 지정하지 않으면 기본 설정을 따릅니다.
+    use_cache: False 이면 유사 질문 캐시를 사용하지 않고 파이프라인을 새로 실행합니다.
+    추천 결과는 FestivalsRecommended 이벤트(축제 ID, 점수)로도 발행됩니다. (modules/tool_events.py)
     """
     logger.info(f"--- [Tool] (신규) 하이브리드 축제 추천 파이프라인 시작 (Query: {user_query[:30]}...) ---")
+
+    # 같은 상권/업종 가게의 유사 질문은 시맨틱 캐시에서 재사용
+    cache, signature, query_embedding = None, None, None
+    store_name = get_store_name(store_profile)
+    if use_cache and config.FESTIVAL_CACHE_ENABLED:
+        try:
+            embeddings = get_embedding_model()
+            if embeddings is not None:
+                cache = get_recommendation_cache()
+                signature = build_profile_signature(
+                    store_profile,
+                    scoring_mode=scoring_mode or config.FESTIVAL_DYNAMIC_SCORING_MODE,
+                    format_mode=format_mode or config.FESTIVAL_FORMAT_MODE,
+                )
+                with span("recommend.semantic_cache") as cache_span:
+                    query_embedding = embeddings.embed_query(user_query)
+                    cached = cache.lookup(signature, query_embedding, store_name=store_name)
+                    cache_span.set(cache_hit=cached is not None)
+                if cached is not None:
+                    _publish_recommendation(cached)
+                    return cached
+        except Exception as e:
+            logger.warning(f"--- [Tool WARNING] 시맨틱 캐시 조회 실패, 파이프라인 실행: {e} ---")
+            cache = None
     
     # 4번 제안: 파이프라인 클래스를 인스턴스화하고 실행
-    pipeline = FestivalRecommender(store_profile, user_query)
+    pipeline = FestivalRecommender(store_profile, user_query, scoring_mode=scoring_mode, format_mode=format_mode)
     
     # .run() 메서드가 모든 예외처리를 포함
-    return pipeline.run()
\ No newline at end of file
+    results = pipeline.run()
+
+    if cache is not None and results and isinstance(results[0], dict) and "error" not in results[0]:
+        cache.store(signature, query_embedding, results, store_name=store_name)
+
+    _publish_recommendation(results)
+    return results
+
+
+def _publish_recommendation(results: List[Dict[str, Any]]):
+    event = festivals_recommended_from_results(results)
+    if event is not None:
+        publish_tool_event(event)
@@ -9,11 +9,21 @@ from langchain_core.tools import tool
 import config
 from modules.llm_provider import get_llm
 from modules.knowledge_base import load_marketing_vectorstore
+from modules.profile_utils import fit_profile_to_budget, parse_store_profile
+from utils.token_utils import budget_prompt_section, fit_json_to_budget
+from utils.tracing import span
 
 from tools.profile_analyzer import get_festival_profile_by_name
+from tools.tool_cache import invoke_tool_cached
 
 logger = config.get_logger(__name__)
 
+# 축제 프로필 예산 적용 시 제외하지 않는 항목 (그 외 연도별 방문자 / 소비 통계는 뒤에서부터 제외)
+FESTIVAL_PROFILE_REQUIRED_KEYS = (
+    '축제명', '지역', '소개', '2025_기간', '키워드', '홈페이지',
+    '주요성별', '주요연령대', '주요고객층', '주요방문자', '축제인기', '축제인기도', '인기도_점수',
+)
+
 
 @tool
 def search_contextual_marketing_strategy(user_query: str, store_profile: str) -> str:
@@ -29,28 +39,32 @@ def search_contextual_marketing_strategy(user_query: str, store_profile: str) ->
             raise RuntimeError("마케팅 Retriever가 로드되지 않았습니다.")
 
         # 1. 컨텍스트를 고려한 검색 쿼리 생성
-        try:
-            profile_dict = json.loads(store_profile)
+        store_profile = fit_profile_to_budget(store_profile)
+        profile_dict = parse_store_profile(store_profile)
+        if profile_dict:
             profile_for_query = (
                 f"가게 위치: {profile_dict.get('주소', '알 수 없음')}\n"
                 f"가게 업종: {profile_dict.get('업종', '알 수 없음')}\n"
-                f"핵심 고객: {profile_dict.get('자동추출특징', {}).get('핵심고객', '알 수 없음')}"
+                f"핵심 고객: {(profile_dict.get('자동추출특징') or {}).get('핵심고객', '알 수 없음')}"
             )
-        except Exception:
+        else:
             profile_for_query = store_profile 
 
         contextual_query = f"[가게 정보:\n{profile_for_query}\n]에 대한 [질문: {user_query}]"
         logger.info(f"--- [Tool] RAG 검색 쿼리: {contextual_query} ---")
         
         # 2. Vector DB 검색
-        docs = retriever.invoke(contextual_query)
+        with span("vector_search", index="marketing"):
+            docs = retriever.invoke(contextual_query)
 
         if not docs:
             logger.warning("--- [Tool] RAG 검색 결과 없음 ---")
             return "죄송합니다. 사장님의 가게 프로필과 질문에 맞는 마케팅 전략을 찾지 못했습니다. 가게의 특징을 조금 더 알려주시거나, 다른 질문을 시도해보시겠어요?"
 
         # 3. LLM에 전달할 컨텍스트 포맷팅
-        context = "\n\n---\n\n".join([doc.page_content for doc in docs])
+        context = budget_prompt_section(
+            "\n\n---\n\n".join([doc.page_content for doc in docs]), "marketing_context"
+        )
         logger.info("--- [Tool] RAG 컨텍스트 생성 완료 ---")
 
         # 4. LLM을 통한 답변 재구성
@@ -118,7 +132,8 @@ def create_festival_specific_marketing_strategy(festival_name: str, store_profil
     
     try:
         # 1. (RAG 1) 축제 정보 가져오기 (기존 도구 재사용)
-        festival_profile_str = get_festival_profile_by_name.invoke({"festival_name": festival_name})
+        store_profile = fit_profile_to_budget(store_profile)
+        festival_profile_str = invoke_tool_cached(get_festival_profile_by_name, {"festival_name": festival_name})
         
         if "오류" in festival_profile_str or "찾을 수 없음" in festival_profile_str:
             logger.warning(f"--- [Tool WARNING] 축제 프로필을 찾지 못함: {festival_name} ---")
@@ -136,17 +151,35 @@ def create_festival_specific_marketing_strategy(festival_name: str, store_profil
         가게 프로필: {store_profile}
         질문: 위 가게가 위 축제 기간 동안 할 수 있는 최고의 마케팅 전략은?
         """
-        marketing_docs = marketing_retriever.invoke(combined_query)
+        with span("vector_search", index="marketing"):
+            marketing_docs = marketing_retriever.invoke(combined_query)
         
         if not marketing_docs:
             marketing_context = "참고할 만한 마케팅 전략을 찾지 못했습니다."
             logger.warning("--- [Tool] (RAG 2) 마케팅 전략 검색 결과 없음 ---")
         else:
-            marketing_context = "\n\n---\n\n".join([doc.page_content for doc in marketing_docs])
+            marketing_context = budget_prompt_section(
+                "\n\n---\n\n".join([doc.page_content for doc in marketing_docs]), "marketing_context"
+            )
             logger.info(f"--- [Tool] (RAG 2) 마케팅 전략 컨텍스트 {len(marketing_docs)}개 확보 ---")
 
         # 3. LLM을 통한 최종 전략 생성
         llm = get_llm(temperature=0.5)
+
+        # 예산 초과 시 '소개' / '키워드'를 먼저 줄이고, 그래도 넘으면 연도별 통계 등 부가 항목을 제외
+        try:
+            festival_profile = json.loads(festival_profile_str)
+        except (TypeError, ValueError):
+            festival_profile = None
+        if isinstance(festival_profile, dict):
+            festival_title = festival_profile.get('축제명', festival_name)
+            festival_profile_str = fit_json_to_budget(
+                festival_profile, "festival_profile",
+                text_fields=("소개", "키워드"), required_keys=FESTIVAL_PROFILE_REQUIRED_KEYS,
+            )
+        else:
+            festival_title = festival_name
+            festival_profile_str = budget_prompt_section(festival_profile_str, "festival_profile")
         
         # --- (사용자 요청) 프롬프트 원본 유지 ---
         prompt = f"""
@@ -174,7 +207,7 @@ def create_festival_specific_marketing_strategy(festival_name: str, store_profil
         6.  **취소선 금지**: 절대로 `~~text~~`와 같은 취소선 마크다운을 사용하지 마세요.
 
         [출력 형식]
-        ### 🎈 {json.loads(festival_profile_str).get('축제명', festival_name)} 맞춤형 마케팅 전략
+        ### 🎈 {festival_title} 맞춤형 마케팅 전략
 
         **1. (전략 아이디어 제목)**
         * **전략 개요:** (가게의 어떤 특징과 축제의 어떤 특징을 연관지었는지 설명)
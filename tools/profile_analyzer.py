@@ -10,8 +10,10 @@ from langchain_core.messages import HumanMessage
 
 import config
 from modules.llm_provider import get_llm
+from modules.profile_utils import fit_profile_to_budget
 # filtering 모듈에서 날짜 예측 함수 가져오기
 from modules.filtering import FestivalRecommender
+from tools.tool_cache import invoke_tool_cached
 
 logger = config.get_logger(__name__)
 
@@ -81,6 +83,7 @@ def analyze_merchant_profile(store_profile: str) -> str:
     logger.info("--- [Tool] '가맹점 프로필 분석' 도구 호출 ---")
     try:
         llm = get_llm(temperature=0.3)
+        store_profile = fit_profile_to_budget(store_profile)
         prompt = f"""
         당신은 최고의 상권 분석 전문가입니다.
         아래 [가게 프로필] 데이터를 바탕으로, 이 가게의 [강점], [약점], [기회 요인]을
@@ -134,7 +137,7 @@ def analyze_festival_profile(festival_name: str) -> str:
     logger.info(f"--- [Tool] '축제 프로필 분석' 도구 호출 (대상: {festival_name}) ---")
     try:
         # 1. Tool 1 호출
-        profile_json = get_festival_profile_by_name.invoke(festival_name)
+        profile_json = invoke_tool_cached(get_festival_profile_by_name, festival_name)
         
         profile_dict = json.loads(profile_json)
 
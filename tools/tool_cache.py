@@ -0,0 +1,237 @@
+# tools/tool_cache.py
+
+import copy
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import List, Dict, Any, Optional
+
+from langchain_core.tools import BaseTool, StructuredTool
+
+import config
+from modules.tool_events import collect_tool_events, publish_tool_event
+from utils.tracing import span
+
+logger = config.get_logger(__name__)
+
+# 현재 실행 중인 상담 세션의 도구 결과 캐시 (도구 내부의 하위 호출에서도 같은 캐시를 사용하기 위함)
+_active_tool_cache: ContextVar[Optional["ToolResultCache"]] = ContextVar("active_tool_cache", default=None)
+
+
+def _canonical_value(key: str, value: Any) -> Any:
+    """store_profile 처럼 JSON 문자열로 전달되는 인자는 파싱 후 키 정렬하여 표현 차이를 없앱니다."""
+    if key == "store_profile" and isinstance(value, str):
+        try:
+            return json.loads(value)
+        except ValueError:
+            return value.strip()
+    if isinstance(value, str):
+        return value.strip()
+    return value
+
+
+def build_tool_cache_key(tool_name: str, tool_args: Dict[str, Any]) -> str:
+    """(도구 이름, 정규화된 인자) 로 캐시 키를 생성합니다."""
+    canonical = {k: _canonical_value(k, v) for k, v in tool_args.items() if v is not None}
+    payload = json.dumps(canonical, ensure_ascii=False, sort_keys=True, default=str)
+    return f"{tool_name}:{hashlib.sha1(payload.encode('utf-8')).hexdigest()}"
+
+
+def is_error_output(output: Any) -> bool:
+    """
+    각 도구의 오류 반환 형식 기준으로 오류 결과인지 판단합니다. (도구 결과 판별의 단일 기준)
+    오류 결과는 캐시하지 않고, 오케스트레이터의 라우터 / 재시도 답변 합성에서는 사용하지 않으며,
+    벤치마크에서는 실패한 도구 호출로 집계합니다.
+    """
+    if not output:
+        return True
+    if isinstance(output, list):
+        return isinstance(output[0], dict) and "error" in output[0]
+    if isinstance(output, str):
+        stripped = output.strip()
+        if stripped.startswith("{"):
+            try:
+                return "error" in json.loads(stripped)
+            except ValueError:
+                return False
+        return stripped.startswith(("오류", "죄송합니다")) or "오류가 발생했습니다" in stripped
+    return False
+
+
+class ToolResultCache:
+    """
+    상담 세션 단위의 도구 결과 메모 캐시.
+    도구별 TTL / 최대 개수는 config.TOOL_CACHE_SETTINGS 를 따르며, 설정이 없는 도구는 캐시하지 않습니다.
+    결과와 함께 실행 중 발행된 도구 이벤트도 저장하여, 캐시 적중 시 같은 이벤트를 다시 발행합니다.
+    """
+
+    def __init__(self, settings: Optional[Dict[str, Dict[str, float]]] = None):
+        self.settings = settings if settings is not None else config.TOOL_CACHE_SETTINGS
+        # tool_name -> OrderedDict(key -> (stored_at, result, events))  (LRU)
+        self._entries: Dict[str, "OrderedDict[str, tuple]"] = {}
+        # key -> Future (백그라운드 프리페치 등으로 실행 중인 호출)
+        self._pending: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0, "skipped_errors": 0, "pending_waits": 0}
+
+    def is_cacheable(self, tool_name: str) -> bool:
+        return tool_name in self.settings
+
+    def get(self, tool_name: str, key: str) -> Any:
+        """캐시된 결과(복사본)를 반환합니다. 없거나 만료되었으면 None."""
+        setting = self.settings.get(tool_name)
+        if setting is None:
+            return None
+        with self._lock:
+            entries = self._entries.get(tool_name)
+            entry = entries.get(key) if entries else None
+            if entry is None:
+                self.stats["misses"] += 1
+                return None
+            if time.time() - entry[0] > setting["ttl_seconds"]:
+                del entries[key]
+                self.stats["evictions"] += 1
+                self.stats["misses"] += 1
+                return None
+            entries.move_to_end(key)
+            self.stats["hits"] += 1
+            return copy.deepcopy(entry[1])
+
+    def get_events(self, tool_name: str, key: str) -> tuple:
+        """저장된 결과와 함께 기록된 도구 이벤트 (없으면 빈 튜플)"""
+        with self._lock:
+            entries = self._entries.get(tool_name)
+            entry = entries.get(key) if entries else None
+        return entry[2] if entry is not None else ()
+
+    def put(self, tool_name: str, key: str, result: Any, events: Optional[List[Any]] = None):
+        """결과를 저장합니다. 도구별 최대 개수를 넘으면 가장 오래 사용되지 않은 항목부터 제거합니다."""
+        setting = self.settings.get(tool_name)
+        if setting is None:
+            return
+        if is_error_output(result):
+            self.stats["skipped_errors"] += 1
+            return
+        with self._lock:
+            entries = self._entries.setdefault(tool_name, OrderedDict())
+            entries[key] = (time.time(), copy.deepcopy(result), tuple(events or ()))
+            entries.move_to_end(key)
+            while len(entries) > int(setting["max_entries"]):
+                entries.popitem(last=False)
+                self.stats["evictions"] += 1
+            self.stats["stores"] += 1
+
+    def register_pending(self, key: str, future: Future):
+        """실행 중인 호출을 등록합니다. 같은 키의 요청은 새로 실행하지 않고 결과를 기다립니다."""
+        with self._lock:
+            self._pending[key] = future
+        future.add_done_callback(lambda _f: self._discard_pending(key, _f))
+
+    def _discard_pending(self, key: str, future: Future):
+        with self._lock:
+            if self._pending.get(key) is future:
+                del self._pending[key]
+
+    def wait_pending(self, key: str, timeout: float) -> Any:
+        """같은 키로 실행 중인 호출이 있으면 최대 timeout 초 동안 결과를 기다립니다. 없거나 실패하면 None."""
+        with self._lock:
+            future = self._pending.get(key)
+        if future is None or future.cancelled():
+            return None
+        try:
+            result = future.result(timeout=timeout)
+        except Exception:
+            return None
+        self.stats["pending_waits"] += 1
+        return None if is_error_output(result) else copy.deepcopy(result)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+@contextmanager
+def activate_tool_cache(cache: Optional[ToolResultCache]):
+    """with 블록 안에서 실행되는 도구 호출이 주어진 세션 캐시를 사용하도록 설정합니다."""
+    token = _active_tool_cache.set(cache)
+    try:
+        yield cache
+    finally:
+        _active_tool_cache.reset(token)
+
+
+def get_active_tool_cache() -> Optional[ToolResultCache]:
+    return _active_tool_cache.get()
+
+
+def _normalize_tool_input(tool: BaseTool, tool_input: Any) -> Dict[str, Any]:
+    """문자열 단일 입력을 {첫 번째 인자명: 값} 형태로 변환합니다."""
+    if isinstance(tool_input, dict):
+        return dict(tool_input)
+    return {next(iter(tool.args)): tool_input}
+
+
+def invoke_tool_cached(tool: BaseTool, tool_input: Any) -> Any:
+    """
+    활성화된 세션 캐시가 있으면 (도구 이름, 정규화된 인자) 기준으로 결과를 재사용하고,
+    없으면 도구를 그대로 실행합니다. 실행 구간은 'tool' span 으로 기록됩니다. (cache_hit 포함)
+    """
+    with span("tool", tool=tool.name) as tool_span:
+        cache = _active_tool_cache.get()
+        if cache is None or not cache.is_cacheable(tool.name):
+            tool_span.set(cache_hit=False)
+            return tool.invoke(tool_input)
+
+        tool_args = _normalize_tool_input(tool, tool_input)
+        key = build_tool_cache_key(tool.name, tool_args)
+        cached = cache.get(tool.name, key)
+        if cached is not None:
+            logger.info(f"--- [Tool Cache] HIT ({tool.name}) ---")
+            tool_span.set(cache_hit=True, cache_source="memo")
+            _republish_events(cache, tool.name, key)
+            return cached
+
+        pending = cache.wait_pending(key, timeout=config.TOOL_CACHE_PENDING_WAIT_SECONDS)
+        if pending is not None:
+            logger.info(f"--- [Tool Cache] 실행 중인 호출 결과 재사용 ({tool.name}) ---")
+            tool_span.set(cache_hit=True, cache_source="pending")
+            _republish_events(cache, tool.name, key)
+            return pending
+
+        tool_span.set(cache_hit=False)
+        with collect_tool_events() as events:
+            result = tool.invoke(tool_args)
+        cache.put(tool.name, key, result, events=events.events())
+        return result
+
+
+def _republish_events(cache: ToolResultCache, tool_name: str, key: str):
+    for event in cache.get_events(tool_name, key):
+        publish_tool_event(event)
+
+
+def wrap_tools_with_cache(tools: List[BaseTool]) -> List[BaseTool]:
+    """
+    에이전트에 등록할 도구들을 세션 캐시를 거치는 래퍼로 감쌉니다.
+    이름/설명/입력 스키마는 원본과 동일하므로 에이전트의 도구 선택에는 영향이 없습니다.
+    """
+    def _make_cached_func(original: BaseTool):
+        def _run(**kwargs):
+            return invoke_tool_cached(original, kwargs)
+        return _run
+
+    wrapped = []
+    for original in tools:
+        wrapped.append(StructuredTool.from_function(
+            func=_make_cached_func(original),
+            name=original.name,
+            description=original.description,
+            args_schema=original.args_schema,
+            return_direct=original.return_direct,
+        ))
+    return wrapped
@@ -0,0 +1,132 @@
+# utils/hangul_search.py
+
+from typing import List, Optional, Sequence, Tuple
+
+import config
+
+_HANGUL_BASE = 0xAC00
+_HANGUL_LAST = 0xD7A3
+
+# 호환용 자모 (키보드로 입력되는 자모와 같은 코드) - 겹자모는 입력 순서대로 분해
+_CHOSEONG = "ㄱㄲㄴㄷㄸㄹㅁㅂㅃㅅㅆㅇㅈㅉㅊㅋㅌㅍㅎ"
+_JUNGSEONG = ["ㅏ", "ㅐ", "ㅑ", "ㅒ", "ㅓ", "ㅔ", "ㅕ", "ㅖ", "ㅗ", "ㅗㅏ", "ㅗㅐ", "ㅗㅣ", "ㅛ", "ㅜ", "ㅜㅓ", "ㅜㅔ", "ㅜㅣ", "ㅠ", "ㅡ", "ㅡㅣ", "ㅣ"]
+_JONGSEONG = ["", "ㄱ", "ㄲ", "ㄱㅅ", "ㄴ", "ㄴㅈ", "ㄴㅎ", "ㄷ", "ㄹ", "ㄹㄱ", "ㄹㅁ", "ㄹㅂ", "ㄹㅅ", "ㄹㅌ", "ㄹㅍ", "ㄹㅎ", "ㅁ", "ㅂ", "ㅂㅅ", "ㅅ", "ㅆ", "ㅇ", "ㅈ", "ㅊ", "ㅋ", "ㅌ", "ㅍ", "ㅎ"]
+_CONSONANTS = set("ㄱㄲㄳㄴㄵㄶㄷㄸㄹㄺㄻㄼㄽㄾㄿㅀㅁㅂㅃㅄㅅㅆㅇㅈㅉㅊㅋㅌㅍㅎ")
+
+
+def normalize(text: Optional[str]) -> str:
+    """소문자로 바꾸고 공백을 제거합니다."""
+    return "".join(str(text or "").lower().split())
+
+
+def decompose(text: Optional[str]) -> str:
+    """
+    한글 음절을 자모 단위로 분해합니다. ('카페' → 'ㅋㅏㅍㅔ', '닭' → 'ㄷㅏㄹㄱ')
+    입력 중인 글자('캎' = '카' + 'ㅍ')도 완성된 이름의 앞부분과 일치하게 됩니다.
+    """
+    parts = []
+    for ch in normalize(text):
+        code = ord(ch)
+        if _HANGUL_BASE <= code <= _HANGUL_LAST:
+            offset = code - _HANGUL_BASE
+            parts.append(_CHOSEONG[offset // 588])
+            parts.append(_JUNGSEONG[(offset % 588) // 28])
+            parts.append(_JONGSEONG[offset % 28])
+        else:
+            parts.append(ch)
+    return "".join(parts)
+
+
+def choseong(text: Optional[str]) -> str:
+    """초성 문자열 ('성수커피' → 'ㅅㅅㅋㅍ'). 한글이 아닌 문자는 그대로 둡니다."""
+    parts = []
+    for ch in normalize(text):
+        code = ord(ch)
+        if _HANGUL_BASE <= code <= _HANGUL_LAST:
+            parts.append(_CHOSEONG[(code - _HANGUL_BASE) // 588])
+        else:
+            parts.append(ch)
+    return "".join(parts)
+
+
+def is_choseong_query(text: str) -> bool:
+    """자음만으로 이루어진 검색어인지 ('ㅅㅅㅋㅍ')"""
+    return bool(text) and all(ch in _CONSONANTS for ch in text)
+
+
+def has_hangul(text: str) -> bool:
+    """한글 음절 또는 자모를 포함하는지"""
+    return any(_HANGUL_BASE <= ord(ch) <= _HANGUL_LAST or 0x3131 <= ord(ch) <= 0x3163 for ch in text)
+
+
+def _subsequence_score(query: str, text: str) -> float:
+    """query 의 글자가 text 에 순서대로 모두 나오면 (query 길이 / 일치 구간 길이), 아니면 0"""
+    start = pos = text.find(query[0])
+    if start < 0:
+        return 0.0
+    for ch in query[1:]:
+        pos = text.find(ch, pos + 1)
+        if pos < 0:
+            return 0.0
+    return len(query) / (pos - start + 1)
+
+
+class HangulMatcher:
+    """
+    한글 자모 단위 퍼지 검색기. (네트워크 / 외부 라이브러리 없이 메모리에서 필터링)
+    검색어를 공백으로 나눈 모든 토큰이 일치해야 하며, 토큰별 점수의 합으로 정렬합니다.
+    - 원문 부분 문자열 (접두 일치 가산)
+    - 자모 부분 문자열: 입력 중인 글자 ('캎' → '카페')
+    - 초성 검색 ('ㅅㅅㅋㅍ' → '성수커피', 자음만 입력한 검색어는 초성열에서만 일치)
+    - 자모 순서 일치 (중간 글자 누락 등, 일치 구간이 짧을수록 높은 점수, 한글 검색어만)
+    """
+
+    def __init__(self, texts: Sequence[str], min_fuzzy_score: Optional[float] = None):
+        self.texts = [normalize(t) for t in texts]
+        self.jamo = [decompose(t) for t in texts]
+        self.choseong = [choseong(t) for t in texts]
+        self.min_fuzzy_score = min_fuzzy_score if min_fuzzy_score is not None else config.HANGUL_SEARCH_MIN_FUZZY_SCORE
+
+    def __len__(self) -> int:
+        return len(self.texts)
+
+    def _token_score(self, i: int, token: str, token_jamo: str, choseong_only: bool, fuzzy: bool) -> float:
+        # 각 단계에서 텍스트 맨 앞(가맹점명 시작)과 일치하면 가산
+        if choseong_only:
+            # 자음만 입력한 검색어는 초성열에서만 찾음
+            # (자모 부분 문자열로 찾으면 'ㅁㄱ' 이 '삼겹살'(ㅅㅏㅁㄱㅕㅂ...)처럼 음절 경계를 넘어 일치)
+            pos = self.choseong[i].find(token)
+            return 0.0 if pos < 0 else (1.75 if pos == 0 else 1.5)
+        pos = self.texts[i].find(token)
+        if pos >= 0:
+            return 4.0 if pos == 0 else 3.0
+        pos = self.jamo[i].find(token_jamo)
+        if pos >= 0:
+            return 2.5 if pos == 0 else 2.0
+        if not fuzzy:
+            return 0.0
+        score = _subsequence_score(token_jamo, self.jamo[i])
+        return score if score >= self.min_fuzzy_score else 0.0
+
+    def search(self, query: str, limit: Optional[int] = None) -> List[Tuple[int, float]]:
+        """(텍스트 인덱스, 점수) 목록을 점수 내림차순으로 반환합니다. 검색어가 비어 있으면 빈 목록."""
+        tokens = [normalize(t) for t in str(query or "").split()]
+        tokens = [t for t in tokens if t]
+        if not tokens:
+            return []
+        # 자모 순서 일치는 한글 검색어에만 적용 (영문 / 숫자 ID 는 부분 문자열 일치만)
+        prepared = [(t, decompose(t), is_choseong_query(t), has_hangul(t)) for t in tokens]
+
+        matches = []
+        for i in range(len(self.texts)):
+            total = 0.0
+            for token, token_jamo, choseong_only, fuzzy in prepared:
+                score = self._token_score(i, token, token_jamo, choseong_only, fuzzy)
+                if score <= 0:
+                    break
+                total += score
+            else:
+                matches.append((i, total))
+        # 같은 점수이면 짧은 텍스트(더 구체적인 일치) 우선, 그다음 원래 순서
+        matches.sort(key=lambda m: (-m[1], len(self.texts[m[0]]), m[0]))
+        return matches[:limit] if limit else matches
@@ -0,0 +1,119 @@
+# utils/token_utils.py
+
+import json
+import math
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+import config
+
+logger = config.get_logger(__name__)
+
+
+def estimate_tokens(text: Optional[str]) -> int:
+    """
+    텍스트의 토큰 수를 근사합니다. (네트워크 호출 없는 휴리스틱)
+    한글 등 비 ASCII 문자는 대략 문자당 CHARS_PER_TOKEN_NON_ASCII,
+    ASCII 문자는 CHARS_PER_TOKEN_ASCII 글자당 1토큰으로 계산합니다.
+    """
+    if not text:
+        return 0
+    text = str(text)
+    ascii_chars = sum(1 for ch in text if ord(ch) < 128)
+    non_ascii_chars = len(text) - ascii_chars
+    return math.ceil(
+        ascii_chars / config.TOKEN_ESTIMATE_CHARS_PER_TOKEN_ASCII
+        + non_ascii_chars / config.TOKEN_ESTIMATE_CHARS_PER_TOKEN_NON_ASCII
+    )
+
+
+def truncate_to_token_budget(text: Optional[str], max_tokens: int, suffix: str = " ...(생략)") -> str:
+    """
+    텍스트가 max_tokens(추정치)를 넘으면 예산 안에 들어오도록 뒤를 잘라냅니다.
+    """
+    if not text:
+        return text or ""
+    if max_tokens <= 0 or estimate_tokens(text) <= max_tokens:
+        return text
+
+    # 이진 탐색으로 예산 내 최대 길이를 찾음
+    budget = max(max_tokens - estimate_tokens(suffix), 0)
+    low, high = 0, len(text)
+    while low < high:
+        mid = (low + high + 1) // 2
+        if estimate_tokens(text[:mid]) <= budget:
+            low = mid
+        else:
+            high = mid - 1
+    return text[:low].rstrip() + suffix
+
+
+def budget_prompt_section(text: Optional[str], section: str) -> str:
+    """
+    config.PROMPT_SECTION_TOKEN_BUDGETS 에 정의된 프롬프트 섹션별 토큰 예산을 적용합니다.
+    예산이 정의되지 않은 섹션은 그대로 반환합니다.
+    """
+    max_tokens = config.PROMPT_SECTION_TOKEN_BUDGETS.get(section)
+    if max_tokens is None:
+        return text or ""
+    return truncate_to_token_budget(text, max_tokens)
+
+
+def _dump_compact_json(data: Any) -> str:
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+
+
+def _trim_text_fields(record: Dict[str, Any], text_fields: Sequence[str], max_tokens: int) -> Dict[str, Any]:
+    return {
+        key: truncate_to_token_budget(value, max_tokens) if key in text_fields and isinstance(value, str) else value
+        for key, value in record.items()
+    }
+
+
+def fit_json_to_budget(
+    data: Union[Dict[str, Any], List[Dict[str, Any]]],
+    section: str,
+    text_fields: Sequence[str] = (),
+    required_keys: Sequence[str] = (),
+) -> str:
+    """
+    레코드(딕셔너리) 또는 레코드 목록을 압축 JSON 문자열로 만들고 섹션 토큰 예산을 적용합니다.
+    직렬화된 문자열을 자르면 레코드가 중간에 끊기므로, 직렬화 전에 다음 순서로 줄입니다.
+    1) 자유 텍스트 필드(text_fields, 예: '소개')를 레코드마다 점점 짧게 자름
+    2) 목록이면 뒤쪽 레코드부터 통째로 제외 (최소 1개 유지),
+       딕셔너리면 required_keys 가 아닌 키를 뒤에서부터 제외
+    결과는 항상 유효한 JSON 이며, 1개 레코드 / 필수 키만으로도 예산을 넘으면 그대로 반환합니다.
+    """
+    max_tokens = config.PROMPT_SECTION_TOKEN_BUDGETS.get(section)
+    text = _dump_compact_json(data)
+    if max_tokens is None or estimate_tokens(text) <= max_tokens:
+        return text
+
+    is_list = isinstance(data, list)
+    records = data if is_list else [data]
+
+    # 1) 자유 텍스트 필드: 가장 긴 필드 길이에서 시작해 절반씩 줄임
+    field_tokens = [
+        estimate_tokens(value) for record in records for key, value in record.items()
+        if key in text_fields and isinstance(value, str)
+    ]
+    limit = max(field_tokens, default=0)
+    while estimate_tokens(text) > max_tokens and limit > config.PROMPT_TEXT_FIELD_MIN_TOKENS:
+        limit = max(limit // 2, config.PROMPT_TEXT_FIELD_MIN_TOKENS)
+        records = [_trim_text_fields(record, text_fields, limit) for record in (data if is_list else [data])]
+        text = _dump_compact_json(records if is_list else records[0])
+
+    # 2) 통째로 제외: 목록은 뒤쪽 레코드, 딕셔너리는 필수가 아닌 키
+    if is_list:
+        while estimate_tokens(text) > max_tokens and len(records) > 1:
+            records = records[:-1]
+            text = _dump_compact_json(records)
+        if len(records) < len(data):
+            logger.warning(f"--- [Token Budget] '{section}' 예산 초과로 레코드 {len(data)}개 중 {len(records)}개만 사용 ---")
+    else:
+        record = dict(records[0])
+        for key in reversed([k for k in record if k not in required_keys]):
+            if estimate_tokens(text) <= max_tokens:
+                break
+            del record[key]
+            text = _dump_compact_json(record)
+    return text
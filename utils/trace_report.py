@@ -0,0 +1,154 @@
+# utils/trace_report.py
+"""
+utils/tracing.py 가 기록한 span(JSONL)을 단계별로 집계합니다.
+
+- 단계: span 이름 (tool / prefetch span 은 도구 이름, vector_search 는 인덱스 이름을 붙여 구분)
+- 지표: 호출 수, p50 / p95 / 최대 / 합계 (ms), 에이전트 턴 전체 시간 대비 비중, 토큰 합계, 캐시 적중률
+- --slowest N: 가장 느린 에이전트 턴 N개의 span 트리 출력
+
+실행 (프로젝트 루트에서):
+    python -m utils.trace_report
+    python -m utils.trace_report --path logs/traces.jsonl --slowest 3
+"""
+
+import argparse
+import json
+from collections import defaultdict
+from pathlib import Path
+from typing import List, Dict, Any, Optional
+
+import numpy as np
+
+import config
+
+STAGE_QUALIFIERS = {"tool": "tool", "prefetch": "tool", "vector_search": "index"}
+
+
+def _span_files(path) -> List[Path]:
+    """크기 제한으로 교체된 이전 파일(traces.jsonl.N ... .1)을 오래된 순으로, 마지막에 현재 파일"""
+    path = Path(path)
+    backups = [Path(f"{path}.{i}") for i in range(config.TRACE_BACKUP_COUNT, 0, -1)]
+    return [p for p in backups + [path] if p.exists()]
+
+
+def load_spans(path, since: Optional[float] = None) -> List[Dict[str, Any]]:
+    spans = []
+    for span_file in _span_files(path):
+        with open(span_file, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if since is not None and record.get("start_time", 0) < since:
+                    continue
+                spans.append(record)
+    return spans
+
+
+def stage_name(record: Dict[str, Any]) -> str:
+    qualifier = STAGE_QUALIFIERS.get(record["name"])
+    value = (record.get("attributes") or {}).get(qualifier) if qualifier else None
+    return f"{record['name']}:{value}" if value else record["name"]
+
+
+def aggregate(spans: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """단계별 소요 시간 / 토큰 / 캐시 적중 통계를 계산합니다."""
+    groups: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+    for record in spans:
+        if record.get("duration_ms") is not None:
+            groups[stage_name(record)].append(record)
+
+    turn_total = sum(r["duration_ms"] for r in groups.get("agent_turn", []))
+    report = {}
+    for stage, records in groups.items():
+        durations = np.array([r["duration_ms"] for r in records])
+        attributes = [r.get("attributes") or {} for r in records]
+        cache_flags = [a["cache_hit"] for a in attributes if "cache_hit" in a]
+        report[stage] = {
+            "count": len(records),
+            "p50_ms": float(np.percentile(durations, 50)),
+            "p95_ms": float(np.percentile(durations, 95)),
+            "max_ms": float(durations.max()),
+            "total_ms": float(durations.sum()),
+            "share_of_turns": float(durations.sum() / turn_total) if turn_total else None,
+            "errors": sum(1 for r in records if r.get("status") == "error"),
+            "input_tokens": sum(a.get("input_tokens", 0) for a in attributes),
+            "output_tokens": sum(a.get("output_tokens", 0) for a in attributes),
+            "cache_hit_rate": (sum(cache_flags) / len(cache_flags)) if cache_flags else None,
+        }
+    return dict(sorted(report.items(), key=lambda item: item[1]["total_ms"], reverse=True))
+
+
+def format_trace_tree(spans: List[Dict[str, Any]], trace_id: str) -> str:
+    """하나의 trace 를 시작 시간 순 트리로 출력합니다."""
+    records = [r for r in spans if r.get("trace_id") == trace_id]
+    children: Dict[Optional[str], List[Dict[str, Any]]] = defaultdict(list)
+    span_ids = {r["span_id"] for r in records}
+    for record in records:
+        parent = record.get("parent_span_id")
+        children[parent if parent in span_ids else None].append(record)
+
+    lines = []
+
+    def _walk(parent_id: Optional[str], depth: int):
+        for record in sorted(children.get(parent_id, []), key=lambda r: r.get("start_time", 0)):
+            attrs = record.get("attributes") or {}
+            details = ", ".join(
+                f"{k}={attrs[k]}" for k in ("tool", "index", "cache_hit", "input_tokens", "output_tokens") if k in attrs
+            )
+            lines.append(
+                f"{'  ' * depth}- {record['name']:<30} {record['duration_ms']:>10.1f}ms"
+                + (f"  ({details})" if details else "")
+                + ("  [ERROR]" if record.get("status") == "error" else "")
+            )
+            _walk(record["span_id"], depth + 1)
+
+    _walk(None, 0)
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="추적 span(JSONL) 단계별 p50/p95 집계")
+    parser.add_argument("--path", type=str, default=str(config.TRACE_EXPORT_PATH), help="span JSONL 경로")
+    parser.add_argument("--since", type=float, default=None, help="이 시각(epoch 초) 이후의 span 만 집계")
+    parser.add_argument("--slowest", type=int, default=0, help="가장 느린 에이전트 턴 N개의 span 트리 출력")
+    parser.add_argument("--output", type=str, default=None, help="집계 결과 JSON 저장 경로")
+    args = parser.parse_args()
+
+    spans = load_spans(args.path, since=args.since)
+    if not spans:
+        print(f"span 이 없습니다: {args.path}")
+        return
+
+    report = aggregate(spans)
+    print(f"\n=== Trace Report: {len(spans)} spans ({args.path}) ===")
+    print(f"{'stage':<52} {'count':>6} {'p50(ms)':>10} {'p95(ms)':>10} {'max(ms)':>10} {'share':>7} {'tokens(in/out)':>16} {'cache':>6}")
+    for stage, stats in report.items():
+        share = f"{stats['share_of_turns'] * 100:.0f}%" if stats["share_of_turns"] is not None else "-"
+        tokens = f"{stats['input_tokens']}/{stats['output_tokens']}" if stats["input_tokens"] or stats["output_tokens"] else "-"
+        cache = f"{stats['cache_hit_rate'] * 100:.0f}%" if stats["cache_hit_rate"] is not None else "-"
+        print(
+            f"{stage:<52} {stats['count']:>6} {stats['p50_ms']:>10.1f} {stats['p95_ms']:>10.1f} "
+            f"{stats['max_ms']:>10.1f} {share:>7} {tokens:>16} {cache:>6}"
+        )
+
+    if args.slowest > 0:
+        turns = sorted(
+            (r for r in spans if r["name"] == "agent_turn" and r.get("duration_ms") is not None),
+            key=lambda r: r["duration_ms"], reverse=True,
+        )
+        for turn in turns[:args.slowest]:
+            print(f"\n--- trace {turn['trace_id']} ({turn['duration_ms']:.1f}ms) ---")
+            print(format_trace_tree(spans, turn["trace_id"]))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+# utils/tracing.py
+
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from logging.handlers import RotatingFileHandler
+from typing import Dict, Any, Optional, Iterator
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+import config
+
+logger = config.get_logger(__name__)
+
+# 현재 실행 중인 span (도구 / 파이프라인 단계 / LLM 호출의 부모 span 을 찾기 위함)
+_current_span: ContextVar[Optional["Span"]] = ContextVar("current_span", default=None)
+
+_export_lock = threading.Lock()
+_token_lock = threading.Lock()
+_exporter: Optional[RotatingFileHandler] = None
+
+
+class Span:
+    """
+    하나의 실행 구간. 필드 구성은 OpenTelemetry span 과 같으며
+    (trace_id / span_id / parent_span_id / name / start_time / duration_ms / status / attributes)
+    종료 시 config.TRACE_EXPORT_PATH 에 JSONL 한 줄로 기록됩니다. (크기 제한, _get_exporter)
+    """
+
+    __slots__ = ("name", "trace_id", "span_id", "parent", "start_time", "duration_ms", "status", "attributes")
+
+    def __init__(self, name: str, parent: Optional["Span"] = None, attributes: Optional[Dict[str, Any]] = None):
+        self.name = name
+        self.parent = parent
+        self.trace_id = parent.trace_id if parent else uuid.uuid4().hex
+        self.span_id = uuid.uuid4().hex[:16]
+        self.start_time = time.time()
+        self.duration_ms: Optional[float] = None
+        self.status = "ok"
+        self.attributes: Dict[str, Any] = dict(attributes or {})
+
+    def set(self, **attributes: Any):
+        self.attributes.update(attributes)
+
+    def add_tokens(self, input_tokens: int, output_tokens: int):
+        """이 span 과 모든 상위 span 에 LLM 토큰 사용량을 누적합니다."""
+        with _token_lock:
+            node = self
+            while node is not None:
+                node.attributes["input_tokens"] = node.attributes.get("input_tokens", 0) + input_tokens
+                node.attributes["output_tokens"] = node.attributes.get("output_tokens", 0) + output_tokens
+                node = node.parent
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_span_id": self.parent.span_id if self.parent else None,
+            "name": self.name,
+            "start_time": self.start_time,
+            "duration_ms": self.duration_ms,
+            "status": self.status,
+            "attributes": self.attributes,
+        }
+
+
+class _NoopSpan:
+    """추적이 꺼져 있을 때 span() 이 반환하는 빈 객체"""
+
+    def set(self, **attributes: Any):
+        pass
+
+    def add_tokens(self, input_tokens: int, output_tokens: int):
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+def _get_exporter() -> RotatingFileHandler:
+    """
+    span 기록용 파일 핸들러. 프로세스에서 한 번만 열어 재사용하며 (span 마다 파일을 다시 열지 않음),
+    파일이 config.TRACE_MAX_BYTES 를 넘으면 traces.jsonl.1 ... 로 교체합니다. (_export_lock 안에서 호출)
+    """
+    global _exporter
+    path = os.path.abspath(config.TRACE_EXPORT_PATH)
+    if _exporter is None or _exporter.baseFilename != path:
+        if _exporter is not None:
+            _exporter.close()
+        config.TRACE_EXPORT_PATH.parent.mkdir(parents=True, exist_ok=True)
+        _exporter = RotatingFileHandler(
+            path, maxBytes=config.TRACE_MAX_BYTES, backupCount=config.TRACE_BACKUP_COUNT, encoding="utf-8",
+        )
+    return _exporter
+
+
+def _export(span_obj: Span):
+    try:
+        line = json.dumps(span_obj.to_dict(), ensure_ascii=False, default=str)
+        with _export_lock:
+            _get_exporter().handle(logging.makeLogRecord({"msg": line}))
+    except Exception as e:
+        logger.warning(f"--- [Trace WARNING] span 기록 실패 ({span_obj.name}): {e} ---")
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Any]:
+    """
+    with 블록의 실행 시간을 span 으로 기록합니다. 바깥 span 이 있으면 그 하위 span 이 됩니다.
+    (config.TRACE_ENABLED 가 False 이면 아무것도 기록하지 않습니다.)
+
+        with span("recommend.search_candidates", k=10) as s:
+            ...
+            s.set(candidates=len(results))
+    """
+    if not config.TRACE_ENABLED:
+        yield _NOOP_SPAN
+        return
+
+    current = Span(name, parent=_current_span.get(), attributes=attributes)
+    token = _current_span.set(current)
+    start = time.perf_counter()
+    try:
+        yield current
+    except Exception as e:
+        current.status = "error"
+        current.attributes["error"] = str(e)[:200]
+        raise
+    finally:
+        current.duration_ms = (time.perf_counter() - start) * 1000
+        _current_span.reset(token)
+        _export(current)
+
+
+def get_current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+def _usage_from_response(response) -> Dict[str, int]:
+    try:
+        message = response.generations[0][0].message
+        usage = getattr(message, "usage_metadata", None) or {}
+        return {k: int(usage[k]) for k in ("input_tokens", "output_tokens") if k in usage}
+    except (AttributeError, IndexError, TypeError):
+        return {}
+
+
+class TracingCallbackHandler(BaseCallbackHandler):
+    """
+    LLM 호출마다 'llm' span 을 기록하는 콜백 핸들러.
+    호출 시점의 현재 span(도구 / 파이프라인 단계)을 부모로 하며, 토큰 수는 상위 span 에도 누적됩니다.
+    """
+
+    def __init__(self):
+        self._runs: Dict[Any, tuple] = {}
+        self._lock = threading.Lock()
+
+    def _start(self, run_id, serialized):
+        if not config.TRACE_ENABLED:
+            return
+        model = ((serialized or {}).get("kwargs") or {}).get("model") or ""
+        with self._lock:
+            self._runs[run_id] = (Span("llm", parent=_current_span.get(), attributes={"model": model}), time.perf_counter())
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        self._start(run_id, serialized)
+
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+        self._start(run_id, serialized)
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        with self._lock:
+            started = self._runs.pop(run_id, None)
+        if started is None:
+            return
+        llm_span, start = started
+        llm_span.duration_ms = (time.perf_counter() - start) * 1000
+        usage = _usage_from_response(response)
+        if usage:
+            llm_span.add_tokens(usage.get("input_tokens", 0), usage.get("output_tokens", 0))
+        _export(llm_span)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        with self._lock:
+            started = self._runs.pop(run_id, None)
+        if started is None:
+            return
+        llm_span, start = started
+        llm_span.duration_ms = (time.perf_counter() - start) * 1000
+        llm_span.status = "error"
+        llm_span.attributes["error"] = str(error)[:200]
+        _export(llm_span)
+
+
+tracing_callback_handler = TracingCallbackHandler()